@@ -1,24 +1,43 @@
 import threading
 import time
-import random
-from typing import Optional, Callable
-import keyboard
-from datetime import datetime, time as dt_time
-from contextlib import contextmanager
-import queue
-import itertools
-import win32api
-import win32con
-import win32gui
-import win32clipboard
+from bisect import bisect_right
+from typing import Optional, Callable, Dict, Iterator, Tuple
+
+from checkpoint import CheckpointJournal, source_key
+from keystroke_plan import ACTION_KEY, KeystrokePlan, PlanCache, PlanCursor, content_hash
+from metrics import RunMetrics
+from clipboard_session import ClipboardSession
+from hotkeys import ENGINE_COMMANDS, CommandQueue
+from incremental import EditScript
+from output_backends import OutputBackend, create_backend
+from preprocess import Preprocessor
+from progress import ProgressChannel
+from text_segmentation import PASTE_MODES
+from text_sources import TextSource
+from timing import DISTRIBUTIONS, DelaySchedule, KeystrokeScheduler, MonotonicClock
+from timing_trace import TimingTrace, TraceSchedule
 
 class AutoTyper:
-    def __init__(self):
-        """Initialize the AutoTyper with optimized settings."""
+    def __init__(self, backend: Optional[OutputBackend] = None,
+                 clock: Optional[MonotonicClock] = None):
+        """Initialize the AutoTyper with optimized settings.
+
+        Args:
+            backend: Output backend receiving keystrokes and pastes;
+                defaults to the Win32 clipboard + keyboard path
+            clock: Time source for keystroke pacing, defaults to MonotonicClock
+        """
         # Initialize all instance variables
         self.running = False
         self.paused = False
         self.thread = None
+        # Set whenever stop or pause must interrupt a wait in the typing thread
+        self._wake = threading.Event()
+        # Set while not paused; the typing thread blocks on it while paused
+        self._resumed = threading.Event()
+        self._resumed.set()
+        # Commands posted from other threads (e.g. hotkeys), applied by the typing thread
+        self.commands = CommandQueue()
         self.text = ""
         self.wpm = 60
         self.random_delay = {
@@ -26,19 +45,111 @@ class AutoTyper:
             "min": 100,
             "max": 1000
         }
+        self.delay_distribution = "uniform"
+        self.delay_seed = None
+        self.delay_schedule = None
+        self.timing_trace: Optional[TimingTrace] = None
+        self.timing_scale = 1.0
+        self.timing_loop = True
         self.interval = 0.0
+        self.countdown = 3
+        self.paste_mode = "char"
+        self.chunk_size = 1
+        self.repeat_count = None
         self.scheduled_time = None
         self._status_callback = None
         self._progress_callback = None
-        self.typing_queue = queue.Queue()
-        
-        # Store original clipboard content
-        try:
-            win32clipboard.OpenClipboard()
-            self.original_clipboard = win32clipboard.GetClipboardData(win32con.CF_UNICODETEXT) if win32clipboard.IsClipboardFormatAvailable(win32con.CF_UNICODETEXT) else ""
-            win32clipboard.CloseClipboard()
-        except:
-            self.original_clipboard = ""
+        self.progress = ProgressChannel()
+        self.source = None
+        self.plan = None
+        self.plans = PlanCache()
+        self.edit_script: Optional[EditScript] = None
+        self.preprocessor = Preprocessor(clipboard=self._clipboard_text)
+        self.cursor = PlanCursor()
+        self._keystroke = 0
+        self.scheduler = KeystrokeScheduler(clock)
+        self.achieved_wpm = 0.0
+        self.completed = False
+        self.metrics_enabled = False
+        self.metrics_path = None
+        self.metrics_hook = None
+        self.metrics: Optional[RunMetrics] = None
+        self.journal: Optional[CheckpointJournal] = None
+        self.profile_name = ""
+        self.resume_requested = False
+        self._resume: Optional[Dict] = None
+        self._text_hash: Optional[str] = None
+        self._block_start = 0
+        self._next_checkpoint = 0.0
+        self.backend = backend if backend is not None else create_backend()
+        # The user's clipboard is snapshotted when a run starts, not here
+        self.clipboard = ClipboardSession(self.backend)
+
+    def set_backend(self, backend: OutputBackend) -> None:
+        """Replace the output backend; ignored while typing is in progress."""
+        if not self.running:
+            self.backend = backend
+            self.clipboard = ClipboardSession(backend)
+
+    def enable_metrics(self, enabled: bool = True, path: Optional[str] = None,
+                       hook: Optional[Callable[[RunMetrics], None]] = None) -> None:
+        """
+        Record per-keystroke latency metrics for the following runs.
+
+        Args:
+            enabled: Whether metrics are recorded
+            path: JSON file the metrics are exported to when a run ends
+            hook: Live profiling callback receiving the RunMetrics every 100 keystrokes
+        """
+        self.metrics_enabled = enabled
+        self.metrics_path = path
+        self.metrics_hook = hook
+
+    def set_checkpoints(self, journal: Optional[CheckpointJournal], profile: str = "") -> None:
+        """
+        Save checkpoints of the following runs so they can be resumed.
+
+        Args:
+            journal: Journal to write to, or None to disable checkpoints
+            profile: Profile the text belongs to; checkpoints are tied to it
+                and to a hash of the text
+        """
+        self.journal = journal
+        self.profile_name = profile
+
+    def text_hash(self) -> Optional[str]:
+        """Return the hash checkpoints of the current text are stored under, None if not resumable."""
+        if self.edit_script is not None:
+            # An edit script only applies to the document state it was computed for
+            return None
+        if self.source is not None:
+            key = source_key(self.source)
+            return content_hash(key).hex() if key is not None else None
+        return content_hash(self.text).hex() if self.text else None
+
+    def find_checkpoint(self) -> Optional[Dict]:
+        """Return the saved checkpoint of the current profile and text, if any."""
+        if self.journal is None:
+            return None
+        text_hash = self.text_hash()
+        return self.journal.load(self.profile_name, text_hash) if text_hash is not None else None
+
+    def request_resume(self, resume: bool = True) -> None:
+        """Make the next run continue from the checkpoint of its text, if one exists."""
+        self.resume_requested = resume
+
+    def resume(self) -> bool:
+        """
+        Start typing where the last run of the current text stopped.
+
+        Returns:
+            bool: False if there is no checkpoint or typing is already running
+        """
+        if self.running or self.find_checkpoint() is None:
+            return False
+        self.request_resume()
+        self.start()
+        return self.running
 
     def set_status_callback(self, callback: Callable[[str], None]) -> None:
         """Set callback for status updates."""
@@ -52,31 +163,138 @@ class AutoTyper:
         """Clean up resources safely."""
         self.running = False
         self.paused = False
-        while not self.typing_queue.empty():
-            try:
-                self.typing_queue.get_nowait()
-            except queue.Empty:
-                break
-        
-        # Restore original clipboard content
-        try:
-            self.set_clipboard(self.original_clipboard)
-        except:
-            pass
+        self._resumed.set()
 
     def set_text(self, text: str) -> None:
         """Set the text to be typed with preprocessing."""
         self.text = text
-        self._prepare_typing_queue()
+        self.source = None
+        self.edit_script = None
+        self._compile_plan()
 
-    def _prepare_typing_queue(self):
-        """Pre-process text into typing chunks."""
-        while not self.typing_queue.empty():
-            self.typing_queue.get_nowait()
-        
-        # Process text character by character
-        for char in self.text:
-            self.typing_queue.put(char)
+    def set_incremental(self, previous: str, text: str, unit: str = "grapheme") -> EditScript:
+        """
+        Type only the edits that turn previously typed text into text.
+
+        The target window must still hold the previous text with the
+        cursor at its end, as a completed run leaves it. Both texts are
+        preprocessed before they are compared.
+
+        Args:
+            previous: Text typed before
+            text: New version of the text
+            unit: What Left and Backspace step over in the target, see
+                incremental.CURSOR_UNITS
+
+        Returns:
+            EditScript: The computed edits
+        """
+        self.text = text
+        self.source = None
+        self.edit_script = EditScript(self.preprocessor.process(previous),
+                                      self.preprocessor.process(text), unit)
+        self._compile_plan()
+        return self.edit_script
+
+    def set_source(self, source: TextSource) -> None:
+        """
+        Type from a lazily read source instead of an in-memory text.
+
+        Args:
+            source: Text source such as FileSource or StreamSource
+        """
+        self.source = source
+        self.text = ""
+        self.edit_script = None
+        self.plan = None
+
+    def set_preprocessing(self, normalization: str = "NFC", whitespace: str = "keep",
+                          newlines: str = "keep", macros: bool = True,
+                          base_dir: Optional[str] = None) -> None:
+        """
+        Set how texts are preprocessed before typing, see Preprocessor.
+
+        Args:
+            normalization: Unicode normalization form, or 'none'
+            whitespace: 'keep', 'trim' or 'collapse'
+            newlines: 'keep', 'lf', 'crlf' or 'space'
+            macros: Whether {{...}} macros are expanded
+            base_dir: Directory relative {{include:...}} paths are resolved against
+        """
+        self.preprocessor.configure(normalization, whitespace, newlines, macros, base_dir)
+        if not self.running and self.text:
+            self._compile_plan()
+
+    def set_trusted(self, trusted: bool) -> None:
+        """Set whether texts come from the local user; see Preprocessor.set_trusted."""
+        self.preprocessor.set_trusted(trusted)
+        if not self.running and self.text:
+            self._compile_plan()
+
+    def _clipboard_text(self) -> str:
+        """Return the user's clipboard for {{clipboard}}, not text pasted by the run."""
+        if self.clipboard.active:
+            return self.clipboard.original or ""
+        return self.backend.get_clipboard()
+
+    def _compile_plan(self) -> Optional[KeystrokePlan]:
+        """
+        Preprocess the text and get its keystroke plan from the cache.
+
+        Returns:
+            Optional[KeystrokePlan]: The plan, or None outside a run when the
+                text has dynamic macros, which are expanded per repeat cycle
+        """
+        if self.edit_script is not None:
+            self.plan = self.edit_script.compile(self.paste_mode, self.chunk_size)
+            return self.plan
+        template = self.preprocessor.compile(self.text)
+        if template.dynamic and not self.running:
+            self.plan = None
+            return None
+        text = self.preprocessor.render(template)
+        self.plan = self.plans.get(text, self.paste_mode, self.chunk_size)
+        return self.plan
+
+    def set_paste_mode(self, mode: str, chunk_size: int = 1) -> None:
+        """
+        Set how text is grouped into clipboard pastes.
+
+        Args:
+            mode: 'char' (one paste per character), 'grapheme', 'word',
+                'line' or 'run' (chunk_size grapheme clusters per paste)
+            chunk_size: Clusters per paste in 'run' mode
+        """
+        if mode not in PASTE_MODES:
+            raise ValueError(f"Unknown paste mode: {mode}")
+        self.paste_mode = mode
+        self.chunk_size = max(1, int(chunk_size))
+        if not self.running and self.text:
+            self._compile_plan()
+
+    def set_repeat_count(self, count: Optional[int]) -> None:
+        """
+        Set how many times the text is typed, waiting `interval` between cycles.
+
+        Args:
+            count: Number of cycles, 0 to repeat until stopped, or None
+                to repeat until stopped only when an interval is set
+        """
+        self.repeat_count = None if count is None else max(0, int(count))
+
+    def _has_next_cycle(self) -> bool:
+        """Check whether another repeat cycle follows the current one."""
+        if self.edit_script is not None:
+            return False
+        if self.source is not None and not self.source.rewindable:
+            return False
+        if self.repeat_count is None:
+            return self.interval > 0
+        return self.repeat_count == 0 or self.cursor.cycle + 1 < self.repeat_count
+
+    def set_countdown(self, seconds: int) -> None:
+        """Set the countdown in seconds before typing starts."""
+        self.countdown = max(0, int(seconds))
 
     def set_wpm(self, wpm: int) -> None:
         """Set typing speed in words per minute with validation."""
@@ -92,104 +310,381 @@ class AutoTyper:
             "max": max_delay / 1000.0
         }
 
-    def calculate_delay(self) -> float:
-        """Calculate delay between keystrokes."""
-        base_delay = 60.0 / (self.wpm * 5)  # Base delay from WPM
-        
-        # Add randomness if enabled
-        if self.random_delay["enabled"]:
-            variance = random.uniform(self.random_delay["min"], self.random_delay["max"])
-            base_delay += variance
-        
-        return base_delay
+    def set_delay_distribution(self, distribution: str, seed: Optional[int] = None) -> None:
+        """
+        Set the random delay distribution and RNG seed.
+
+        Args:
+            distribution: 'uniform', 'normal', 'lognormal' or 'gamma'
+            seed: Seed for reproducible runs, or None for a fresh one each run
+        """
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown delay distribution: {distribution}")
+        self.delay_distribution = distribution
+        self.delay_seed = seed
+
+    def set_timing_trace(self, trace: Optional[TimingTrace], scale: float = 1.0, loop: bool = True) -> None:
+        """
+        Replay recorded keystroke timings instead of the WPM and random delay.
+
+        Args:
+            trace: Recorded intervals, or None to go back to WPM pacing
+            scale: Factor applied to every interval, e.g. 0.5 for twice as fast
+            loop: Whether to start over at the end of the trace
+        """
+        if trace is not None and scale <= 0:
+            raise ValueError("Timing scale must be positive")
+        self.timing_trace = trace
+        self.timing_scale = scale
+        self.timing_loop = loop
+
+    def _build_delay_schedule(self, seed: Optional[int] = None) -> DelaySchedule:
+        """Precompute the delay schedule for a run from the current settings."""
+        if self.timing_trace is not None:
+            return TraceSchedule(self.timing_trace, self.timing_scale, self.timing_loop)
+        return DelaySchedule(
+            60.0 / (self.wpm * 5),
+            self.random_delay["enabled"],
+            self.random_delay["min"],
+            self.random_delay["max"],
+            self.delay_distribution,
+            self.delay_seed if seed is None else seed
+        )
 
     def update_status(self, status: str) -> None:
         """Thread-safe status update."""
+        self.progress.post_status(status)
         if self._status_callback:
             self._status_callback(status)
 
     def update_progress(self, current: int, total: int) -> None:
         """Thread-safe progress update."""
+        self.progress.publish(current, total)
         if self._progress_callback:
             self._progress_callback(current, total)
 
     def set_clipboard(self, text: str) -> None:
         """Set text to clipboard with UTF-16 encoding for Thai support."""
-        try:
-            win32clipboard.OpenClipboard()
-            win32clipboard.EmptyClipboard()
-            win32clipboard.SetClipboardData(win32con.CF_UNICODETEXT, text)
-        finally:
-            win32clipboard.CloseClipboard()
+        self.clipboard.set(text)
 
     def type_text(self) -> None:
         """Type text using clipboard for Thai support."""
+        completed = self.completed = False
+        started = False
         try:
             self._countdown_start()
+            if not self.running:
+                return
+            self.clipboard.begin()
             
-            total_chars = len(self.text)
-            chars_typed = 0
+            scheduler = self.scheduler
+            resume = self._resume
+            self._resume = None
+            # A resumed run regenerates the same delays from the saved seed and keystroke index
+            self.delay_schedule = self._build_delay_schedule(resume["seed"] if resume else None)
+            self._keystroke = resume["keystroke"] if resume else 0
+            if resume:
+                self.cursor.cycle = resume["cycle"]
+                self.preprocessor.counters.update(resume.get("counters", {}))
+            if self.metrics_enabled:
+                self.metrics = RunMetrics(self.wpm, self.metrics_hook)
+            self._next_checkpoint = time.perf_counter() + (self.journal.interval if self.journal else 0)
+            started = True
+            scheduler.start()
             
-            while self.running and not self.typing_queue.empty():
-                if self.paused:
-                    time.sleep(0.1)
-                    continue
-
-                char = self.typing_queue.get()
-                
-                # Handle spaces and Thai characters differently
-                if char == ' ':
-                    keyboard.press_and_release('space')
-                else:
-                    # Use clipboard for Thai characters
-                    self.set_clipboard(char)
-                    keyboard.press_and_release('ctrl+v')
-                
-                chars_typed += 1
-                self.update_progress(chars_typed, total_chars)
-                
-                delay = self.calculate_delay()
-                time.sleep(delay)
-                
-                if self.interval > 0 and self.typing_queue.empty():
+            while self.running:
+                for plan, start, end in self._iter_plans(resume["block_start"] if resume else 0):
+                    self.cursor.plan = plan
+                    self.cursor.index = 0
+                    if resume is not None:
+                        # Continue at the last action boundary at or before the saved position
+                        self.cursor.index = min(len(plan), max(0, bisect_right(plan.offsets, resume["chars"]) - 1))
+                        resume = None
+                    self._block_start = start
+                    self._type_plan(start, end)
+                    if not self.running:
+                        break
+                if self.running and self.source is None:
+                    self.preprocessor.advance(self.text)
+                if not self.running or not self._has_next_cycle():
+                    completed = self.running
+                    break
+                if self.interval > 0:
                     self.update_status(f"Waiting {self.interval} seconds...")
-                    time.sleep(self.interval)
-                    self._prepare_typing_queue()
+                    scheduler.suspend()
+                    self._sleep(self.interval)
+                    scheduler.resume()
+                self.cursor.rewind()
 
         except Exception as e:
             self.update_status(f"Error: {str(e)}")
         finally:
+            self.achieved_wpm = self.scheduler.achieved_wpm()
+            if self.metrics_enabled and self.metrics is not None:
+                self.metrics.finish(self.scheduler.elapsed(), self.achieved_wpm)
+                if self.metrics_path:
+                    try:
+                        self.metrics.to_json(self.metrics_path)
+                    except OSError as e:
+                        self.update_status(f"Error: {str(e)}")
+            # Keep the position of an interrupted run; forget it once the text is done
+            if started and self.journal is not None and self._text_hash is not None:
+                if completed:
+                    self.journal.clear(self.profile_name, self._text_hash)
+                else:
+                    self._save_checkpoint()
+            # Restore the user's clipboard once per run
+            try:
+                self.clipboard.end()
+            except Exception:
+                pass
             self.cleanup()
-            self.update_status("Completed" if chars_typed >= total_chars else "Stopped")
+            self.completed = completed
+            result = "Completed" if completed else "Stopped"
+            self.update_status(f"{result} ({self.achieved_wpm:.0f} of {self.wpm} WPM)")
+
+    def _iter_plans(self, start: int = 0) -> Iterator[Tuple[KeystrokePlan, int, int]]:
+        """Yield (plan, start, end) for each block of the current text or source, from source position start."""
+        if self.source is None:
+            plan = self._compile_plan()
+            yield plan, 0, plan.total_chars
+            return
+        for block, start, end in self.source.blocks(start):
+            yield KeystrokePlan.compile(block, self.paste_mode, self.chunk_size), start, end
+
+    def _type_plan(self, start: int, end: int) -> None:
+        """
+        Emit the actions of the cursor's plan until it ends or typing stops.
+
+        Args:
+            start: Source position of the plan's first character
+            end: Source position after the plan's last character
+        """
+        plan = self.cursor.plan
+        cursor = self.cursor
+        scheduler = self.scheduler
+        schedule = self.delay_schedule
+        total_chars = plan.total_chars
+        span = end - start
+        total = self.source.total if self.source is not None else total_chars
+        metrics = self.metrics if self.metrics_enabled else None
+        journal = self.journal if self._text_hash is not None else None
+        perf_counter = time.perf_counter
+        
+        commands = self.commands
+        while self.running and not cursor.at_end():
+            if commands:
+                self._apply_commands()
+                continue
+            if self.paused:
+                self._wait_while_paused()
+                continue
+
+            action, chunk = plan.action(cursor.index)
+            
+            t_start = perf_counter()
+            # Handle spaces and Thai characters differently
+            if action == ACTION_KEY:
+                t_clipboard = t_start
+                self.backend.press(chunk)
+            else:
+                # Use clipboard for Thai characters, one paste per chunk
+                self.set_clipboard(chunk)
+                t_clipboard = perf_counter()
+                self.backend.paste()
+            t_inject = perf_counter()
+            
+            cursor.index += 1
+            length = plan.offsets[cursor.index] - plan.offsets[cursor.index - 1]
+            scheduler.add_chars(length)
+            if span == total_chars:
+                position = start + cursor.chars_done
+            else:
+                # Interpolate byte positions within a decoded block
+                position = start + span * cursor.chars_done // total_chars
+            self.update_progress(position, total or 0)
+            t_callback = perf_counter()
+            
+            # Sleep to an absolute deadline so keystroke overhead doesn't add up
+            delay = schedule.delay(self._keystroke, length)
+            self._keystroke += 1
+            while not scheduler.wait(delay, self._wake):
+                # Interrupted by pause, stop or a posted command; a paused wait resumes where it left off
+                self._wake.clear()
+                self._apply_commands()
+                if not self.running:
+                    break
+                self._wait_while_paused()
+            
+            if metrics is not None:
+                metrics.record(t_clipboard - t_start, t_inject - t_clipboard,
+                               t_callback - t_inject, perf_counter() - t_callback, length)
+            
+            if journal is not None and t_callback >= self._next_checkpoint:
+                self._save_checkpoint()
+                self._next_checkpoint = t_callback + journal.interval
+
+    def _save_checkpoint(self) -> None:
+        """Write the current position and schedule state to the journal."""
+        progress = self.progress.position()
+        try:
+            self.journal.save({
+                "profile": self.profile_name,
+                "text_hash": self._text_hash,
+                "cycle": self.cursor.cycle,
+                "block_start": self._block_start,
+                "chars": self.cursor.chars_done,
+                "position": progress[0] if progress else 0,
+                "total": progress[1] if progress else 0,
+                "keystroke": self._keystroke,
+                "seed": self.delay_schedule.seed,
+                "counters": dict(self.preprocessor.counters),
+            })
+        except OSError as e:
+            self.update_status(f"Error: {str(e)}")
+
+    def _wait_while_paused(self) -> None:
+        """Block without polling until typing is resumed or stopped."""
+        if not self.paused:
+            return
+        self.scheduler.suspend()
+        while self.paused and self.running:
+            self._resumed.wait()
+            self._apply_commands()
+            if self.paused:
+                # Woken only to apply a command
+                self._resumed.clear()
+        self.scheduler.resume()
+
+    def _sleep(self, seconds: float) -> bool:
+        """
+        Sleep on the engine clock, returning early only when typing stops.
+
+        Returns:
+            bool: True if the full time elapsed, False if stopped
+        """
+        clock = self.scheduler.clock
+        deadline = clock.now() + seconds
+        while self.running:
+            remaining = deadline - clock.now()
+            if remaining <= 0:
+                return True
+            if clock.wait(self._wake, remaining):
+                self._wake.clear()
+                self._apply_commands()
+        return False
 
     def _countdown_start(self):
-        """Handle countdown with status updates."""
-        for i in range(3, 0, -1):
+        """Handle countdown with status updates; stop cancels it immediately."""
+        for i in range(self.countdown, 0, -1):
             if not self.running:
                 return
             self.update_status(f"Starting in {i} seconds...")
-            time.sleep(1)
+            self._sleep(1)
+
+    def _begin_run(self) -> bool:
+        """Reset run state; returns False if already running or there is nothing to type."""
+        has_edits = self.edit_script is not None and bool(self.edit_script.ops)
+        if self.running or not (self.text or self.source is not None or has_edits):
+            return False
+        self.running = True
+        self.paused = False
+        self._wake.clear()
+        self._resumed.set()
+        self.commands.drain()  # Left over from a run that ended before applying them
+        self.progress.reset()
+        try:
+            self.cursor.reset(self._compile_plan() if self.source is None else None)
+            self._text_hash = self.text_hash() if self.journal is not None else None
+        except Exception:
+            # e.g. a missing {{include:...}} file
+            self.running = False
+            raise
+        self._resume = None
+        if self.resume_requested and self._text_hash is not None:
+            self._resume = self.journal.load(self.profile_name, self._text_hash)
+        self.resume_requested = False
+        return True
+
+    def begin_run(self) -> bool:
+        """
+        Claim the engine for a run that the calling thread types with run(begun=True).
+
+        Lets a caller begin the run while holding its own lock, so a stop()
+        issued under that lock either reaches the run or comes before it.
+
+        Returns:
+            bool: False if already running or there is nothing to type
+        """
+        return self._begin_run()
 
     def start(self) -> None:
         """Start typing with proper thread management."""
-        if not self.running and self.text:
-            self.running = True
-            self.paused = False
-            self._prepare_typing_queue()
+        if self._begin_run():
             self.thread = threading.Thread(target=self.type_text)
             self.thread.daemon = True
             self.thread.start()
 
+    def run(self, begun: bool = False) -> bool:
+        """
+        Type on the calling thread until the run completes or is stopped.
+
+        Args:
+            begun: Whether begin_run() already claimed the run
+
+        Returns:
+            bool: True if the text was typed completely
+        """
+        if not begun and not self._begin_run():
+            return False
+        self.thread = threading.current_thread()
+        self.type_text()
+        return self.completed
+
+    def post_command(self, command: str) -> bool:
+        """
+        Ask the typing thread to stop or toggle pause; safe to call from any thread.
+
+        The command is queued without a lock and every wait is woken, so it
+        takes effect within one keystroke whatever other threads are doing.
+
+        Returns:
+            bool: False if no run is active to receive it
+        """
+        if command not in ENGINE_COMMANDS:
+            raise ValueError(f"Unknown engine command: {command}")
+        if not self.running:
+            return False
+        self.commands.push(command)
+        self._wake.set()
+        self._resumed.set()
+        return True
+
+    def _apply_commands(self) -> None:
+        """Apply posted commands; runs on the typing thread."""
+        for command, _ in self.commands.drain():
+            if command == "stop":
+                self.stop()
+            elif command == "pause" and self.running:
+                self.toggle_pause()
+
     def stop(self) -> None:
         """Stop typing with proper cleanup."""
         self.running = False
         self.paused = False
+        self._wake.set()
+        self._resumed.set()
         self.update_status("Stopped")
 
     def toggle_pause(self) -> None:
         """Toggle pause state with status update."""
         if self.running:
             self.paused = not self.paused
+            if self.paused:
+                self._resumed.clear()
+                self._wake.set()
+            else:
+                self._resumed.set()
             self.update_status("Paused" if self.paused else "Resumed")
 
     def is_running(self) -> bool:
@@ -0,0 +1,105 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import CHECKPOINTS_DIR, atomic_write
+
+# Seconds between checkpoint writes while typing
+CHECKPOINT_INTERVAL = 2.0
+
+CHECKPOINT_VERSION = 1
+
+
+def source_key(source) -> Optional[str]:
+    """
+    Return a cheap identity for a file source, or None if it can't be resumed.
+
+    Files are identified by path, size and modification time rather than
+    hashing their contents, which could take longer than the run itself.
+    """
+    path = getattr(source, "path", None)
+    if path is None or not source.rewindable:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"file:{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class CheckpointJournal:
+    """
+    Small JSON journal of where typing runs stopped.
+
+    There is one file per profile and text hash, holding the repeat
+    cycle, the position in the text and the keystroke index and seed of
+    the delay schedule, which is enough to regenerate the exact remaining
+    delays. The engine writes at most once per interval, atomically, so
+    a crash loses at most a few seconds and disk I/O per keystroke is nil.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, interval: float = CHECKPOINT_INTERVAL):
+        """
+        Initialize the journal.
+
+        Args:
+            directory: Directory of the checkpoint files, created on first write
+            interval: Seconds between writes while typing
+        """
+        self.directory = Path(directory) if directory is not None else CHECKPOINTS_DIR
+        self.interval = interval
+        self.writes = 0
+
+    @staticmethod
+    def _safe_name(name: str) -> str:
+        """Sanitize a profile name for use in a file name."""
+        return "".join(x for x in name if x.isalnum() or x in "._- ")
+
+    def path(self, profile: str, text_hash: str) -> Path:
+        """Return the checkpoint file of a profile and text."""
+        return self.directory / f"{self._safe_name(profile) or 'default'}-{text_hash[:32]}.json"
+
+    def save(self, state: Dict) -> None:
+        """Write a checkpoint; state must contain 'profile' and 'text_hash'."""
+        state = dict(state, version=CHECKPOINT_VERSION, updated=time.time())
+        self.directory.mkdir(parents=True, exist_ok=True)
+        atomic_write(self.path(state["profile"], state["text_hash"]), json.dumps(state))
+        self.writes += 1
+
+    def load(self, profile: str, text_hash: str) -> Optional[Dict]:
+        """Return the checkpoint of a profile and text, or None."""
+        try:
+            with open(self.path(profile, text_hash), encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("version") != CHECKPOINT_VERSION or state.get("text_hash") != text_hash:
+            return None
+        return state
+
+    def clear(self, profile: str, text_hash: str) -> None:
+        """Remove the checkpoint of a profile and text."""
+        try:
+            os.remove(self.path(profile, text_hash))
+        except OSError:
+            pass
+
+    def list(self, profile: Optional[str] = None) -> List[Dict]:
+        """Return all checkpoints, optionally of one profile, newest first."""
+        states = []
+        try:
+            paths = list(self.directory.glob("*.json"))
+        except OSError:
+            return states
+        for path in paths:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if state.get("version") == CHECKPOINT_VERSION and (profile is None or state.get("profile") == profile):
+                states.append(state)
+        states.sort(key=lambda state: state.get("updated", 0), reverse=True)
+        return states
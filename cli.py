@@ -0,0 +1,387 @@
+"""
+Headless command-line entry point for AutoTyper.
+
+Types text from arguments, files or stdin without importing Tk:
+
+    python cli.py type --wpm 120 "Hello world"
+    python cli.py type --file essay.txt --metrics-json run.json
+    echo "Hello" | python cli.py type --backend xtest
+    python cli.py type --file essay-v2.txt --previous essay-v1.txt
+
+`python cli.py daemon` keeps one engine and backend warm and types one
+job per JSON line read from stdin, writing one JSON result line per job
+to stdout:
+
+    {"id": 1, "text": "Hello", "wpm": 90, "random_delay": {"enabled": true, "min": 50, "max": 150}}
+
+`python cli.py serve` runs the localhost control API, see control_server.py.
+
+`python cli.py record-timing trace.bin` records how you type until Esc is
+pressed; `type --timing-trace trace.bin` replays those intervals.
+"""
+import argparse
+import json
+import signal
+import sys
+import threading
+from typing import Callable, Dict, IO, Optional
+
+from auto_typer import AutoTyper
+from config import CONTROL_PORT, DEFAULT_SETTINGS
+from incremental import CURSOR_UNITS
+from output_backends import BACKENDS, create_backend
+from preprocess import NEWLINE_POLICIES, NORMALIZATIONS, WHITESPACE_POLICIES
+from text_segmentation import PASTE_MODES
+from text_sources import FileSource, StreamSource
+from timing import DISTRIBUTIONS
+from timing_trace import MAX_PAUSE, TimingTrace, TraceRecorder
+
+# Keys accepted in daemon job lines, mirroring the `type` options
+JOB_KEYS = ("id", "text", "file", "encoding", "wpm", "random_delay", "distribution", "seed",
+            "interval", "repeat", "countdown", "paste_mode", "chunk_size", "metrics", "metrics_json",
+            "normalization", "whitespace", "newlines", "macros", "previous", "previous_file",
+            "cursor_unit", "timing_trace", "timing_scale", "timing_loop")
+
+
+def configure(typer: AutoTyper, options: Dict) -> None:
+    """
+    Apply job options to the engine, falling back to the default settings.
+
+    Args:
+        typer: Engine to configure
+        options: Job options as parsed from the command line or a daemon line
+    """
+    random_delay = dict(DEFAULT_SETTINGS["random_delay"])
+    random_delay.update(options.get("random_delay") or {})
+    typer.set_wpm(int(options.get("wpm") or DEFAULT_SETTINGS["wpm"]))
+    typer.set_random_delay(bool(random_delay["enabled"]), float(random_delay["min"]),
+                           float(random_delay["max"]))
+    typer.set_delay_distribution(options.get("distribution") or random_delay["distribution"],
+                                 options.get("seed"))
+    typer.interval = float(options.get("interval") or 0.0)
+    typer.set_repeat_count(options.get("repeat"))
+    typer.set_countdown(options.get("countdown") or 0)
+    typer.set_paste_mode(options.get("paste_mode") or DEFAULT_SETTINGS["paste_mode"],
+                         options.get("chunk_size") or DEFAULT_SETTINGS["chunk_size"])
+    typer.enable_metrics(bool(options.get("metrics") or options.get("metrics_json")),
+                         options.get("metrics_json"))
+    preprocess = dict(DEFAULT_SETTINGS["preprocess"])
+    preprocess.update({key: options[key] for key in preprocess if options.get(key) is not None})
+    typer.set_preprocessing(**preprocess)
+    if typer.timing_trace is not None:
+        typer.timing_trace.close()
+    if options.get("timing_trace"):
+        typer.set_timing_trace(TimingTrace.load(options["timing_trace"]),
+                               float(options.get("timing_scale") or 1.0),
+                               options.get("timing_loop") is not False)
+    else:
+        typer.set_timing_trace(None)
+
+    previous = options.get("previous")
+    if options.get("previous_file"):
+        with open(options["previous_file"], encoding=options.get("encoding") or "utf-8") as f:
+            previous = f.read()
+    if previous is not None:
+        # Edit scripts are computed from both versions in memory
+        text = options.get("text")
+        if options.get("file"):
+            with open(options["file"], encoding=options.get("encoding") or "utf-8") as f:
+                text = f.read()
+        elif text is None:
+            text = sys.stdin.read()
+        typer.set_incremental(previous, text, options.get("cursor_unit") or "grapheme")
+    elif options.get("file"):
+        typer.set_source(FileSource(options["file"], options.get("encoding") or "utf-8"))
+    elif options.get("text") is not None:
+        typer.set_text(options["text"])
+    else:
+        typer.set_source(StreamSource(encoding=options.get("encoding") or "utf-8"))
+
+
+def run_job(typer: AutoTyper, options: Dict, on_status: Optional[Callable[[str], None]] = None) -> Dict:
+    """
+    Type one job synchronously and summarize the result.
+
+    Args:
+        typer: Engine shared between jobs
+        options: Job options, see configure()
+        on_status: Receives the engine's status messages
+
+    Returns:
+        Dict: Job id, completion, achieved WPM, error and optional metrics
+    """
+    errors = []
+
+    def status_callback(status: str) -> None:
+        if status.startswith("Error:"):
+            errors.append(status)
+        if on_status is not None:
+            on_status(status)
+
+    typer.set_status_callback(status_callback)
+    result = {"id": options.get("id"), "completed": False, "achieved_wpm": 0.0, "error": None}
+    try:
+        configure(typer, options)
+        result["completed"] = typer.run()
+        result["achieved_wpm"] = round(typer.achieved_wpm, 2)
+        if options.get("metrics") and typer.metrics is not None:
+            result["metrics"] = typer.metrics.to_dict()
+    except (ValueError, TypeError, OSError) as e:
+        status_callback(f"Error: {str(e)}")
+    finally:
+        typer.set_status_callback(None)
+    if errors:
+        result["error"] = errors[-1][len("Error: "):]
+    return result
+
+
+def serve(typer: AutoTyper, lines: IO[str], output: IO[str],
+          on_status: Optional[Callable[[str], None]] = None,
+          stop_event: Optional[threading.Event] = None) -> int:
+    """
+    Run the daemon loop: one JSON job per input line, one JSON result per output line.
+
+    Args:
+        typer: Engine kept warm between jobs
+        lines: Stream of job lines; the loop ends at end of stream
+        output: Stream the result lines are written to
+        on_status: Receives the engine's status messages
+        stop_event: Ends the loop after the current job once set
+
+    Returns:
+        int: Number of jobs that failed or were stopped
+    """
+    failures = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            options = json.loads(line)
+            if not isinstance(options, dict):
+                raise ValueError("job must be a JSON object")
+            unknown = set(options) - set(JOB_KEYS)
+            if unknown:
+                raise ValueError(f"unknown job keys: {', '.join(sorted(unknown))}")
+            if options.get("text") is None and not options.get("file"):
+                raise ValueError("job needs 'text' or 'file'")
+        except ValueError as e:
+            result = {"id": None, "completed": False, "achieved_wpm": 0.0, "error": str(e)}
+        else:
+            result = run_job(typer, options, on_status)
+        if not result["completed"]:
+            failures += 1
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+        if stop_event is not None and stop_event.is_set():
+            break
+    return failures
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the argument parser."""
+    parser = argparse.ArgumentParser(prog="cli.py", description="Headless Auto Typer")
+    parser.add_argument("--backend", default=DEFAULT_SETTINGS["backend"],
+                        choices=["auto"] + sorted(BACKENDS), help="output backend (default: %(default)s)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't print status messages")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    type_parser = commands.add_parser("type", help="type text once and exit")
+    type_parser.add_argument("text", nargs="*", help="text to type; read from stdin when omitted")
+    type_parser.add_argument("-f", "--file", help="type the contents of a text file")
+    type_parser.add_argument("--encoding", default="utf-8", help="encoding of --file or stdin")
+    type_parser.add_argument("--wpm", type=int, default=DEFAULT_SETTINGS["wpm"], help="words per minute")
+    type_parser.add_argument("--random-delay", nargs=2, type=float, metavar=("MIN_MS", "MAX_MS"),
+                             help="add a random delay between MIN_MS and MAX_MS to each keystroke")
+    type_parser.add_argument("--distribution", choices=sorted(DISTRIBUTIONS),
+                             default=DEFAULT_SETTINGS["random_delay"]["distribution"],
+                             help="random delay distribution")
+    type_parser.add_argument("--seed", type=int, help="random delay seed for reproducible runs")
+    type_parser.add_argument("--interval", type=float, default=0.0,
+                             help="seconds between repeat cycles")
+    type_parser.add_argument("--repeat", type=int,
+                             help="number of cycles, 0 to repeat until interrupted")
+    type_parser.add_argument("--countdown", type=int, default=0, help="seconds to wait before typing")
+    type_parser.add_argument("--paste-mode", choices=PASTE_MODES, default=DEFAULT_SETTINGS["paste_mode"],
+                             help="how text is grouped into pastes")
+    type_parser.add_argument("--chunk-size", type=int, default=DEFAULT_SETTINGS["chunk_size"],
+                             help="grapheme clusters per paste in run mode")
+    type_parser.add_argument("--metrics-json", metavar="PATH", help="write per-keystroke metrics to PATH")
+    type_parser.add_argument("--normalization", choices=NORMALIZATIONS,
+                             help="Unicode normalization form (default: NFC)")
+    type_parser.add_argument("--whitespace", choices=WHITESPACE_POLICIES, help="whitespace policy")
+    type_parser.add_argument("--newlines", choices=NEWLINE_POLICIES, help="newline policy")
+    type_parser.add_argument("--previous", metavar="FILE",
+                             help="text typed before; type only the edits turning it into the new text")
+    type_parser.add_argument("--cursor-unit", choices=CURSOR_UNITS, default="grapheme",
+                             help="what Left and Backspace step over in the target with --previous")
+    type_parser.add_argument("--no-macros", dest="macros", action="store_false", default=None,
+                             help="type {{...}} macros literally")
+    type_parser.add_argument("--timing-trace", metavar="PATH",
+                             help="replay keystroke timings recorded with record-timing instead of --wpm")
+    type_parser.add_argument("--timing-scale", type=float, default=1.0,
+                             help="factor applied to replayed intervals, e.g. 0.5 for twice as fast")
+    type_parser.add_argument("--no-timing-loop", dest="timing_loop", action="store_false",
+                             help="use the trace's mean interval past its end instead of starting over")
+
+    record_parser = commands.add_parser("record-timing", help="record your keystroke timings to a trace file")
+    record_parser.add_argument("output", help="trace file to write")
+    record_parser.add_argument("--stop-key", default="esc", help="key that ends the recording (default: %(default)s)")
+    record_parser.add_argument("--max-pause", type=float, default=MAX_PAUSE,
+                               help="clip pauses longer than this many seconds (default: %(default)s)")
+
+    commands.add_parser("daemon", help="type JSON job lines from stdin with a warm engine")
+
+    serve_parser = commands.add_parser("serve", help="run the localhost HTTP/JSON control API")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="interface to bind (default: %(default)s)")
+    serve_parser.add_argument("--port", type=int, default=CONTROL_PORT, help="port (default: %(default)s)")
+    serve_parser.add_argument("--token", help="token clients send as 'Authorization: Bearer TOKEN' "
+                                              "(default: a random token, printed at startup)")
+    serve_parser.add_argument("--no-token", dest="require_token", action="store_false",
+                              help="accept requests without a token")
+    serve_parser.add_argument("--hold", action="store_true",
+                              help="queue submitted jobs until a client POSTs /start")
+    return parser
+
+
+def options_from_args(args: argparse.Namespace) -> Dict:
+    """Convert parsed `type` arguments into job options."""
+    options = {
+        "text": " ".join(args.text) if args.text else None,
+        "file": args.file,
+        "encoding": args.encoding,
+        "wpm": args.wpm,
+        "distribution": args.distribution,
+        "seed": args.seed,
+        "interval": args.interval,
+        "repeat": args.repeat,
+        "countdown": args.countdown,
+        "paste_mode": args.paste_mode,
+        "chunk_size": args.chunk_size,
+        "metrics_json": args.metrics_json,
+        "normalization": args.normalization,
+        "whitespace": args.whitespace,
+        "newlines": args.newlines,
+        "macros": args.macros,
+        "previous_file": args.previous,
+        "cursor_unit": args.cursor_unit,
+        "timing_trace": args.timing_trace,
+        "timing_scale": args.timing_scale,
+        "timing_loop": args.timing_loop,
+    }
+    if args.random_delay:
+        options["random_delay"] = {"enabled": True, "min": args.random_delay[0], "max": args.random_delay[1]}
+    return options
+
+
+def serve_control_api(typer: AutoTyper, args: argparse.Namespace, stop_event: threading.Event) -> int:
+    """Run the control server until interrupted."""
+    from checkpoint import CheckpointJournal
+    from control_server import ControlServer
+    from job_queue import JobScheduler
+
+    if typer.journal is None:
+        typer.set_checkpoints(CheckpointJournal())
+    scheduler = JobScheduler(typer)
+    server = ControlServer(scheduler, args.host, args.port, args.token, require_token=args.require_token)
+    try:
+        port = server.start_in_thread()
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print(f"Control API listening on http://{args.host}:{port}", file=sys.stderr, flush=True)
+    if server.token is not None:
+        print(f"Token: {server.token}", file=sys.stderr, flush=True)
+    if not args.hold:
+        scheduler.start()
+    try:
+        stop_event.wait()
+    finally:
+        scheduler.shutdown()
+        server.stop()
+    return 0
+
+
+def record_timing(args: argparse.Namespace) -> int:
+    """Record keystroke intervals until the stop key is pressed and save them."""
+    recorder = TraceRecorder(args.max_pause)
+    try:
+        import keyboard
+        recorder.start()
+    except (ImportError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print(f"Recording, type normally and press {args.stop_key} to stop...", file=sys.stderr)
+    try:
+        keyboard.wait(args.stop_key)
+    except KeyboardInterrupt:
+        pass
+    trace = recorder.stop()
+    if len(trace):
+        # The last interval leads to the stop key
+        trace = TimingTrace(trace.intervals[:-1], trace.tick_us)
+    try:
+        trace.save(args.output)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Saved {len(trace)} intervals to {args.output}", file=sys.stderr)
+    return 0
+
+
+def main(argv=None, typer: Optional[AutoTyper] = None) -> int:
+    """
+    Run the command line interface.
+
+    Args:
+        argv: Arguments, defaults to sys.argv[1:]
+        typer: Engine to use instead of one built for --backend
+
+    Returns:
+        int: Exit status
+    """
+    args = build_parser().parse_args(argv)
+    if args.command == "record-timing":
+        return record_timing(args)
+    if typer is None:
+        try:
+            typer = AutoTyper(create_backend(args.backend))
+        except (ValueError, RuntimeError, ImportError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+    on_status = None if args.quiet else (lambda status: print(status, file=sys.stderr, flush=True))
+    stop_event = threading.Event()
+
+    # Ctrl+C and SIGTERM stop the current run cleanly so the clipboard is restored
+    def handle_signal(signum, frame):
+        stop_event.set()
+        if not typer.is_running():
+            raise KeyboardInterrupt
+        typer.stop()
+    previous = {}
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            previous[signum] = signal.signal(signum, handle_signal)
+        except ValueError:
+            pass  # Not on the main thread
+
+    try:
+        if args.command == "serve":
+            return serve_control_api(typer, args, stop_event)
+        if args.command == "daemon":
+            return 1 if serve(typer, sys.stdin, sys.stdout, on_status, stop_event) else 0
+
+        result = run_job(typer, options_from_args(args), on_status)
+        if result["error"] and args.quiet:
+            print(f"Error: {result['error']}", file=sys.stderr)
+        return 0 if result["completed"] else 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+        typer.backend.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+from collections import OrderedDict
+from typing import Optional
+
+from output_backends import OutputBackend
+
+
+class ClipboardSession:
+    """
+    Clipboard access for the duration of one typing run.
+
+    The session snapshots the user's clipboard when a run begins and
+    restores it once when the run ends. In between it skips writes whose
+    content is already on the clipboard and keeps an LRU cache of
+    backend-encoded buffers (UTF-16 for Win32), so repeated characters
+    and chunks are only encoded once.
+    """
+
+    def __init__(self, backend: OutputBackend, cache_size: int = 512, max_cached_length: int = 256):
+        """
+        Initialize the session.
+
+        Args:
+            backend: Output backend that owns the system clipboard
+            cache_size: Maximum number of encoded buffers kept
+            max_cached_length: Longer texts are encoded on every write
+        """
+        self.backend = backend
+        self.cache_size = cache_size
+        self.max_cached_length = max_cached_length
+        self.original: Optional[str] = None
+        self.active = False
+        self.writes = 0
+        self.skipped = 0
+        self.cache_hits = 0
+        self._current: Optional[str] = None
+        self._cache = OrderedDict()
+
+    def begin(self) -> None:
+        """Snapshot the user's clipboard and take the clipboard for a run."""
+        if self.active:
+            return
+        try:
+            self.original = self.backend.get_clipboard()
+        except Exception:
+            self.original = None
+        self._current = None
+        self.writes = self.skipped = self.cache_hits = 0
+        self.backend.open_clipboard_session()
+        self.active = True
+
+    def set(self, text: str) -> None:
+        """Put text on the clipboard unless it is already there."""
+        if text == self._current and self.backend.clipboard_unchanged():
+            self.skipped += 1
+            return
+        data = self._cache.get(text)
+        if data is None:
+            data = self.backend.encode_clipboard(text)
+            if len(text) <= self.max_cached_length:
+                self._cache[text] = data
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(text)
+            self.cache_hits += 1
+        # Forget the current content first so a failed write is retried next time
+        self._current = None
+        self.backend.set_clipboard_data(data)
+        self._current = text
+        self.writes += 1
+
+    def end(self) -> None:
+        """Restore the user's clipboard and release it."""
+        if not self.active:
+            return
+        self.active = False
+        try:
+            if self.original is not None:
+                self.backend.set_clipboard(self.original)
+        finally:
+            self._current = None
+            self.backend.close_clipboard_session()
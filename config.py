@@ -1,6 +1,11 @@
+import atexit
+import copy
 import json
 import os
+import tempfile
+import threading
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
 
 # Application Constants
 APP_NAME = "Auto Typer"
@@ -9,7 +14,19 @@ VERSION = "1.0.0"
 # File Paths
 BASE_DIR = Path(os.path.dirname(os.path.abspath(__file__)))
 PROFILES_DIR = BASE_DIR / "profiles"
-PROFILES_DIR.mkdir(exist_ok=True)
+CHECKPOINTS_DIR = BASE_DIR / "checkpoints"
+
+# Cold start budget checked by `main.py --startup-profile`, in milliseconds
+STARTUP_BUDGET_MS = 500
+
+# Default localhost port of the control API
+CONTROL_PORT = 8765
+
+
+def ensure_profiles_dir() -> Path:
+    """Create the profiles directory on first use instead of at import time."""
+    PROFILES_DIR.mkdir(exist_ok=True)
+    return PROFILES_DIR
 
 # Default Settings
 DEFAULT_SETTINGS = {
@@ -18,10 +35,20 @@ DEFAULT_SETTINGS = {
     "random_delay": {
         "enabled": False,
         "min": 100,  # 100 milliseconds
-        "max": 1000  # 1000 milliseconds
+        "max": 1000,  # 1000 milliseconds
+        "distribution": "uniform"  # uniform, normal, lognormal or gamma
     },
     "interval": 0.0,
+    "paste_mode": "char",  # char, grapheme, word, line or run
+    "chunk_size": 1,  # Grapheme clusters per paste in run mode
+    "preprocess": {
+        "normalization": "NFC",  # NFC, NFD, NFKC, NFKD or none
+        "whitespace": "keep",  # keep, trim or collapse
+        "newlines": "keep",  # keep, lf, crlf or space
+        "macros": True  # Expand {{date}}, {{time}}, {{counter}}, {{clipboard}}, {{include:path}}
+    },
     "failsafe": True,
+    "backend": "auto",  # auto, win32, xtest or recording
     "hotkeys": {
         "start_stop": "F6",
         "emergency_stop": "esc"
@@ -57,27 +84,240 @@ STATUS_MESSAGES = {
     "error": "Error occurred"
 }
 
-def load_settings():
-    """Load application settings from config file."""
-    settings_path = BASE_DIR / "settings.json"
+def atomic_write(path: Path, data: str) -> None:
+    """Write data to path through a temporary file and rename, so readers never see partial files."""
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
     try:
-        if settings_path.exists():
-            with open(settings_path, 'r') as f:
-                loaded_settings = json.load(f)
-                # Merge with defaults to ensure all required fields exist
-                merged_settings = DEFAULT_SETTINGS.copy()
-                merged_settings.update(loaded_settings)
-                return merged_settings
-        return DEFAULT_SETTINGS
-    except Exception:
-        return DEFAULT_SETTINGS
+        # newline='' so texts keep their own line endings on Windows too
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def merge_settings(defaults: Dict, loaded: Any) -> Dict:
+    """
+    Deep-merge loaded settings over defaults, validated against the defaults' types.
+
+    Values whose type doesn't match the default (ints and floats are
+    interchangeable) are replaced by the default; nested dicts are merged
+    recursively so partial blocks keep their missing defaults. Keys not in
+    the defaults are kept as they are.
+    """
+    merged = copy.deepcopy(defaults)
+    if not isinstance(loaded, dict):
+        return merged
+    for key, value in loaded.items():
+        if key not in defaults:
+            merged[key] = value
+            continue
+        default = defaults[key]
+        if isinstance(default, dict):
+            merged[key] = merge_settings(default, value)
+        elif isinstance(default, bool):
+            if isinstance(value, bool):
+                merged[key] = value
+        elif isinstance(default, (int, float)):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                merged[key] = type(default)(value)
+        elif isinstance(value, type(default)):
+            merged[key] = value
+    return merged
+
+
+class SettingsService:
+    """
+    Cached, hot-reloadable view of settings.json.
+
+    Reads are served from memory. Saves update the cache immediately and
+    are written to disk by a debounced timer using an atomic rename. A
+    watcher thread polls the file's mtime and reloads it when another
+    process or the user edits it. Changes are merged into a new dict that
+    replaces the cached one in a single assignment, so readers on other
+    threads see either the old or the new settings, never a partial dict.
+    A file that can't be parsed, such as one an editor is still writing,
+    leaves the last good settings in place until it is fixed.
+    """
+
+    def __init__(self, path: Path, defaults: Dict, debounce: float = 0.5, watch_interval: float = 1.0):
+        """
+        Initialize the service and load the settings file.
+
+        Args:
+            path: Settings file
+            defaults: Default settings, also used as the validation schema
+            debounce: Seconds to wait for further saves before writing
+            watch_interval: Seconds between checks for external changes
+        """
+        self.path = path
+        self.defaults = defaults
+        self.debounce = debounce
+        self.watch_interval = watch_interval
+        self.version = 0  # Bumped on every reload of an external change
+        self._lock = threading.RLock()
+        self._settings: Dict = merge_settings(defaults, {})
+        self._mtime: Optional[int] = None
+        self._timer: Optional[threading.Timer] = None
+        self._subscribers: List[Callable[[Dict], None]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        self._reload()
+
+    def _file_mtime(self) -> Optional[int]:
+        """Return the settings file mtime in nanoseconds, or None if missing."""
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _reload(self) -> bool:
+        """
+        Read the file into the cache.
+
+        Returns:
+            bool: False if the file is missing or malformed; the cached
+                settings are kept and the file is read again on the next check
+        """
+        mtime = self._file_mtime()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                loaded = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(loaded, dict):
+            return False
+        merged = merge_settings(self.defaults, loaded)
+        with self._lock:
+            self._settings = merged
+            self._mtime = mtime
+        return True
+
+    def get(self) -> Dict:
+        """
+        Return the cached settings dict; save() after changing it.
+
+        Reloads replace the dict, so get it again when `version` changes.
+        """
+        return self._settings
+
+    def update(self, changes: Dict) -> None:
+        """Deep-merge changes into the settings and schedule a write."""
+        with self._lock:
+            self._settings = merge_settings(self.defaults, self._merge_over(self._settings, changes))
+        self._schedule_write()
+
+    @staticmethod
+    def _merge_over(base: Dict, changes: Dict) -> Dict:
+        """Recursively overlay changes on a copy of base without validation."""
+        result = copy.deepcopy(base)
+        for key, value in changes.items():
+            if isinstance(value, dict) and isinstance(result.get(key), dict):
+                result[key] = SettingsService._merge_over(result[key], value)
+            else:
+                result[key] = value
+        return result
+
+    def save(self, settings: Optional[Dict] = None) -> None:
+        """Replace the settings (or keep the mutated cache) and schedule a write."""
+        with self._lock:
+            if settings is not None and settings is not self._settings:
+                self._settings = merge_settings(self.defaults, settings)
+        self._schedule_write()
+
+    def _schedule_write(self) -> None:
+        """Restart the debounce timer for the next write."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> bool:
+        """Write pending changes now; returns False if the write failed."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            try:
+                atomic_write(self.path, json.dumps(self._settings, indent=4))
+                self._mtime = self._file_mtime()
+                return True
+            except Exception:
+                return False
+
+    def flush_if_pending(self) -> None:
+        """Write pending changes, if any; registered to run at exit."""
+        if self._timer is not None:
+            self.flush()
+
+    def subscribe(self, callback: Callable[[Dict], None]) -> None:
+        """Call callback from the watcher thread after an external change is loaded."""
+        self._subscribers.append(callback)
+
+    def check_for_changes(self) -> bool:
+        """Reload the file if it changed on disk; returns True when reloaded."""
+        with self._lock:
+            mtime = self._file_mtime()
+            if mtime is None or mtime == self._mtime or self._timer is not None:
+                # Local unsaved changes win over the file until written
+                return False
+        if not self._reload():
+            return False
+        self.version += 1
+        for callback in list(self._subscribers):
+            try:
+                callback(self._settings)
+            except Exception:
+                pass
+        return True
+
+    def start_watching(self) -> None:
+        """Start the background thread that picks up external edits."""
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """Stop the watcher thread."""
+        self._stop_watching.set()
+
+    def _watch(self) -> None:
+        """Poll the settings file until stopped."""
+        while not self._stop_watching.wait(self.watch_interval):
+            self.check_for_changes()
+
+
+_settings_service: Optional[SettingsService] = None
+
+
+def get_settings_service() -> SettingsService:
+    """Return the shared settings service, creating and watching it on first use."""
+    global _settings_service
+    if _settings_service is None:
+        _settings_service = SettingsService(BASE_DIR / "settings.json", DEFAULT_SETTINGS)
+        _settings_service.start_watching()
+        atexit.register(_settings_service.flush_if_pending)
+    return _settings_service
+
+
+def load_settings():
+    """Load application settings from the cached settings service."""
+    return get_settings_service().get()
+
 
 def save_settings(settings):
-    """Save application settings to config file."""
-    settings_path = BASE_DIR / "settings.json"
+    """Save application settings; the file is written shortly after in the background."""
     try:
-        with open(settings_path, 'w') as f:
-            json.dump(settings, f, indent=4)
+        get_settings_service().save(settings)
         return True
     except Exception:
         return False
@@ -0,0 +1,419 @@
+import asyncio
+import ipaddress
+import json
+import math
+import secrets
+import threading
+from http import HTTPStatus
+from typing import Dict, Optional, Set, Tuple
+
+from config import CONTROL_PORT
+from job_queue import QUEUED, RUNNING, JobScheduler, TypingJob
+from text_segmentation import PASTE_MODES
+
+# Largest accepted request body in bytes
+MAX_BODY = 16 * 1024 * 1024
+
+# Host names accepted in the Host header besides IP literals and the bound host;
+# rejecting other names stops DNS rebinding pages from reaching the API
+LOCAL_HOSTS = ("localhost",)
+
+# Events buffered per subscriber before the oldest are dropped
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# TypingJob arguments accepted when submitting a job, with their JSON types,
+# smallest allowed value and whether they may be null
+JOB_FIELDS = {
+    "text": ((str,), None, False),
+    "wpm": ((int,), 1, False),
+    "random_delay": ((dict,), None, True),
+    "interval": ((int, float), 0, False),
+    "paste_mode": ((str,), None, False),
+    "chunk_size": ((int,), 1, False),
+    "repeat_count": ((int,), 0, True),
+    "countdown": ((int,), 0, False),
+    "start_at": ((int, float), 0, True),
+    "repeat_every": ((int, float), 0, True),
+    "repeat_times": ((int,), 0, False),
+    "priority": ((int,), None, False),
+    "name": ((str,), None, False),
+    "profile": ((str,), None, False),
+    "resume": ((bool,), None, False),
+    "previous": ((str,), None, True),
+}
+
+
+class RequestError(Exception):
+    """A request that is answered with an HTTP error status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _host_name(header: str) -> str:
+    """Return the lowercase host of a Host header, without port or IPv6 brackets."""
+    header = header.strip().lower()
+    if header.startswith("["):
+        return header[1:header.find("]")]
+    return header.partition(":")[0]
+
+
+def _is_ip(host: str) -> bool:
+    """Return whether host is an IP address literal."""
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def _check_job_field(name: str, value) -> None:
+    """Raise a 400 RequestError unless value has the type and range JOB_FIELDS gives for name."""
+    types, minimum, nullable = JOB_FIELDS[name]
+    if value is None and nullable:
+        return
+    # JSON booleans are ints in Python; only 'resume' takes one
+    if isinstance(value, bool) != (types == (bool,)) or not isinstance(value, types):
+        kind = " or ".join("number" if t is float else t.__name__ for t in types)
+        raise RequestError(400, f"'{name}' must be {kind}{' or null' if nullable else ''}")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise RequestError(400, f"'{name}' must be finite")
+    if minimum is not None and value < minimum:
+        raise RequestError(400, f"'{name}' must be at least {minimum}")
+
+
+def _response(status: int, payload) -> bytes:
+    """Encode a JSON HTTP response."""
+    body = json.dumps(payload).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n")
+    return head.encode("ascii") + body
+
+
+class ControlServer:
+    """
+    Localhost HTTP/JSON control API for a JobScheduler and its AutoTyper.
+
+    All clients are served by one asyncio loop on a background thread.
+    A single pump task reads the engine's ProgressChannel and fans events
+    out to subscriber queues, so the typing thread's cost does not depend
+    on how many clients listen. The server owns the channel: don't also
+    poll it from a GUI.
+
+    Every request must carry the bearer token, which is generated when
+    none is given. Since any web page can send requests to localhost,
+    requests with an Origin header, a Host that is neither an IP address
+    nor localhost, or a body that isn't application/json are refused, and
+    submitted texts are typed with macros and includes disabled.
+
+    Endpoints:
+        GET /status            Engine state, current job and latest progress
+        GET /jobs              All known jobs
+        POST /jobs             Queue a job (TypingJob arguments as JSON)
+        DELETE /jobs/<id>      Cancel a queued or running job
+        POST /start            Start running queued jobs, optionally queueing one first
+        POST /pause            Pause the current run
+        POST /resume           Resume the paused run, or when idle continue a stopped
+                               job ({"id": n}, default the latest) from its checkpoint
+        POST /stop             Stop the current run
+        GET /checkpoints       Saved checkpoints of interrupted runs
+        GET /events            Newline-delimited JSON stream of state, progress,
+                               status, job and metrics events
+    """
+
+    def __init__(self, scheduler: JobScheduler, host: str = "127.0.0.1", port: int = CONTROL_PORT,
+                 token: Optional[str] = None, poll_interval: float = 0.05, metrics: bool = True,
+                 require_token: bool = True):
+        """
+        Initialize the server; call start_in_thread() to serve.
+
+        Args:
+            scheduler: Scheduler running the submitted jobs
+            host: Interface to bind, localhost by default
+            port: TCP port, 0 for any free port
+            token: Token requests must send as 'Authorization: Bearer <token>',
+                generated if None; read it back from the token attribute
+            poll_interval: Seconds between progress channel reads
+            metrics: Record run metrics and send them as an event after each job
+            require_token: False to accept requests without a token
+        """
+        self.scheduler = scheduler
+        self.typer = scheduler.typer
+        self.host = host
+        self.port = port
+        if token is None and require_token:
+            token = secrets.token_urlsafe(24)
+        self.token = token
+        self.poll_interval = poll_interval
+        self.progress: Optional[Dict] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._chained_on_change = scheduler.on_change
+        scheduler.on_change = self._job_changed
+        if metrics:
+            self.typer.enable_metrics(True, self.typer.metrics_path, self.typer.metrics_hook)
+
+    # Lifecycle
+
+    def start_in_thread(self) -> int:
+        """
+        Serve on a daemon thread.
+
+        Returns:
+            int: The bound port
+        """
+        self._ready.clear()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        return self.port
+
+    def stop(self) -> None:
+        """Close the server and all event streams."""
+        loop = self._loop
+        if loop is not None and self._stopped is not None:
+            loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    async def _serve(self) -> None:
+        """Run the server until stop() is called."""
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        try:
+            server = await asyncio.start_server(self._handle, self.host, self.port)
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            return
+        self.port = server.sockets[0].getsockname()[1]
+        pump = asyncio.create_task(self._pump())
+        self._ready.set()
+        async with server:
+            await self._stopped.wait()
+            pump.cancel()
+            # End streams and open connections before leaving the context: since
+            # Python 3.12 it waits for every connection to close
+            for queue in list(self._subscribers):
+                self._offer(queue, None)
+            for writer in list(self._connections):
+                writer.close()
+        self._loop = None
+
+    # Events
+
+    def _offer(self, queue: asyncio.Queue, event: Optional[Dict]) -> None:
+        """Queue an event for one subscriber, dropping its oldest event when full."""
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def _broadcast(self, event: Dict) -> None:
+        """Send an event to every subscriber; runs on the loop."""
+        for queue in self._subscribers:
+            self._offer(queue, event)
+
+    async def _pump(self) -> None:
+        """Read the engine's progress channel and broadcast what changed."""
+        channel = self.typer.progress
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            for status in channel.drain_statuses():
+                self._broadcast({"type": "status", "status": status})
+            snapshot = channel.read()
+            if snapshot is not None:
+                self.progress = {"type": "progress", **snapshot._asdict()}
+                self._broadcast(self.progress)
+
+    def _job_changed(self, job: TypingJob) -> None:
+        """Forward a job status change from the scheduler thread to the loop."""
+        events = [{"type": "job", "job": job.to_dict()}]
+        metrics = self.typer.metrics
+        if job.status not in (QUEUED, RUNNING) and self.typer.metrics_enabled and metrics is not None:
+            events.append({"type": "metrics", "job": job.id, "metrics": metrics.to_dict()})
+        loop = self._loop
+        if loop is not None:
+            for event in events:
+                loop.call_soon_threadsafe(self._broadcast, event)
+        if self._chained_on_change is not None:
+            self._chained_on_change(job)
+
+    def state(self) -> Dict:
+        """Return the engine state reported by /status and on subscribing."""
+        job = self.scheduler.current_job()
+        return {
+            "type": "state",
+            "running": self.typer.is_running(),
+            "paused": self.typer.is_paused(),
+            "job": job.to_dict() if job is not None else None,
+            "progress": self.progress,
+            "achieved_wpm": self.typer.achieved_wpm,
+        }
+
+    # HTTP
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+        """Parse one request into method, path, lowercase headers and body."""
+        try:
+            method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise RequestError(400, "malformed request line")
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise RequestError(400, "invalid Content-Length")
+        if length > MAX_BODY:
+            raise RequestError(413, "request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one connection."""
+        self._connections.add(writer)
+        try:
+            try:
+                method, path, headers, body = await self._read_request(reader)
+                self._check_headers(headers, body)
+                if method == "GET" and path == "/events":
+                    await self._stream_events(writer)
+                    return
+                status, payload = self._dispatch(method, path, body)
+            except RequestError as e:
+                status, payload = e.status, {"error": str(e)}
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as e:
+                # A bug must not drop the connection without an answer
+                status, payload = 500, {"error": f"internal error: {type(e).__name__}: {e}"}
+            writer.write(_response(status, payload))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    def _check_headers(self, headers: Dict[str, str], body: bytes) -> None:
+        """Refuse requests that may come from a web page or lack the token."""
+        host = _host_name(headers.get("host", ""))
+        if not (_is_ip(host) or host in LOCAL_HOSTS or host == self.host.lower()):
+            raise RequestError(403, "Host must be localhost or an IP address")
+        if "origin" in headers:
+            raise RequestError(403, "cross-origin requests are not allowed")
+        if self.token is not None and not secrets.compare_digest(
+                headers.get("authorization", "").encode("utf-8"), f"Bearer {self.token}".encode("utf-8")):
+            raise RequestError(401, "missing or wrong token")
+        content_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+        if body and content_type != "application/json":
+            raise RequestError(415, "body must be sent as application/json")
+
+    def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        """Run a non-streaming request and return its status and payload."""
+        if path == "/status" and method == "GET":
+            return 200, self.state()
+        if path == "/jobs" and method == "GET":
+            return 200, {"jobs": self.scheduler.jobs()}
+        if path == "/jobs" and method == "POST":
+            return 201, {"id": self.scheduler.submit(self._parse_job(body))}
+        if path.startswith("/jobs/") and method == "DELETE":
+            try:
+                job_id = int(path[len("/jobs/"):])
+            except ValueError:
+                raise RequestError(404, "no such job")
+            if not self.scheduler.cancel(job_id):
+                raise RequestError(409, "job is not queued or running")
+            return 200, {"cancelled": job_id}
+        if path == "/start" and method == "POST":
+            job_id = self.scheduler.submit(self._parse_job(body)) if body.strip() else None
+            self.scheduler.start()
+            return 200, {"id": job_id, **self.state()}
+        if path == "/resume" and method == "POST" and not self.typer.is_running():
+            job_id = self._parse_object(body).get("id")
+            if job_id is not None and not isinstance(job_id, int):
+                raise RequestError(400, "'id' must be an integer")
+            resumed = self.scheduler.resume(job_id)
+            if resumed is None:
+                raise RequestError(409, "no stopped job to resume")
+            self.scheduler.start()
+            return 200, {"id": resumed, **self.state()}
+        if path == "/checkpoints" and method == "GET":
+            journal = self.typer.journal
+            return 200, {"checkpoints": journal.list() if journal is not None else []}
+        if path in ("/pause", "/resume") and method == "POST":
+            if not self.typer.is_running():
+                raise RequestError(409, "not typing")
+            if self.typer.is_paused() != (path == "/pause"):
+                self.typer.toggle_pause()
+            return 200, self.state()
+        if path == "/stop" and method == "POST":
+            running = self.typer.is_running()
+            if running:
+                self.typer.stop()
+            return 200, {"stopped": running}
+        if path in ("/status", "/jobs", "/start", "/pause", "/resume", "/stop", "/events", "/checkpoints"):
+            raise RequestError(405, f"{method} not allowed on {path}")
+        raise RequestError(404, f"no such endpoint: {path}")
+
+    def _parse_object(self, body: bytes) -> Dict:
+        """Parse a JSON object request body; an empty body is an empty object."""
+        try:
+            options = json.loads(body or b"{}")
+        except ValueError:
+            raise RequestError(400, "body must be JSON")
+        if not isinstance(options, dict):
+            raise RequestError(400, "body must be a JSON object")
+        return options
+
+    def _parse_job(self, body: bytes) -> TypingJob:
+        """Build a TypingJob from a JSON request body."""
+        options = self._parse_object(body)
+        if not isinstance(options.get("text"), str):
+            raise RequestError(400, "job needs a 'text' string")
+        unknown = set(options) - set(JOB_FIELDS)
+        if unknown:
+            raise RequestError(400, f"unknown job fields: {', '.join(sorted(unknown))}")
+        for name, value in options.items():
+            _check_job_field(name, value)
+        if options.get("paste_mode", "char") not in PASTE_MODES:
+            raise RequestError(400, f"'paste_mode' must be one of {', '.join(PASTE_MODES)}")
+        for key, value in (options.get("random_delay") or {}).items():
+            if key in ("min", "max") and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                raise RequestError(400, f"'random_delay' {key} must be a number")
+        try:
+            return TypingJob(**options, trusted=False)
+        except (TypeError, ValueError) as e:
+            raise RequestError(400, str(e))
+
+    async def _stream_events(self, writer: asyncio.StreamWriter) -> None:
+        """Stream events as JSON lines until the client disconnects or the server stops."""
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: application/x-ndjson\r\n"
+                     b"Cache-Control: no-cache\r\n"
+                     b"Connection: close\r\n\r\n")
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        try:
+            event = self.state()
+            while event is not None:
+                writer.write(json.dumps(event).encode("utf-8") + b"\n")
+                await writer.drain()
+                event = await queue.get()
+        finally:
+            self._subscribers.discard(queue)
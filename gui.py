@@ -1,10 +1,16 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, font
-import keyboard
-from datetime import time
-from config import load_settings, save_settings
+from tkinter import ttk, scrolledtext, messagebox
+from config import get_settings_service, load_settings
+from hotkeys import HotkeyDispatcher
 
 class AutoTyperGUI:
+    # Refresh period for progress and status while typing (~30 frames per second)
+    PROGRESS_REFRESH_MS = 33
+    # Period for applying hotkey events to the widgets; the engine reacts without waiting for it
+    HOTKEY_POLL_MS = 20
+    # Pause after the last keystroke in the search box before searching
+    SEARCH_DELAY_MS = 250
+
     def __init__(self, root):
         self.root = root
         self.root.title("Auto Typer")
@@ -14,20 +20,44 @@ class AutoTyperGUI:
         self.text_font = ('Cordia New', 16)  # Explicitly use Cordia New for Thai support
         
         self.settings = load_settings()
+        self.settings_version = get_settings_service().version
         self.auto_typer = None  # Will be initialized later
         self.recording_hotkey = False
+        self.hotkeys = HotkeyDispatcher()
+        self.source_path = None  # File streamed instead of the text area
+        self.document_text = None  # Large pasted text shown in the document view
+        self.last_typed_text = None  # Text of the last completed run, for typing only changes
+        self._run_text = None
+        self.document_view = None
         
         # Create main frame
         main_frame = ttk.Frame(root, padding="5")
         main_frame.pack(fill=tk.BOTH, expand=True)
         
+        # Search the names and texts of saved profiles
+        search_frame = ttk.LabelFrame(main_frame, text="Search Profiles", padding="5")
+        search_frame.pack(fill=tk.X, padx=5, pady=5)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *_: self.schedule_search())
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.pack(fill=tk.X, padx=5)
+        search_entry.bind("<Return>", lambda _: self.search_profiles())
+        self.search_results = tk.Listbox(search_frame, height=4, font=self.text_font)
+        self.search_results.pack(fill=tk.X, padx=5, pady=(5, 0))
+        self.search_results.bind("<Double-Button-1>", lambda _: self.open_search_result())
+        self.search_matches = []
+        self.profile_manager = None
+        self._search_job = None
+        
         # Text input
-        text_frame = ttk.LabelFrame(main_frame, text="Text Input", padding="5")
-        text_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.text_frame = ttk.LabelFrame(main_frame, text="Text Input", padding="5")
+        self.text_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        self.text_area = scrolledtext.ScrolledText(text_frame, wrap=tk.WORD, height=10, 
+        self.text_area = scrolledtext.ScrolledText(self.text_frame, wrap=tk.WORD, height=10, 
                                                  font=self.text_font)  # Use Cordia New font
         self.text_area.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # Huge pastes open in the document view instead of freezing the text area
+        self.text_area.bind("<<Paste>>", self.on_paste)
         
         # Control panel
         control_frame = ttk.LabelFrame(main_frame, text="Controls", padding="5")
@@ -51,6 +81,22 @@ class AutoTyperGUI:
         self.max_delay_var = tk.StringVar(value="1000")
         ttk.Entry(control_frame, textvariable=self.max_delay_var, width=8).grid(row=0, column=6)
         
+        # Paste mode
+        ttk.Label(control_frame, text="Paste:").grid(row=2, column=0, padx=5)
+        self.paste_mode_var = tk.StringVar(value=self.settings.get("paste_mode", "char"))
+        ttk.Combobox(control_frame, textvariable=self.paste_mode_var, width=8, state="readonly",
+                     values=("char", "grapheme", "word", "line", "run")).grid(row=2, column=1)
+        
+        ttk.Label(control_frame, text="Chunk:").grid(row=2, column=3)
+        self.chunk_size_var = tk.StringVar(value=str(self.settings.get("chunk_size", 1)))
+        ttk.Entry(control_frame, textvariable=self.chunk_size_var, width=8).grid(row=2, column=4)
+        
+        # Random delay distribution
+        ttk.Label(control_frame, text="Distribution:").grid(row=2, column=5)
+        self.distribution_var = tk.StringVar(value=self.settings["random_delay"].get("distribution", "uniform"))
+        ttk.Combobox(control_frame, textvariable=self.distribution_var, width=8, state="readonly",
+                     values=("uniform", "normal", "lognormal", "gamma")).grid(row=2, column=6)
+        
         # Hotkey settings
         hotkey_frame = ttk.LabelFrame(main_frame, text="Hotkey Settings", padding="5")
         hotkey_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -85,65 +131,223 @@ class AutoTyperGUI:
         self.delete_btn = ttk.Button(btn_frame, text="Delete Text", 
                                    command=self.clear_text)
         self.delete_btn.pack(side=tk.LEFT, padx=5)
+
+        # Stream a file without loading it into the text area
+        self.open_file_btn = ttk.Button(btn_frame, text="Type From File...",
+                                      command=self.choose_source_file)
+        self.open_file_btn.pack(side=tk.LEFT, padx=5)
+
+        # Continue an interrupted run of the same text
+        self.resume_btn = ttk.Button(btn_frame, text="Resume", command=self.resume_typing)
+        self.resume_btn.pack(side=tk.LEFT, padx=5)
+
+        # Type only the edits made since the last completed run
+        self.changes_btn = ttk.Button(btn_frame, text="Type Changes", command=self.type_changes)
+        self.changes_btn.pack(side=tk.LEFT, padx=5)
         
         # Progress bar
         self.progress_var = tk.DoubleVar(value=0)
         self.progress_bar = ttk.Progressbar(main_frame, variable=self.progress_var, maximum=100)
         self.progress_bar.pack(fill=tk.X, padx=5, pady=5)
         
+        # Live typing rate and time remaining
+        self.rate_var = tk.StringVar(value="")
+        ttk.Label(main_frame, textvariable=self.rate_var, anchor=tk.W).pack(fill=tk.X, padx=5)
+        
         # Status bar
         self.status_var = tk.StringVar(value="Ready")
         self.status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(fill=tk.X, side=tk.BOTTOM, padx=5)
         
-        # Set up hotkeys
-        self.bind_hotkeys()
+        # Set up hotkeys once the window is shown; importing keyboard is slow
+        self.root.after_idle(self.bind_hotkeys)
+        self.root.after(self.HOTKEY_POLL_MS, self.poll_hotkeys)
+        
+        # Pick up edits to settings.json made while running
+        self.root.after(1000, self.check_settings)
+
+    def check_settings(self):
+        """Apply settings reloaded by the settings service since the last check."""
+        version = get_settings_service().version
+        if version != self.settings_version:
+            self.settings_version = version
+            self.settings = load_settings()
+            self.apply_settings()
+        self.root.after(1000, self.check_settings)
+
+    def apply_settings(self):
+        """Refresh the controls and hotkeys from the current settings."""
+        self.wpm_var.set(str(self.settings["wpm"]))
+        self.paste_mode_var.set(self.settings["paste_mode"])
+        self.chunk_size_var.set(str(self.settings["chunk_size"]))
+        self.distribution_var.set(self.settings["random_delay"]["distribution"])
+        hotkeys = self.settings["hotkeys"]
+        if (hotkeys["start_stop"], hotkeys["emergency_stop"]) != (self.start_stop_key.get(), self.emergency_key.get()):
+            self.start_stop_key.set(hotkeys["start_stop"])
+            self.emergency_key.set(hotkeys["emergency_stop"])
+            running = self.auto_typer is not None and self.auto_typer.is_running()
+            self.start_btn.config(text=f"{'Stop' if running else 'Start'} ({hotkeys['start_stop']})")
+            self.stop_btn.config(text=f"Emergency Stop ({hotkeys['emergency_stop']})")
+            self.bind_hotkeys()
 
     def clear_text(self):
         """Clear all text from the text area."""
+        self.close_document()
         self.text_area.delete("1.0", tk.END)
         self.status_var.set("Text cleared")
 
+    def schedule_search(self):
+        """Search once typing in the search box pauses."""
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(self.SEARCH_DELAY_MS, self.search_profiles)
+
+    def search_profiles(self):
+        """List the profile names and texts containing the search box text."""
+        self._search_job = None
+        query = self.search_var.get().strip()
+        self.search_results.delete(0, tk.END)
+        self.search_matches = []
+        if not query:
+            return
+        if self.profile_manager is None:
+            from profile_manager import ProfileManager
+            self.profile_manager = ProfileManager()
+        self.search_matches = self.profile_manager.search(query)
+        for match in self.search_matches:
+            where = "name" if match["text"] is None else f"text {match['text'] + 1}"
+            self.search_results.insert(tk.END, f"{match['profile']} ({where}): {match['snippet']}")
+        self.status_var.set(f"{len(self.search_matches)} matches for '{query}'")
+
+    def open_search_result(self):
+        """Load the selected search result's text for typing."""
+        selection = self.search_results.curselection()
+        if not selection:
+            return
+        match = self.search_matches[selection[0]]
+        if match["text"] is None:
+            return
+        data = self.profile_manager.load_profile(match["key"])
+        if data is None:
+            messagebox.showerror("Error", f"Could not load profile {match['profile']}")
+            return
+        text = data["texts"][match["text"]]
+        from large_document import LARGE_DOCUMENT_CHARS, LineIndex
+        if len(text) >= LARGE_DOCUMENT_CHARS:
+            self.open_document(LineIndex.from_text(text))
+            self.document_text = text
+        else:
+            self.close_document()
+            self.text_area.delete("1.0", tk.END)
+            self.text_area.insert("1.0", text)
+        self.status_var.set(f"Loaded text {match['text'] + 1} of {match['profile']}")
+
+    def choose_source_file(self):
+        """Select a text file to stream while typing."""
+        from tkinter import filedialog
+        path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if path:
+            from large_document import LineIndex
+            try:
+                self.open_document(LineIndex.from_file(path))
+            except OSError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            self.source_path = path
+            self.status_var.set(f"Typing from file: {path}")
+
+    def on_paste(self, event):
+        """Show a large clipboard text in the document view instead of inserting it."""
+        from large_document import LARGE_DOCUMENT_CHARS, LineIndex
+        try:
+            text = self.root.clipboard_get()
+        except tk.TclError:
+            return None
+        if len(text) < LARGE_DOCUMENT_CHARS:
+            return None
+        self.open_document(LineIndex.from_text(text))
+        self.document_text = text
+        self.status_var.set(f"Pasted {len(text):,} characters")
+        return "break"
+
+    def open_document(self, index):
+        """Replace the text area with a virtualized view of a large document."""
+        from large_document import LargeDocumentView
+        self.close_document()
+        self.text_area.pack_forget()
+        self.document_view = LargeDocumentView(self.text_frame, index, font=self.text_font)
+        self.document_view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+    def close_document(self):
+        """Return to the editable text area, which is typed from again instead of a file."""
+        self.source_path = None
+        if self.document_view is None:
+            return
+        self.document_view.destroy()
+        self.document_view.index.close()
+        self.document_view = None
+        self.document_text = None
+        self.text_area.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
     def bind_hotkeys(self):
+        """Hook the configured hotkeys; keys that didn't change stay hooked."""
         try:
-            keyboard.unhook_all()  # Clear existing hotkeys
-            keyboard.on_press_key(self.start_stop_key.get(), lambda _: self.toggle_typing())
-            keyboard.on_press_key(self.emergency_key.get(), lambda _: self.emergency_stop())
+            self.hotkeys.bind("toggle", self.start_stop_key.get())
+            self.hotkeys.bind("stop", self.emergency_key.get())
         except Exception as e:
             messagebox.showerror("Error", f"Failed to bind hotkey: {str(e)}")
 
     def record_hotkey(self, key_type):
         if self.recording_hotkey:
             return
+        try:
+            # The key arrives as a 'recorded' event in poll_hotkeys
+            self.hotkeys.record(key_type)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to record hotkey: {str(e)}")
+            return
             
         self.recording_hotkey = True
-        original_text = self.start_stop_key.get() if key_type == "start_stop" else self.emergency_key.get()
         btn = self.start_stop_btn if key_type == "start_stop" else self.emergency_btn
-        
-        def on_key(event):
-            if event.name not in ['shift', 'ctrl', 'alt']:
-                if key_type == "start_stop":
-                    self.start_stop_key.set(event.name)
-                    self.start_btn.config(text=f"Start ({event.name})")
-                else:
-                    self.emergency_key.set(event.name)
-                    self.stop_btn.config(text=f"Emergency Stop ({event.name})")
-                
-                # Update settings
-                self.settings["hotkeys"][key_type] = event.name
-                save_settings(self.settings)
-                
-                # Rebind hotkeys
-                self.bind_hotkeys()
-                
-                # Reset button text and state
-                btn.config(state='normal')
-                self.recording_hotkey = False
-                keyboard.unhook(hook)
-            
         # Change button text to indicate recording
         btn.config(text="Press a key...", state='disabled')
-        hook = keyboard.on_press(on_key)
+
+    def on_hotkey_recorded(self, key_type, name):
+        """Save and bind a hotkey captured by record_hotkey."""
+        running = self.auto_typer is not None and self.auto_typer.is_running()
+        if key_type == "start_stop":
+            self.start_stop_key.set(name)
+            self.start_btn.config(text=f"{'Stop' if running else 'Start'} ({name})")
+        else:
+            self.emergency_key.set(name)
+            self.stop_btn.config(text=f"Emergency Stop ({name})")
+        
+        # Update settings
+        # Merged into the service's current settings, which may have been reloaded since
+        get_settings_service().update({"hotkeys": {key_type: name}})
+        self.settings = load_settings()
+        self.bind_hotkeys()
+        
+        # Reset button state
+        btn = self.start_stop_btn if key_type == "start_stop" else self.emergency_btn
+        btn.config(state='normal')
+        self.recording_hotkey = False
+
+    def poll_hotkeys(self):
+        """Update the widgets for hotkey presses; stop and pause already reached the engine."""
+        for command, argument in self.hotkeys.events.drain():
+            if command == "start":
+                if not (self.auto_typer and self.auto_typer.is_running()):
+                    self.start_typing()
+            elif command == "stopped":
+                self.start_btn.config(text=f"Start ({self.start_stop_key.get()})")
+                self.status_var.set("Stopped")
+            elif command == "stop":
+                self.start_btn.config(text=f"Start ({self.start_stop_key.get()})")
+                self.status_var.set("Emergency stop activated")
+            elif command == "recorded":
+                self.on_hotkey_recorded(*argument)
+        self.root.after(self.HOTKEY_POLL_MS, self.poll_hotkeys)
 
     def toggle_typing(self):
         if not hasattr(self, 'auto_typer') or not self.auto_typer or not self.auto_typer.is_running():
@@ -151,33 +355,74 @@ class AutoTyperGUI:
         else:
             self.stop_typing()
 
-    def start_typing(self):
-        text = self.text_area.get("1.0", tk.END).strip()
-        if not text:
+    def resume_typing(self):
+        """Continue the last interrupted run of the current text."""
+        if self.auto_typer and self.auto_typer.is_running():
+            return
+        self.start_typing(resume=True)
+
+    def type_changes(self):
+        """Edit the last typed text into the current one instead of retyping it."""
+        if self.auto_typer and self.auto_typer.is_running():
+            return
+        if self.last_typed_text is None or self.source_path:
+            messagebox.showinfo("Type Changes", "Type the text completely once first.")
+            return
+        self.start_typing(incremental=True)
+
+    def start_typing(self, resume=False, incremental=False):
+        if self.document_text is not None:
+            text = self.document_text  # Not stripped, so offsets match the view
+        else:
+            text = "" if self.source_path else self.text_area.get("1.0", tk.END).strip()
+        if not text and not self.source_path:
             messagebox.showerror("Error", "No text to type!")
             return
 
         try:
             if not self.auto_typer:
                 from auto_typer import AutoTyper
-                self.auto_typer = AutoTyper()
+                from output_backends import create_backend
+                from checkpoint import CheckpointJournal
+                self.auto_typer = AutoTyper(create_backend(self.settings.get("backend", "auto")))
+                self.auto_typer.set_checkpoints(CheckpointJournal())
+                self.hotkeys.engine = self.auto_typer
             
-            self.auto_typer.set_text(text)
+            # Set before the text so it is preprocessed and compiled once
+            self.auto_typer.set_paste_mode(self.paste_mode_var.get(), int(self.chunk_size_var.get()))
+            self.auto_typer.set_preprocessing(**self.settings["preprocess"])
+            if self.source_path:
+                from text_sources import FileSource
+                self.auto_typer.set_source(FileSource(self.source_path))
+            elif incremental:
+                script = self.auto_typer.set_incremental(self.last_typed_text, text)
+                if not script.ops:
+                    messagebox.showinfo("Type Changes", "The text has not changed.")
+                    return
+            else:
+                self.auto_typer.set_text(text)
             self.auto_typer.set_wpm(int(self.wpm_var.get()))
             self.auto_typer.set_random_delay(
                 self.random_delay_var.get(),
                 float(self.min_delay_var.get()),
                 float(self.max_delay_var.get())
             )
+            self.auto_typer.set_delay_distribution(self.distribution_var.get())
             
-            self.auto_typer.set_status_callback(lambda s: self.status_var.set(s))
-            self.auto_typer.set_progress_callback(self.update_progress)
-            
-            self.auto_typer.start()
+            if resume:
+                if not self.auto_typer.resume():
+                    messagebox.showinfo("Resume", "No interrupted run of this text to resume.")
+                    return
+            else:
+                self.auto_typer.start()
+            self._run_text = None if self.source_path else text
+            if self.document_view is not None:
+                self.document_view.reset_cursor()
             self.start_btn.config(text=f"Stop ({self.start_stop_key.get()})")
-            self.status_var.set("Typing started")
+            self.status_var.set("Typing resumed" if resume else "Typing started")
+            self.root.after(self.PROGRESS_REFRESH_MS, self.poll_progress)
 
-        except ValueError as e:
+        except (ValueError, RuntimeError, ImportError, OSError) as e:
             messagebox.showerror("Error", str(e))
 
     def stop_typing(self):
@@ -192,6 +437,37 @@ class AutoTyperGUI:
             self.start_btn.config(text=f"Start ({self.start_stop_key.get()})")
             self.status_var.set("Emergency stop activated")
 
+    def poll_progress(self):
+        """Drain the engine's progress channel on the Tk thread at a bounded rate."""
+        if not self.auto_typer:
+            return
+        # Check before draining so messages posted by a finishing thread are not missed
+        thread = self.auto_typer.thread
+        active = self.auto_typer.is_running() or (thread is not None and thread.is_alive())
+        channel = self.auto_typer.progress
+        statuses = channel.drain_statuses()
+        if statuses:
+            self.status_var.set(statuses[-1])
+        snapshot = channel.read()
+        if snapshot:
+            self.update_progress(snapshot.current, snapshot.total)
+            eta = f", ETA {int(snapshot.eta // 60)}:{int(snapshot.eta % 60):02d}" if snapshot.eta is not None else ""
+            self.rate_var.set(f"{snapshot.chars_per_second:.1f} chars/s{eta}")
+            if self.document_view is not None and self.auto_typer.edit_script is None:
+                self.document_view.show_position(snapshot.current)
+        
+        if active:
+            self.root.after(self.PROGRESS_REFRESH_MS, self.poll_progress)
+        else:
+            self.start_btn.config(text=f"Start ({self.start_stop_key.get()})")
+            self.rate_var.set("")
+            if self.auto_typer.completed and self._run_text is not None:
+                self.last_typed_text = self._run_text
+            elif self.auto_typer.completed and self.source_path:
+                # Done with the file; a stopped run keeps it for Resume
+                self.close_document()
+            self._run_text = None
+
     def update_progress(self, current: int, total: int):
         progress = (current / total * 100) if total > 0 else 0
         self.progress_var.set(progress)
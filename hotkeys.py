@@ -0,0 +1,142 @@
+from collections import deque
+from typing import Any, Dict, List, Tuple
+
+# Commands understood by AutoTyper.post_command
+ENGINE_COMMANDS = ("stop", "pause")
+
+# Commands hotkeys can be bound to
+HOTKEY_COMMANDS = ("toggle", "stop", "pause")
+
+# Modifier keys that can't be bound on their own when recording a hotkey
+MODIFIER_KEYS = ("shift", "ctrl", "alt")
+
+
+class CommandQueue:
+    """
+    Unbounded multi-producer queue of (command, argument) tuples.
+
+    deque.append() and deque.popleft() are atomic, so producers on hook
+    threads and the consumer never take a lock and never block each other.
+    """
+
+    def __init__(self):
+        """Initialize an empty queue."""
+        self._items = deque()
+
+    def push(self, command: str, argument: Any = None) -> None:
+        """Add a command; safe to call from any thread."""
+        self._items.append((command, argument))
+
+    def drain(self) -> List[Tuple[str, Any]]:
+        """Remove and return all queued commands, oldest first."""
+        items = []
+        popleft = self._items.popleft
+        while True:
+            try:
+                items.append(popleft())
+            except IndexError:
+                return items
+
+    def __len__(self) -> int:
+        """Return the number of queued commands."""
+        return len(self._items)
+
+
+class HotkeyDispatcher:
+    """
+    Routes global hotkeys to the typing engine and the GUI without touching Tk.
+
+    Key callbacks run on the keyboard hook thread. Commands for a running
+    run (stop, pause, and toggle while typing) are posted straight to the
+    engine, which applies them within one keystroke even while Tk is busy;
+    everything is also pushed to the `events` queue, which the GUI drains
+    with root.after() to update its widgets or start a run. Each binding
+    keeps its own hook handle, so changing one hotkey leaves the others
+    hooked.
+    """
+
+    def __init__(self, keyboard=None):
+        """
+        Initialize without bindings.
+
+        Args:
+            keyboard: Module with on_press_key(), on_press() and unhook(),
+                defaults to the keyboard package, imported on first use
+        """
+        self._keyboard = keyboard
+        self.engine = None  # AutoTyper receiving engine commands, set once created
+        self.events = CommandQueue()
+        self.bindings: Dict[str, Tuple[str, Any]] = {}  # command -> (key, hook handle)
+        self._recording = None
+
+    @property
+    def keyboard(self):
+        """Return the keyboard module, importing it on first use."""
+        if self._keyboard is None:
+            import keyboard
+            self._keyboard = keyboard
+        return self._keyboard
+
+    def bind(self, command: str, key: str) -> bool:
+        """
+        Bind a key to a command, replacing only that command's previous hook.
+
+        Returns:
+            bool: False if the command was already bound to the key
+        """
+        if command not in HOTKEY_COMMANDS:
+            raise ValueError(f"Unknown hotkey command: {command}")
+        current = self.bindings.get(command)
+        if current is not None and current[0] == key:
+            return False
+        handle = self.keyboard.on_press_key(key, lambda _: self.dispatch(command))
+        if current is not None:
+            self.keyboard.unhook(current[1])
+        self.bindings[command] = (key, handle)
+        return True
+
+    def unbind(self, command: str) -> None:
+        """Remove the hook of a command, if bound."""
+        current = self.bindings.pop(command, None)
+        if current is not None:
+            self.keyboard.unhook(current[1])
+
+    def close(self) -> None:
+        """Remove all hooks installed by this dispatcher."""
+        for command in list(self.bindings):
+            self.unbind(command)
+        self.cancel_recording()
+
+    def dispatch(self, command: str) -> None:
+        """Handle a hotkey press; called on the hook thread."""
+        engine = self.engine
+        running = engine is not None and engine.is_running()
+        if command == "toggle":
+            # Decided here rather than by the GUI so a late poll can't restart a stopped run
+            if running:
+                engine.post_command("stop")
+                self.events.push("stopped")
+            else:
+                self.events.push("start")
+            return
+        if running:
+            engine.post_command(command)
+        self.events.push(command)
+
+    def record(self, key_type: str) -> None:
+        """Capture the next non-modifier key press and push it as a 'recorded' event."""
+        self.cancel_recording()
+
+        def on_key(event) -> None:
+            if event.name in MODIFIER_KEYS or self._recording is None:
+                return
+            self.cancel_recording()
+            self.events.push("recorded", (key_type, event.name))
+
+        self._recording = self.keyboard.on_press(on_key)
+
+    def cancel_recording(self) -> None:
+        """Stop waiting for a key to record."""
+        handle, self._recording = self._recording, None
+        if handle is not None:
+            self.keyboard.unhook(handle)
@@ -0,0 +1,313 @@
+from array import array
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from keystroke_plan import ACTION_KEY, KeystrokePlan
+from text_segmentation import is_extender, iter_graphemes
+
+# Edit distance above which a hunk is replaced wholesale instead of diffed further
+MAX_DIFF_COST = 1000
+
+# Cursor units: 'grapheme' when Left and Backspace step over whole clusters
+# (Thai vowels and tone marks included), 'char' when they step per code point
+CURSOR_UNITS = ("grapheme", "char")
+
+# Keys an edit script presses, indexed by EditPlan.key_ids - 1
+EDIT_KEYS = ("left", "right", "backspace", "ctrl+home")
+
+Opcode = Tuple[str, int, int, int, int]
+
+
+def _myers(a: Sequence[Hashable], b: Sequence[Hashable], max_cost: int) -> Optional[List[Opcode]]:
+    """
+    Diff two sequences with Myers' O((N+M)D) algorithm.
+
+    Returns:
+        Optional[List[Opcode]]: difflib-style opcodes, or None when the
+            edit distance exceeds max_cost
+    """
+    n, m = len(a), len(b)
+    max_cost = min(max_cost, n + m)
+    offset = max_cost + 1
+    v = array('l', [0]) * (2 * max_cost + 3)
+    trace = []
+    for d in range(max_cost + 1):
+        # Snapshot of V for diagonals -d..d before step d, used when backtracking
+        trace.append(v[offset - d:offset + d + 1])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m)
+    return None
+
+
+def _backtrack(trace: List[array], n: int, m: int) -> List[Opcode]:
+    """Recover opcodes from the V snapshots of _myers."""
+    steps = []  # (tag, x, y) single-element edits, last first
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        snapshot = trace[d]
+        k = x - y
+        if d == 0:
+            steps.extend(("equal", x - i, y - i) for i in range(1, x + 1))
+            break
+        if k == -d or (k != d and snapshot[k - 1 + d] < snapshot[k + 1 + d]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = snapshot[prev_k + d]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            steps.append(("equal", x, y))
+        if x == prev_x:
+            steps.append(("insert", x, prev_y))
+        else:
+            steps.append(("delete", prev_x, y))
+        x, y = prev_x, prev_y
+
+    opcodes: List[List] = []
+    for tag, i, j in reversed(steps):
+        di = 0 if tag == "insert" else 1
+        dj = 0 if tag == "delete" else 1
+        last = opcodes[-1] if opcodes else None
+        if last is not None and last[2] == i and last[4] == j and (last[0] == tag or (tag != "equal" and last[0] != "equal")):
+            if last[0] != tag:
+                last[0] = "replace"
+            last[2] += di
+            last[4] += dj
+        else:
+            opcodes.append([tag, i, i + di, j, j + dj])
+    return [tuple(opcode) for opcode in opcodes]
+
+
+def _lines(text: str, start: int, end: int) -> List[int]:
+    """Return the end offsets of the lines of text[start:end], newlines included."""
+    ends = []
+    position = start
+    while position < end:
+        newline = text.find("\n", position, end)
+        position = end if newline < 0 else newline + 1
+        ends.append(position)
+    return ends
+
+
+def diff(old: str, new: str, max_cost: int = MAX_DIFF_COST) -> List[Opcode]:
+    """
+    Compute the changed regions between two texts.
+
+    The common prefix and suffix are stripped first, then the rest is
+    diffed line by line and changed line blocks character by character,
+    so a few typos in a large document cost little more than a scan.
+
+    Args:
+        old: Text as typed before
+        new: Text as it should read
+        max_cost: Edit distance at which a block is replaced wholesale
+
+    Returns:
+        List[Opcode]: ('replace' | 'delete' | 'insert', i1, i2, j1, j2)
+            hunks in ascending order, old[i1:i2] becoming new[j1:j2]
+    """
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    old_end, new_end = len(old) - suffix, len(new) - suffix
+    if prefix == old_end and prefix == new_end:
+        return []
+
+    old_lines = [prefix] + _lines(old, prefix, old_end)
+    new_lines = [prefix] + _lines(new, prefix, new_end)
+    ids: Dict[str, int] = {}
+    a = [ids.setdefault(old[s:e], len(ids)) for s, e in zip(old_lines, old_lines[1:])]
+    b = [ids.setdefault(new[s:e], len(ids)) for s, e in zip(new_lines, new_lines[1:])]
+    line_ops = _myers(a, b, max_cost) or [("replace", 0, len(a), 0, len(b))]
+
+    hunks: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in line_ops:
+        if tag == "equal":
+            continue
+        s1, e1 = old_lines[i1], old_lines[i2]
+        s2, e2 = new_lines[j1], new_lines[j2]
+        char_ops = None
+        if tag == "replace":
+            char_ops = _myers(old[s1:e1], new[s2:e2], max_cost)
+        if char_ops is None:
+            char_ops = [(tag, 0, e1 - s1, 0, e2 - s2)]
+        hunks.extend((t, s1 + c1, s1 + c2, s2 + d1, s2 + d2) for t, c1, c2, d1, d2 in char_ops if t != "equal")
+    return hunks
+
+
+def _boundary(text: str, position: int) -> bool:
+    """Check whether position falls between grapheme clusters, as iter_graphemes splits them."""
+    if position <= 0 or position >= len(text):
+        return True
+    if text[position - 1] == "\r":
+        return text[position] != "\n"
+    return text[position - 1] == "\n" or not is_extender(text[position])
+
+
+def _count_units(text: str, start: int, end: int, unit: str) -> int:
+    """Count the cursor steps over text[start:end]."""
+    if unit == "char" or text[start:end].isascii():
+        return end - start - text.count("\r\n", start, end)
+    return sum(1 for _ in iter_graphemes(text, start, end))
+
+
+class EditScript:
+    """
+    Keystrokes that turn text typed earlier into a new version of it.
+
+    Assumes the cursor sits at the end of the earlier text, where typing
+    left it. Hunks are applied from the end of the document backwards so
+    the positions of the remaining hunks stay valid; the cursor moves
+    with Left, or with Ctrl+Home and Right when that is shorter, deletes
+    with Backspace and inserts like normal typing.
+    """
+
+    def __init__(self, old: str, new: str, unit: str = "grapheme", max_cost: int = MAX_DIFF_COST):
+        """
+        Compute the script.
+
+        Args:
+            old: Text as typed before
+            new: Text as it should read
+            unit: One of CURSOR_UNITS
+            max_cost: Edit distance at which a block is replaced wholesale
+        """
+        if unit not in CURSOR_UNITS:
+            raise ValueError(f"Unknown cursor unit: {unit}")
+        self.old = old
+        self.new = new
+        self.unit = unit
+        self.hunks = self._align(diff(old, new, max_cost))
+        self.ops: List[Tuple[str, object]] = []  # ('key', (name, count)) or ('text', str)
+        self._build()
+        self._plans: Dict[Tuple[str, int], "EditPlan"] = {}
+
+    def _align(self, hunks: List[Opcode]) -> List[Opcode]:
+        """Widen hunks to grapheme cluster boundaries and merge those that touch."""
+        old, new = self.old, self.new
+        aligned: List[List[int]] = []
+        index = 0
+        while index < len(hunks):
+            _, i1, i2, j1, j2 = hunks[index]
+            index += 1
+            # The text between hunks is identical in both versions, so both sides move together
+            while True:
+                if aligned and aligned[-1][1] >= i1:
+                    previous = aligned.pop()
+                    i1, j1 = previous[0], previous[2]
+                    break
+                if _boundary(old, i1) and _boundary(new, j1):
+                    break
+                i1 -= 1
+                j1 -= 1
+            while not (_boundary(old, i2) and _boundary(new, j2)):
+                if index < len(hunks) and hunks[index][1] == i2:
+                    # Reached the next hunk; absorb it
+                    i2, j2 = hunks[index][2], hunks[index][4]
+                    index += 1
+                else:
+                    i2 += 1
+                    j2 += 1
+            aligned.append([i1, i2, j1, j2])
+        return [("replace", i1, i2, j1, j2) for i1, i2, j1, j2 in aligned]
+
+    def _key(self, name: str, count: int) -> None:
+        """Append count presses of a key."""
+        if count > 0:
+            self.ops.append(("key", (name, count)))
+
+    def _build(self) -> None:
+        """Turn the hunks into cursor moves, deletions and insertions."""
+        old, new, unit = self.old, self.new, self.unit
+        cursor = len(old)  # Position in old coordinates
+        before = _count_units(old, 0, cursor, unit)  # Steps from the start of the text to the cursor
+        extra = 0  # Steps over text inserted right of the cursor, not in old
+        for _, i1, i2, j1, j2 in reversed(self.hunks):
+            between = _count_units(old, i2, cursor, unit)
+            back = extra + between
+            from_start = before - between
+            if from_start + 1 < back:
+                self._key("ctrl+home", 1)
+                self._key("right", from_start)
+            else:
+                self._key("left", back)
+            deleted = _count_units(old, i1, i2, unit)
+            self._key("backspace", deleted)
+            if j2 > j1:
+                self.ops.append(("text", new[j1:j2]))
+            cursor = i1
+            before = from_start - deleted
+            extra = _count_units(new, j1, j2, unit)
+
+    @property
+    def keystrokes(self) -> int:
+        """Return the number of key presses and inserted characters."""
+        return sum(value[1] if kind == "key" else len(value) for kind, value in self.ops)
+
+    def compile(self, paste_mode: str = "char", chunk_size: int = 1) -> "EditPlan":
+        """Return the plan typing this script, cached per paste setting."""
+        key = (paste_mode, chunk_size)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = EditPlan.build(self.ops, paste_mode, chunk_size)
+        return plan
+
+
+class EditPlan(KeystrokePlan):
+    """
+    KeystrokePlan of an edit script.
+
+    Editing keys take one placeholder character of the source each and
+    are identified by key_ids (index into EDIT_KEYS plus one); inserted
+    text is compiled like any other plan.
+    """
+
+    __slots__ = ("key_ids",)
+
+    @classmethod
+    def build(cls, ops: List[Tuple[str, object]], paste_mode: str = "char", chunk_size: int = 1) -> "EditPlan":
+        """Compile edit script operations into one plan."""
+        parts = []
+        actions = array('B')
+        key_ids = array('B')
+        offsets = array('Q', [0])
+        for kind, value in ops:
+            if kind == "key":
+                name, count = value
+                parts.append("\0" * count)
+                actions.extend(array('B', [ACTION_KEY]) * count)
+                key_ids.extend(array('B', [EDIT_KEYS.index(name) + 1]) * count)
+                start = offsets[-1]
+                offsets.extend(range(start + 1, start + count + 1))
+            else:
+                plan = KeystrokePlan.compile(value, paste_mode, chunk_size)
+                parts.append(value)
+                actions.extend(plan.actions)
+                key_ids.extend(array('B', [0]) * len(plan))
+                start = offsets[-1]
+                offsets.extend(start + offset for offset in plan.offsets[1:])
+        plan = cls("".join(parts), actions, offsets, paste_mode, chunk_size)
+        plan.key_ids = key_ids
+        return plan
+
+    def action(self, index: int) -> Tuple[int, str]:
+        """Return (action type, chunk or key name) for the action at index."""
+        key_id = self.key_ids[index]
+        if key_id:
+            return ACTION_KEY, EDIT_KEYS[key_id - 1]
+        return super().action(index)
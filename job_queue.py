@@ -0,0 +1,346 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Union
+
+from auto_typer import AutoTyper
+
+# Job states reported by TypingJob.status
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+STOPPED = "stopped"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+class TypingJob:
+    """A text plus the speed settings and schedule it is typed with."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, text: str, wpm: int = 60, random_delay: Optional[Dict] = None,
+                 interval: float = 0.0, paste_mode: str = "char", chunk_size: int = 1,
+                 repeat_count: Optional[int] = None, countdown: int = 0,
+                 start_at: Union[float, datetime, None] = None,
+                 repeat_every: Optional[float] = None, repeat_times: int = 1,
+                 priority: int = 0, name: str = "", profile: str = "", resume: bool = False,
+                 previous: Optional[str] = None, trusted: bool = True):
+        """
+        Create a job.
+
+        Args:
+            text: Text to type
+            wpm: Typing speed
+            random_delay: Dict with 'enabled', 'min' and 'max' (milliseconds)
+            interval: Seconds between repeat cycles within one run
+            paste_mode: Paste mode passed to AutoTyper.set_paste_mode
+            chunk_size: Clusters per paste in 'run' mode
+            repeat_count: Repeat cycles within one run, see AutoTyper.set_repeat_count
+            countdown: Countdown in seconds before each run
+            start_at: Earliest start as a datetime or epoch seconds, None for now
+            repeat_every: Seconds from one scheduled run to the next, None to run once
+            repeat_times: Number of scheduled runs when repeat_every is set, 0 for unlimited
+            priority: Jobs with a higher priority run first once due
+            name: Label shown when inspecting the queue
+            profile: Profile the text belongs to, which checkpoints are tied to
+            resume: Continue from the text's checkpoint if the typer has one
+            previous: Text typed before; if set, only the edits turning it
+                into text are typed
+            trusted: False for texts from the network, which are typed with
+                macros and includes disabled
+        """
+        self.id = next(self._ids)
+        self.text = text
+        self.wpm = wpm
+        self.random_delay = random_delay or {"enabled": False, "min": 100, "max": 1000}
+        self.interval = interval
+        self.paste_mode = paste_mode
+        self.chunk_size = chunk_size
+        self.repeat_count = repeat_count
+        self.countdown = countdown
+        if isinstance(start_at, datetime):
+            start_at = start_at.timestamp()
+        self.next_run = start_at if start_at is not None else 0.0
+        self.repeat_every = repeat_every
+        self.repeat_times = repeat_times
+        self.priority = priority
+        self.name = name or f"Job {self.id}"
+        self.profile = profile
+        self.resume = resume
+        self.previous = previous
+        self.trusted = trusted
+        self.status = QUEUED
+        self.runs = 0
+        self.error: Optional[str] = None
+        self._version = 0  # Bumped when reordered so stale heap entries are skipped
+
+    def configure(self, typer: AutoTyper) -> None:
+        """Apply this job's text and settings to a typer."""
+        typer.set_trusted(self.trusted)
+        if self.previous is not None:
+            typer.set_incremental(self.previous, self.text)
+        else:
+            typer.set_text(self.text)
+        typer.set_wpm(self.wpm)
+        typer.set_random_delay(self.random_delay.get("enabled", False),
+                               float(self.random_delay.get("min", 100)),
+                               float(self.random_delay.get("max", 1000)))
+        typer.set_paste_mode(self.paste_mode, self.chunk_size)
+        typer.set_repeat_count(self.repeat_count)
+        typer.set_countdown(self.countdown)
+        typer.interval = self.interval
+        typer.set_checkpoints(typer.journal, self.profile)
+        typer.request_resume(self.resume)
+
+    def to_dict(self) -> Dict:
+        """Return a summary of the job for inspection."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "priority": self.priority,
+            "next_run": self.next_run,
+            "runs": self.runs,
+            "chars": len(self.text),
+            "wpm": self.wpm,
+            "profile": self.profile,
+            "incremental": self.previous is not None,
+            "error": self.error,
+        }
+
+
+class JobScheduler:
+    """
+    Runs queued and time-scheduled typing jobs on one long-lived worker.
+
+    Jobs wait in a heap ordered by start time until they are due, then
+    move to a heap ordered by priority and submission order. The worker
+    drives a single AutoTyper synchronously, so no thread is created per
+    run.
+    """
+
+    def __init__(self, typer: AutoTyper, on_change: Optional[Callable[[TypingJob], None]] = None):
+        """
+        Initialize the scheduler; call start() to launch the worker.
+
+        Args:
+            typer: Engine shared by all jobs
+            on_change: Called from the worker whenever a job changes status
+        """
+        self.typer = typer
+        self.on_change = on_change
+        self._jobs: Dict[int, TypingJob] = {}
+        self._waiting = []  # (next_run, seq, job, version)
+        self._ready = []  # (-priority, seq, job, version)
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._current: Optional[TypingJob] = None
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Launch the worker thread."""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker, interrupting the current job."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+            self.typer.stop()
+        if wait and self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def submit(self, job: TypingJob) -> int:
+        """Queue a job and return its id."""
+        with self._condition:
+            # Pushed first, so a job whose fields can't be ordered isn't listed as queued forever
+            self._push(job)
+            self._jobs[job.id] = job
+            self._condition.notify_all()
+        return job.id
+
+    def submit_profile(self, profile: Dict, **overrides) -> List[int]:
+        """
+        Queue every text of a profile as a playlist, in order.
+
+        Args:
+            profile: Profile data as stored by ProfileManager
+            overrides: TypingJob arguments replacing the profile settings
+
+        Returns:
+            List[int]: Ids of the queued jobs
+        """
+        settings = dict(profile.get("settings", {}))
+        options = {
+            "wpm": settings.get("wpm", 60),
+            "random_delay": settings.get("random_delay"),
+            "interval": settings.get("interval", 0.0),
+        }
+        options.update(overrides)
+        name = profile.get("name", "")
+        options.setdefault("profile", name)
+        return [
+            self.submit(TypingJob(text, name=f"{name} #{index + 1}", **options))
+            for index, text in enumerate(profile.get("texts", []))
+            if text
+        ]
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued job or stop the running one."""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in (QUEUED, RUNNING):
+                return False
+            job.status = CANCELLED
+            self._condition.notify_all()
+            if job is self._current:
+                self.typer.stop()
+        self._notify(job)
+        return True
+
+    def reorder(self, job_id: int, priority: int) -> bool:
+        """Change the priority of a queued job."""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return False
+            job.priority = priority
+            job._version += 1
+            self._push(job)
+            self._condition.notify_all()
+        return True
+
+    def resume(self, job_id: Optional[int] = None) -> Optional[int]:
+        """
+        Queue a stopped or failed job again, continuing from its checkpoint.
+
+        Args:
+            job_id: Job to resume, or None for the most recently submitted one
+
+        Returns:
+            Optional[int]: Id of the queued job, None if there is nothing to resume
+        """
+        with self._condition:
+            if job_id is None:
+                stopped = [job for job in self._jobs.values() if job.status in (STOPPED, FAILED)]
+                job = stopped[-1] if stopped else None
+            else:
+                job = self._jobs.get(job_id)
+            if job is None or job.status not in (STOPPED, FAILED):
+                return None
+            job.status = QUEUED
+            job.resume = True
+            job.error = None
+            job.next_run = 0.0
+            job._version += 1
+            self._push(job)
+            self._condition.notify_all()
+        self._notify(job)
+        return job.id
+
+    def jobs(self) -> List[Dict]:
+        """Return summaries of all known jobs in submission order."""
+        with self._condition:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def current_job(self) -> Optional[TypingJob]:
+        """Return the job being typed, if any."""
+        return self._current
+
+    def clear_finished(self) -> None:
+        """Forget jobs that are done, stopped, cancelled or failed."""
+        with self._condition:
+            for job_id in [i for i, job in self._jobs.items() if job.status not in (QUEUED, RUNNING)]:
+                del self._jobs[job_id]
+
+    def _push(self, job: TypingJob) -> None:
+        """Add a heap entry for job; caller holds the condition."""
+        entry_key = next(self._seq)
+        if job.next_run > time.time():
+            heapq.heappush(self._waiting, (job.next_run, entry_key, job, job._version))
+        else:
+            heapq.heappush(self._ready, (-job.priority, entry_key, job, job._version))
+
+    def _next_job(self) -> Optional[TypingJob]:
+        """Block until a job is due or the scheduler shuts down."""
+        with self._condition:
+            while self._running:
+                now = time.time()
+                while self._waiting and self._waiting[0][0] <= now:
+                    _, _, job, version = heapq.heappop(self._waiting)
+                    if job.status == QUEUED and version == job._version:
+                        heapq.heappush(self._ready, (-job.priority, next(self._seq), job, version))
+                while self._ready:
+                    _, _, job, version = heapq.heappop(self._ready)
+                    if job.status == QUEUED and version == job._version:
+                        job.status = RUNNING
+                        self._current = job
+                        return job
+                timeout = self._waiting[0][0] - now if self._waiting else None
+                self._condition.wait(timeout)
+            return None
+
+    def _worker(self) -> None:
+        """Run due jobs one after another until shutdown."""
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            self._notify(job)
+            begun = completed = False
+            error = None
+            try:
+                job.configure(self.typer)
+                with self._condition:
+                    # cancel() and shutdown() stop the typer under the condition, so a
+                    # stop issued since the job was taken is seen here instead of lost
+                    begun = job.status == RUNNING and self._running and self.typer.begin_run()
+                if begun:
+                    completed = self.typer.run(begun=True)
+            except Exception as e:
+                error = str(e)
+
+            with self._condition:
+                self._current = None
+                if job.status == RUNNING and not begun and not self._running and error is None:
+                    # Shut down before the run began; it runs when the scheduler starts again
+                    job.status = QUEUED
+                    self._push(job)
+                else:
+                    self._finish(job, completed, error)
+            self._notify(job)
+
+    def _finish(self, job: TypingJob, completed: bool, error: Optional[str]) -> None:
+        """Set the status of a job after a run; caller holds the condition."""
+        job.runs += 1
+        job.resume = False
+        if job.status == CANCELLED:
+            pass
+        elif error is not None:
+            job.status = FAILED
+            job.error = error
+        elif not completed:
+            job.status = STOPPED
+        elif job.repeat_every and (job.repeat_times == 0 or job.runs < job.repeat_times):
+            job.status = QUEUED
+            job.next_run = max(job.next_run, time.time() - job.repeat_every) + job.repeat_every
+            self._push(job)
+        else:
+            job.status = DONE
+
+    def _notify(self, job: TypingJob) -> None:
+        """Report a status change."""
+        if self.on_change is not None:
+            try:
+                self.on_change(job)
+            except Exception:
+                pass
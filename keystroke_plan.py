@@ -0,0 +1,171 @@
+import hashlib
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from text_segmentation import iter_segments
+
+# Action types stored in KeystrokePlan.actions
+ACTION_PASTE = 0
+ACTION_KEY = 1
+
+# Chunks that are sent as a key press instead of a clipboard paste
+KEY_CHUNKS: Dict[str, str] = {
+    " ": "space",
+}
+
+
+class KeystrokePlan:
+    """
+    Immutable, compact compilation of a text into keystroke actions.
+
+    Action i covers source[offsets[i]:offsets[i + 1]] and is either a
+    clipboard paste of that slice or a press of the key named in
+    KEY_CHUNKS. Both arrays are plain array objects, so a plan costs a
+    few bytes per action instead of one Python object per character.
+    """
+
+    __slots__ = ("source", "actions", "offsets", "paste_mode", "chunk_size")
+
+    def __init__(self, source: str, actions: array, offsets: array,
+                 paste_mode: str = "char", chunk_size: int = 1):
+        """Wrap precompiled action and offset arrays; use compile() to build them."""
+        self.source = source
+        self.actions = actions
+        self.offsets = offsets
+        self.paste_mode = paste_mode
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def compile(cls, text: str, paste_mode: str = "char", chunk_size: int = 1) -> "KeystrokePlan":
+        """
+        Compile text into a plan.
+
+        Args:
+            text: Source text
+            paste_mode: Paste mode passed to iter_segments
+            chunk_size: Clusters per paste in 'run' mode
+
+        Returns:
+            KeystrokePlan: The compiled plan
+        """
+        actions = array('B')
+        offsets = array('I' if len(text) < 2 ** 32 else 'Q', [0])
+        for start, end in iter_segments(text, paste_mode, chunk_size):
+            chunk = text[start:end] if end - start == 1 else None
+            actions.append(ACTION_KEY if chunk in KEY_CHUNKS else ACTION_PASTE)
+            offsets.append(end)
+        return cls(text, actions, offsets, paste_mode, chunk_size)
+
+    def matches(self, text: str, paste_mode: str, chunk_size: int) -> bool:
+        """Check whether the plan was compiled from the given inputs."""
+        return (self.paste_mode == paste_mode and self.chunk_size == chunk_size
+                and self.source == text)
+
+    def __len__(self) -> int:
+        """Return the number of actions."""
+        return len(self.actions)
+
+    @property
+    def total_chars(self) -> int:
+        """Return the number of characters the plan types."""
+        return self.offsets[-1]
+
+    def action(self, index: int) -> Tuple[int, str]:
+        """Return (action type, chunk) for the action at index."""
+        chunk = self.source[self.offsets[index]:self.offsets[index + 1]]
+        if self.actions[index] == ACTION_KEY:
+            return ACTION_KEY, KEY_CHUNKS[chunk]
+        return ACTION_PASTE, chunk
+
+
+def content_hash(text: str) -> bytes:
+    """Return a 128-bit digest identifying a text's content."""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class PlanCache:
+    """
+    LRU cache of compiled plans keyed by content hash and paste settings.
+
+    Typing the same text again, in a later run, repeat cycle or profile,
+    reuses its plan instead of segmenting the text again.
+    """
+
+    def __init__(self, max_entries: int = 32, max_chars: int = 32 * 1024 * 1024):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Maximum number of plans kept
+            max_chars: Maximum total characters of the cached plans
+        """
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.chars = 0
+        self.hits = 0
+        self.misses = 0
+        self._plans = OrderedDict()
+        self._last: Optional[Tuple[str, KeystrokePlan]] = None
+
+    def get(self, text: str, paste_mode: str = "char", chunk_size: int = 1) -> KeystrokePlan:
+        """Return the plan of text, compiling and caching it on a miss."""
+        last = self._last
+        if last is not None and last[0] is text and last[1].paste_mode == paste_mode \
+                and last[1].chunk_size == chunk_size:
+            # Same string object as the previous lookup; skip hashing it
+            self.hits += 1
+            return last[1]
+        key = (content_hash(text), paste_mode, chunk_size)
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            plan = KeystrokePlan.compile(text, paste_mode, chunk_size)
+            if len(text) <= self.max_chars:
+                self._plans[key] = plan
+                self.chars += len(text)
+                while len(self._plans) > self.max_entries or self.chars > self.max_chars:
+                    _, evicted = self._plans.popitem(last=False)
+                    self.chars -= evicted.total_chars
+        self._last = (text, plan)
+        return plan
+
+    def clear(self) -> None:
+        """Drop all cached plans."""
+        self._plans.clear()
+        self._last = None
+        self.chars = 0
+
+
+class PlanCursor:
+    """Position in a KeystrokePlan, reused across repeat cycles."""
+
+    def __init__(self, plan: Optional[KeystrokePlan] = None):
+        """Initialize the cursor at the start of plan."""
+        self.plan = plan
+        self.index = 0
+        self.cycle = 0
+
+    def reset(self, plan: Optional[KeystrokePlan] = None) -> None:
+        """Rewind to the first action and cycle, optionally switching plans."""
+        if plan is not None:
+            self.plan = plan
+        self.index = 0
+        self.cycle = 0
+
+    def rewind(self) -> None:
+        """Start the next repeat cycle of the same plan."""
+        self.index = 0
+        self.cycle += 1
+
+    def at_end(self) -> bool:
+        """Check whether every action of the current cycle has been emitted."""
+        return self.plan is None or self.index >= len(self.plan)
+
+    @property
+    def chars_done(self) -> int:
+        """Return the number of characters emitted in the current cycle."""
+        return self.plan.offsets[self.index] if self.plan is not None else 0
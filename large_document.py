@@ -0,0 +1,275 @@
+import codecs
+import mmap
+import tkinter as tk
+from array import array
+from bisect import bisect_right
+from tkinter import ttk
+from typing import List, Optional, Tuple
+
+# Texts at least this long open in the document view instead of the text area
+LARGE_DOCUMENT_CHARS = 256 * 1024
+
+# Lines longer than this are split into display segments so Tk never lays out a huge line
+MAX_SEGMENT_LENGTH = 4096
+
+# Lines kept in the Tk widget at a time
+WINDOW_LINES = 600
+
+
+class LineIndex:
+    """
+    Start offsets of the lines of a text, held in one array.
+
+    Offsets are in characters for in-memory texts and in bytes for files,
+    the same units AutoTyper reports progress in, so a progress value maps
+    to a line with one binary search. Files are read through a memory map
+    and only the lines on display are decoded.
+    """
+
+    def __init__(self, starts: array, length: int, text: Optional[str] = None,
+                 data=None, encoding: str = "utf-8"):
+        """
+        Use LineIndex.from_text() or LineIndex.from_file() instead.
+
+        Args:
+            starts: Start offset of each line, ascending
+            length: Length of the whole text in offset units
+            text: In-memory text, or None for a file
+            data: Memory-mapped file contents
+            encoding: File encoding
+        """
+        self.starts = starts
+        self.length = length
+        self.text = text
+        self.data = data
+        self.encoding = encoding
+
+    @classmethod
+    def from_text(cls, text: str, max_segment: int = MAX_SEGMENT_LENGTH) -> "LineIndex":
+        """Index an in-memory text by character offsets."""
+        starts = array('Q', [0])
+        find = text.find
+        position = 0
+        length = len(text)
+        while True:
+            end = find("\n", position)
+            end = length if end < 0 else end + 1
+            while end - position > max_segment:
+                position += max_segment
+                starts.append(position)
+            if end >= length:
+                break
+            position = end
+            starts.append(position)
+        return cls(starts, length, text=text)
+
+    @classmethod
+    def from_file(cls, path: str, encoding: str = "utf-8", max_segment: int = MAX_SEGMENT_LENGTH) -> "LineIndex":
+        """Index a text file by byte offsets without decoding it."""
+        with open(path, "rb") as f:
+            size = f.seek(0, 2)
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        # FileSource skips a UTF-8 byte order mark, so offsets start after it
+        first = 3 if data[:3] == codecs.BOM_UTF8 else 0
+        starts = array('Q', [first])
+        find = data.find
+        position = first
+        while True:
+            end = find(b"\n", position)
+            end = size if end < 0 else end + 1
+            while end - position > max_segment:
+                split = position + max_segment
+                # Don't split inside a UTF-8 sequence
+                while split > position + 1 and data[split] & 0xC0 == 0x80:
+                    split -= 1
+                position = split
+                starts.append(position)
+            if end >= size:
+                break
+            position = end
+            starts.append(position)
+        return cls(starts, size, data=data, encoding=encoding)
+
+    def __len__(self) -> int:
+        """Return the number of lines."""
+        return len(self.starts)
+
+    def close(self) -> None:
+        """Release the file mapping."""
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def line_of(self, offset: int) -> int:
+        """Return the line containing an offset."""
+        return max(0, bisect_right(self.starts, offset) - 1)
+
+    def _end(self, line: int) -> int:
+        """Return the offset after a line, including its newline."""
+        return self.starts[line + 1] if line + 1 < len(self.starts) else self.length
+
+    def line(self, line: int) -> str:
+        """Return the text of a line without its newline."""
+        start, end = self.starts[line], self._end(line)
+        if self.text is not None:
+            value = self.text[start:end]
+        else:
+            value = self.data[start:end].decode(self.encoding, "replace")
+        return value[:-1] if value.endswith("\n") else value
+
+    def lines(self, first: int, count: int) -> List[str]:
+        """Return the texts of count lines starting at first."""
+        return [self.line(i) for i in range(first, min(first + count, len(self.starts)))]
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """
+        Map a progress offset to a line and a character column.
+
+        Args:
+            offset: Characters or bytes typed so far
+
+        Returns:
+            Tuple[int, int]: Line number and column, both from 0
+        """
+        offset = max(0, min(offset, self.length))
+        line = self.line_of(offset)
+        start = self.starts[line]
+        if self.text is not None:
+            return line, offset - start
+        # Progress inside a file block may land in the middle of a character
+        return line, len(self.data[start:offset].decode(self.encoding, "ignore"))
+
+
+class LargeDocumentView(ttk.Frame):
+    """
+    Read-only view showing a window of lines of a LineIndex.
+
+    Only WINDOW_LINES lines are in the Tk widget at once; the scrollbar
+    spans the whole document and moves the window. The typing position is
+    shown by extending the 'typed' tag and moving the one-character
+    'cursor' tag, so a progress update never re-renders the text.
+    """
+
+    def __init__(self, master, index: LineIndex, font=None, window_lines: int = WINDOW_LINES):
+        """
+        Create the view.
+
+        Args:
+            master: Parent widget
+            index: Line index of the document
+            font: Text font
+            window_lines: Lines kept in the widget at a time
+        """
+        super().__init__(master)
+        self.index = index
+        self.window_lines = window_lines
+        self.first_line = 0
+        self.loaded = 0
+        self.cursor: Optional[Tuple[int, int]] = None  # (line, column) in the document
+        self.follow = tk.BooleanVar(value=True)
+
+        header = ttk.Frame(self)
+        header.pack(fill=tk.X)
+        self.info_var = tk.StringVar(value=f"{len(index):,} lines")
+        ttk.Label(header, textvariable=self.info_var).pack(side=tk.LEFT)
+        ttk.Checkbutton(header, text="Follow cursor", variable=self.follow).pack(side=tk.RIGHT)
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text = tk.Text(self, wrap=tk.WORD, font=font, yscrollcommand=self._on_text_scroll,
+                            undo=False)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.text.tag_configure("typed", foreground="#888888")
+        self.text.tag_configure("cursor", background="#0078d7", foreground="#ffffff")
+        self.load_window(0)
+
+    def load_window(self, first_line: int) -> None:
+        """Replace the widget contents with the lines starting at first_line."""
+        total = len(self.index)
+        first_line = max(0, min(first_line, total - self.window_lines))
+        lines = self.index.lines(first_line, self.window_lines)
+        self.first_line = first_line
+        self.loaded = len(lines)
+        text = self.text
+        text.config(state=tk.NORMAL)
+        text.delete("1.0", tk.END)
+        text.insert("1.0", "\n".join(lines))
+        text.config(state=tk.DISABLED)
+        if self.cursor is not None:
+            self._mark_cursor(*self.cursor, previous=None)
+
+    def _widget_index(self, line: int, column: int) -> str:
+        """Return the Tk index of a document position inside the loaded window."""
+        return f"{line - self.first_line + 1}.{column}"
+
+    def _mark_cursor(self, line: int, column: int, previous: Optional[Tuple[int, int]]) -> None:
+        """Move the cursor tag and extend or shrink the typed tag to a loaded position."""
+        text = self.text
+        position = self._widget_index(line, column)
+        if previous is not None and self.first_line <= previous[0] < self.first_line + self.loaded:
+            old = self._widget_index(*previous)
+            text.tag_remove("cursor", old)
+            if previous <= (line, column):
+                text.tag_add("typed", old, position)
+            else:
+                text.tag_remove("typed", position, tk.END)
+        else:
+            # Freshly loaded window: everything before the cursor is typed
+            text.tag_remove("cursor", "1.0", tk.END)
+            text.tag_remove("typed", "1.0", tk.END)
+            if line >= self.first_line:
+                text.tag_add("typed", "1.0", position)
+        text.tag_add("cursor", position)
+
+    def show_position(self, offset: int) -> None:
+        """Highlight the typing position given as a progress offset."""
+        line, column = self.index.position(offset)
+        previous = self.cursor
+        self.cursor = (line, column)
+        if previous == self.cursor:
+            return
+        inside = self.first_line <= line < self.first_line + self.loaded
+        if not inside:
+            if not self.follow.get():
+                return
+            # Keep some already typed context above the cursor
+            self.load_window(line - self.window_lines // 4)
+        else:
+            self._mark_cursor(line, column, previous)
+        if self.follow.get():
+            self.text.see(self._widget_index(line, column))
+        self.info_var.set(f"Line {line + 1:,} of {len(self.index):,}")
+
+    def reset_cursor(self) -> None:
+        """Clear the typing highlight before a new run."""
+        self.cursor = None
+        self.text.tag_remove("cursor", "1.0", tk.END)
+        self.text.tag_remove("typed", "1.0", tk.END)
+        self.info_var.set(f"{len(self.index):,} lines")
+
+    def _on_text_scroll(self, first: str, last: str) -> None:
+        """Map the widget's scroll fractions to the whole document and re-window near the edges."""
+        total = len(self.index)
+        first_line = self.first_line + float(first) * self.loaded
+        last_line = self.first_line + float(last) * self.loaded
+        self.scrollbar.set(first_line / total, last_line / total)
+        margin = self.window_lines // 8
+        near_top = first_line - self.first_line < margin and self.first_line > 0
+        near_bottom = self.first_line + self.loaded - last_line < margin and self.first_line + self.loaded < total
+        if near_top or near_bottom:
+            self.after_idle(self._recenter, int(first_line))
+
+    def _recenter(self, top_line: int) -> None:
+        """Reload the window around top_line and keep it at the top of the view."""
+        self.load_window(top_line - self.window_lines // 2)
+        self.text.yview(f"{top_line - self.first_line + 1}.0")
+
+    def _on_scrollbar(self, action: str, amount: str, unit: Optional[str] = None) -> None:
+        """Scroll the whole document from the scrollbar."""
+        if action == tk.MOVETO:
+            top_line = int(float(amount) * len(self.index))
+            if not self.first_line <= top_line < self.first_line + self.loaded - self.window_lines // 8:
+                self._recenter(top_line)
+            else:
+                self.text.yview(f"{top_line - self.first_line + 1}.0")
+        else:
+            self.text.yview(action, amount, unit)
@@ -1,10 +1,48 @@
-import tkinter as tk
-from gui import AutoTyperGUI
+import argparse
+import sys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Auto Typer")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="report import and init time per module once the window is shown, then exit")
+    parser.add_argument("--startup-budget", type=float, default=None, metavar="MS",
+                        help="cold start budget in milliseconds; exit with status 1 when exceeded")
+    args = parser.parse_args(argv)
+
+    profiler = None
+    if args.startup_profile:
+        from startup_profile import StartupProfiler
+        profiler = StartupProfiler()
+        profiler.install()
+
+    import tkinter as tk
+    if profiler:
+        profiler.phase("import tkinter")
+    from gui import AutoTyperGUI
+    if profiler:
+        profiler.phase("import gui")
 
-def main():
     root = tk.Tk()
+    if profiler:
+        profiler.phase("create Tk root")
     app = AutoTyperGUI(root)
+    if profiler:
+        profiler.phase("build AutoTyperGUI")
+
+    if profiler:
+        # The window is on screen once the first pending redraws are processed
+        root.update()
+        profiler.phase("first frame shown")
+        profiler.uninstall()
+        from config import STARTUP_BUDGET_MS
+        budget = args.startup_budget if args.startup_budget is not None else STARTUP_BUDGET_MS
+        print(profiler.report(budget))
+        root.destroy()
+        return 0 if profiler.total * 1000 <= budget else 1
+
     root.mainloop()
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import json
+import math
+from array import array
+from typing import Callable, Dict, List, Optional
+
+# Timed phases of each keystroke
+PHASES = ("clipboard", "inject", "callback", "sleep")
+
+# Upper bounds in milliseconds of the histogram buckets; the last bucket is open
+HISTOGRAM_BOUNDS_MS = (0.01, 0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Return the linearly interpolated percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+class RunMetrics:
+    """
+    Per-keystroke timing of a typing run.
+
+    Each phase duration is appended to its own array('d'), so recording
+    costs one append per phase and no per-keystroke objects. Summaries,
+    percentiles and histograms are computed only when requested.
+    """
+
+    def __init__(self, target_wpm: int = 0, hook: Optional[Callable[["RunMetrics"], None]] = None,
+                 hook_every: int = 100):
+        """
+        Initialize empty metrics.
+
+        Args:
+            target_wpm: Configured typing speed
+            hook: Live profiling callback, called with these metrics
+            hook_every: Number of keystrokes between hook calls
+        """
+        self.target_wpm = target_wpm
+        self.achieved_wpm = 0.0
+        self.elapsed = 0.0
+        self.chars = 0
+        self.phases: Dict[str, array] = {phase: array('d') for phase in PHASES}
+        self.hook = hook
+        self.hook_every = max(1, hook_every)
+
+    @property
+    def keystrokes(self) -> int:
+        """Return the number of recorded keystrokes."""
+        return len(self.phases["inject"])
+
+    def record(self, clipboard: float, inject: float, callback: float, sleep: float, length: int) -> None:
+        """Record the phase durations in seconds of one keystroke emitting length characters."""
+        phases = self.phases
+        phases["clipboard"].append(clipboard)
+        phases["inject"].append(inject)
+        phases["callback"].append(callback)
+        phases["sleep"].append(sleep)
+        self.chars += length
+        if self.hook is not None and len(phases["inject"]) % self.hook_every == 0:
+            self.hook(self)
+
+    def finish(self, elapsed: float, achieved_wpm: float) -> None:
+        """Store the run totals measured by the scheduler."""
+        self.elapsed = elapsed
+        self.achieved_wpm = achieved_wpm
+
+    def phase_summary(self, phase: str) -> Dict[str, float]:
+        """Return count, total, mean, p50/p95/p99 and max of a phase in milliseconds."""
+        values = sorted(self.phases[phase])
+        total = math.fsum(values)
+        return {
+            "count": len(values),
+            "total_ms": total * 1000,
+            "mean_ms": total / len(values) * 1000 if values else 0.0,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": values[-1] * 1000 if values else 0.0,
+        }
+
+    def histogram(self, phase: str) -> Dict[str, int]:
+        """Return bucket counts of a phase keyed by '<=bound' in milliseconds."""
+        counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        for value in self.phases[phase]:
+            value_ms = value * 1000
+            for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+                if value_ms <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        labels = [f"<={bound}" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}"]
+        return dict(zip(labels, counts))
+
+    def total_overhead(self) -> float:
+        """Return seconds spent outside sleeping: clipboard, injection and callbacks."""
+        return sum(math.fsum(self.phases[phase]) for phase in PHASES if phase != "sleep")
+
+    def to_dict(self) -> Dict:
+        """Return a JSON-serializable summary of the run."""
+        return {
+            "target_wpm": self.target_wpm,
+            "achieved_wpm": self.achieved_wpm,
+            "elapsed_s": self.elapsed,
+            "keystrokes": self.keystrokes,
+            "chars": self.chars,
+            "total_overhead_s": self.total_overhead(),
+            "phases": {phase: self.phase_summary(phase) for phase in PHASES},
+            "histograms_ms": {phase: self.histogram(phase) for phase in PHASES},
+        }
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """
+        Export the summary as JSON.
+
+        Args:
+            path: File to write, or None to only return the JSON
+
+        Returns:
+            str: The JSON document
+        """
+        document = json.dumps(self.to_dict(), indent=4)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(document)
+        return document
@@ -0,0 +1,572 @@
+import os
+import sys
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from text_segmentation import iter_graphemes
+
+
+def _iter_chars(text: str) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) offsets of code points in text, keeping CRLF together."""
+    i = 0
+    while i < len(text):
+        j = i + 2 if text.startswith("\r\n", i) else i + 1
+        yield i, j
+        i = j
+
+
+class OutputBackend:
+    """Base class for keystroke output backends used by AutoTyper."""
+
+    name = "base"
+
+    def press(self, key: str) -> None:
+        """Press and release a key or key combination (e.g. 'space', 'ctrl+v')."""
+        raise NotImplementedError
+
+    def set_clipboard(self, text: str) -> None:
+        """Replace the clipboard content with text."""
+        raise NotImplementedError
+
+    def get_clipboard(self) -> str:
+        """Return the current clipboard text, or an empty string."""
+        raise NotImplementedError
+
+    def paste(self) -> None:
+        """Paste the current clipboard content into the focused window."""
+        self.press('ctrl+v')
+
+    def encode_clipboard(self, text: str) -> object:
+        """Convert text to the buffer set_clipboard_data expects; results are cached."""
+        return text
+
+    def set_clipboard_data(self, data: object) -> None:
+        """Replace the clipboard content with a buffer from encode_clipboard."""
+        self.set_clipboard(data)
+
+    def clipboard_unchanged(self) -> bool:
+        """Check that nobody else wrote to the clipboard since our last write."""
+        return True
+
+    def open_clipboard_session(self) -> None:
+        """Prepare the clipboard for the writes of a typing run."""
+        pass
+
+    def close_clipboard_session(self) -> None:
+        """Release what open_clipboard_session acquired."""
+        pass
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+        pass
+
+
+class Win32Backend(OutputBackend):
+    """Win32 clipboard + `keyboard` injection, the original output path."""
+
+    name = "win32"
+
+    def __init__(self):
+        """Import the Win32 modules on first use so other platforms can load this module."""
+        import keyboard
+        import win32clipboard
+        import win32con
+        self._keyboard = keyboard
+        self._clipboard = win32clipboard
+        self._unicode_format = win32con.CF_UNICODETEXT
+        self._sequence = None
+
+    def press(self, key: str) -> None:
+        """Press and release a key through the keyboard module."""
+        self._keyboard.press_and_release(key)
+
+    def set_clipboard(self, text: str) -> None:
+        """Set text to clipboard with UTF-16 encoding for Thai support."""
+        try:
+            self._clipboard.OpenClipboard()
+            self._clipboard.EmptyClipboard()
+            self._clipboard.SetClipboardData(self._unicode_format, text)
+        finally:
+            self._clipboard.CloseClipboard()
+        self._sequence = self._clipboard.GetClipboardSequenceNumber()
+
+    def encode_clipboard(self, text: str) -> bytes:
+        """Encode text as the NUL-terminated UTF-16 buffer CF_UNICODETEXT stores."""
+        return (text + "\0").encode("utf-16-le")
+
+    def set_clipboard_data(self, data: bytes) -> None:
+        """Copy a pre-encoded UTF-16 buffer to the clipboard."""
+        self.set_clipboard(data)
+
+    def clipboard_unchanged(self) -> bool:
+        """Compare the clipboard sequence number with the one after our last write."""
+        return self._sequence == self._clipboard.GetClipboardSequenceNumber()
+
+    # The clipboard can't stay open for a whole run: the target window has to
+    # open it to read each paste, so sessions only skip redundant writes here.
+
+    def get_clipboard(self) -> str:
+        """Read Unicode text from the clipboard."""
+        try:
+            self._clipboard.OpenClipboard()
+            try:
+                if self._clipboard.IsClipboardFormatAvailable(self._unicode_format):
+                    return self._clipboard.GetClipboardData(self._unicode_format)
+                return ""
+            finally:
+                self._clipboard.CloseClipboard()
+        except Exception:
+            return ""
+
+
+class RecordingBackend(OutputBackend):
+    """Headless in-memory sink that records every emitted key and paste.
+
+    Events are stored as (timestamp, kind, value) tuples where kind is
+    'key' or 'paste'; the timestamp comes from time.perf_counter, or from
+    the given clock, so runs can be analysed for throughput and jitter
+    without a desktop. A latency can be set to simulate the cost of a
+    real key injection.
+    """
+
+    name = "recording"
+
+    def __init__(self, clipboard: str = "", clock=None, latency: float = 0.0):
+        """
+        Initialize an empty recording with an in-memory clipboard.
+
+        Args:
+            clipboard: Initial clipboard content
+            clock: Clock providing now() and sleep(), e.g. timing.SimulatedClock
+            latency: Seconds each key press or paste takes
+        """
+        self.clock = clock
+        self.latency = latency
+        self.clipboard = clipboard
+        self.events: List[Tuple[float, str, str]] = []
+        self.clipboard_writes = 0
+        self.session_open = False
+
+    def _now(self) -> float:
+        """Return the event timestamp, after simulating injection latency."""
+        if self.clock is None:
+            if self.latency > 0:
+                time.sleep(self.latency)
+            return time.perf_counter()
+        self.clock.sleep(self.latency)
+        return self.clock.now()
+
+    def press(self, key: str) -> None:
+        """Record a key press."""
+        self.events.append((self._now(), 'key', key))
+
+    def set_clipboard(self, text: str) -> None:
+        """Store text in the in-memory clipboard."""
+        self.clipboard = text
+        self.clipboard_writes += 1
+
+    def get_clipboard(self) -> str:
+        """Return the in-memory clipboard."""
+        return self.clipboard
+
+    def encode_clipboard(self, text: str) -> bytes:
+        """Encode text like the Win32 backend so the encoded path is exercised."""
+        return (text + "\0").encode("utf-16-le")
+
+    def set_clipboard_data(self, data: bytes) -> None:
+        """Decode a UTF-16 buffer into the in-memory clipboard."""
+        self.set_clipboard(data[:-2].decode("utf-16-le"))
+
+    def open_clipboard_session(self) -> None:
+        """Mark the fake clipboard as held by a run."""
+        self.session_open = True
+
+    def close_clipboard_session(self) -> None:
+        """Release the fake clipboard."""
+        self.session_open = False
+
+    def paste(self) -> None:
+        """Record a paste of the current clipboard content."""
+        self.events.append((self._now(), 'paste', self.clipboard))
+
+    def clear(self) -> None:
+        """Forget all recorded events."""
+        self.events.clear()
+        self.clipboard_writes = 0
+
+    def typed_text(self) -> str:
+        """Reconstruct the text a target window would have received."""
+        parts = []
+        for _, kind, value in self.events:
+            if kind == 'paste':
+                parts.append(value)
+            elif value == 'space':
+                parts.append(' ')
+            elif value == 'enter':
+                parts.append('\n')
+        return "".join(parts)
+
+    def edited_text(self, initial: str = "", unit: str = "grapheme") -> str:
+        """
+        Replay the recording against an editor buffer with a cursor.
+
+        Unlike typed_text() this honours cursor movement and deletion keys,
+        so incremental edit scripts can be checked headlessly.
+
+        Args:
+            initial: Buffer content before the recording, cursor at its end
+            unit: 'grapheme' if Left and Backspace step over whole clusters,
+                'char' if they step over code points (CRLF always counts as one)
+
+        Returns:
+            str: The buffer content afterwards
+        """
+        if unit == "grapheme":
+            def split(text: str) -> List[str]:
+                return [text[start:end] for start, end in iter_graphemes(text)]
+        else:
+            def split(text: str) -> List[str]:
+                return [text[start:end] for start, end in _iter_chars(text)]
+        buffer = split(initial)
+        cursor = len(buffer)
+        inserts = {'space': ' ', 'enter': '\n', 'tab': '\t'}
+        for _, kind, value in self.events:
+            if kind == 'paste' or value in inserts:
+                units = split(value if kind == 'paste' else inserts[value])
+                buffer[cursor:cursor] = units
+                cursor += len(units)
+            elif value == 'left':
+                cursor = max(0, cursor - 1)
+            elif value == 'right':
+                cursor = min(len(buffer), cursor + 1)
+            elif value == 'backspace' and cursor > 0:
+                cursor -= 1
+                del buffer[cursor]
+            elif value == 'delete':
+                del buffer[cursor:cursor + 1]
+            elif value == 'ctrl+home':
+                cursor = 0
+            elif value == 'ctrl+end':
+                cursor = len(buffer)
+            elif value == 'home':
+                while cursor > 0 and buffer[cursor - 1] not in ('\n', '\r\n'):
+                    cursor -= 1
+            elif value == 'end':
+                while cursor < len(buffer) and buffer[cursor] not in ('\n', '\r\n'):
+                    cursor += 1
+        return "".join(buffer)
+
+    def timestamps(self) -> List[float]:
+        """Return the timestamp of every recorded event."""
+        return [event[0] for event in self.events]
+
+
+# Key names accepted by press() mapped to X keysym names
+X_KEY_NAMES = {
+    "ctrl": "Control_L",
+    "shift": "Shift_L",
+    "alt": "Alt_L",
+    "space": "space",
+    "enter": "Return",
+    "tab": "Tab",
+    "backspace": "BackSpace",
+    "delete": "Delete",
+    "esc": "Escape",
+    "left": "Left",
+    "right": "Right",
+    "up": "Up",
+    "down": "Down",
+    "home": "Home",
+    "end": "End",
+}
+
+
+class XTestBackend(OutputBackend):
+    """
+    Linux/X11 backend injecting keys through the XTest extension.
+
+    Pastes go through the CLIPBOARD selection: the backend owns the
+    selection and answers SelectionRequest events from a helper thread,
+    so any X client can paste Thai and other Unicode text with Ctrl+V.
+    With use_selection=False, paste() instead types the clipboard text
+    directly. Characters on the keyboard are typed with their key, holding
+    Shift for the shifted level; the rest by temporarily mapping a spare
+    keycode to the character's keysym, which close() unmaps again.
+    """
+
+    name = "xtest"
+
+    def __init__(self, display_name: Optional[str] = None, use_selection: bool = True):
+        """
+        Connect to the X server.
+
+        Args:
+            display_name: X display such as ':0', defaults to $DISPLAY
+            use_selection: Paste through the CLIPBOARD selection instead of
+                typing clipboard text key by key
+        """
+        # The helper thread shares the selection connection with the caller's
+        # thread; this makes python-xlib lock its request queues
+        import Xlib.threaded  # noqa: F401
+        from Xlib import X, XK, Xatom, display
+        from Xlib.ext import xtest
+        from Xlib.protocol import event as xevent
+        self._X = X
+        self._XK = XK
+        self._Xatom = Xatom
+        self._xtest = xtest
+        self._xevent = xevent
+        self.use_selection = use_selection
+
+        self._display = display.Display(display_name)
+        if not self._display.has_extension("XTEST"):
+            self._display.close()
+            raise RuntimeError("X server does not support the XTEST extension")
+        self._scratch_keycode, self._scratch_original = self._find_scratch_keycode()
+        self._scratch_keysym = None
+        self._shift_keycode = self._display.keysym_to_keycode(XK.string_to_keysym("Shift_L"))
+
+        # Selection requests are served on a second connection by a helper thread
+        self._selection_display = display.Display(display_name)
+        root = self._selection_display.screen().root
+        self._owner_window = root.create_window(0, 0, 1, 1, 0, X.CopyFromParent)
+        self._reader_window = self._display.screen().root.create_window(0, 0, 1, 1, 0, X.CopyFromParent)
+        intern = self._selection_display.intern_atom
+        self._clipboard_atom = intern("CLIPBOARD")
+        self._targets_atom = intern("TARGETS")
+        self._utf8_atom = intern("UTF8_STRING")
+        self._text_atom = intern("TEXT")
+        self._transfer_atom = self._display.intern_atom("AUTOTYPER_TRANSFER")
+
+        self._lock = threading.Lock()
+        self._clipboard_text = ""
+        self._owns_selection = False
+        self._serving = True
+        self._thread = threading.Thread(target=self._serve_selection, daemon=True)
+        self._thread.start()
+
+    def _find_scratch_keycode(self) -> Tuple[Optional[int], Tuple[int, ...]]:
+        """
+        Find a keycode without keysyms that can be remapped to arbitrary characters.
+
+        Returns:
+            Tuple[Optional[int], Tuple[int, ...]]: The keycode, None if every
+                keycode is in use, and its current (empty) keysyms
+        """
+        info = self._display.display.info
+        first, last = info.min_keycode, info.max_keycode
+        mapping = self._display.get_keyboard_mapping(first, last - first + 1)
+        for offset in range(len(mapping) - 1, -1, -1):
+            if not any(mapping[offset]):
+                return first + offset, tuple(mapping[offset])
+        return None, ()
+
+    def _keycodes_for(self, keysym: int) -> List[int]:
+        """
+        Return the keycodes to hold to produce keysym.
+
+        Keysyms at the unshifted level of a key need just that key; at the
+        shifted level Shift_L is held too. Any other keysym is mapped to the
+        scratch keycode, remapping it only when the character changes.
+        """
+        scratch = self._scratch_keycode
+        for keycode, index in self._display.keysym_to_keycodes(keysym):
+            # The scratch keycode may still be cached under an earlier keysym
+            if keycode == scratch:
+                continue
+            if index == 0:
+                return [keycode]
+            if index == 1 and self._shift_keycode:
+                return [self._shift_keycode, keycode]
+        if scratch is None:
+            raise RuntimeError(f"No free keycode to type keysym {keysym:#x}")
+        if self._scratch_keysym != keysym:
+            self._display.change_keyboard_mapping(scratch, [(keysym, keysym)])
+            self._display.sync()
+            self._scratch_keysym = keysym
+        return [scratch]
+
+    def _keysym_for(self, name: str) -> int:
+        """Translate a key name or single character to an X keysym."""
+        keysym = self._XK.string_to_keysym(X_KEY_NAMES.get(name.lower(), name))
+        if keysym:
+            return keysym
+        if len(name) == 1:
+            code = ord(name)
+            # Latin-1 keysyms equal their code points, others use the Unicode range
+            return code if 0x20 <= code <= 0x7e or 0xa0 <= code <= 0xff else 0x01000000 + code
+        raise ValueError(f"Unknown key: {name}")
+
+    def _tap(self, keycodes: List[int]) -> None:
+        """Press keycodes in order and release them in reverse."""
+        X = self._X
+        for keycode in keycodes:
+            self._xtest.fake_input(self._display, X.KeyPress, keycode)
+        for keycode in reversed(keycodes):
+            self._xtest.fake_input(self._display, X.KeyRelease, keycode)
+        self._display.sync()
+
+    def press(self, key: str) -> None:
+        """Press and release a key or '+'-separated combination."""
+        names = key.split("+") if len(key) > 1 else [key]
+        keycodes = []
+        for name in names:
+            keycodes.extend(keycode for keycode in self._keycodes_for(self._keysym_for(name))
+                            if keycode not in keycodes)
+        self._tap(keycodes)
+
+    def type_unicode(self, text: str) -> None:
+        """Type text character by character through XTest."""
+        for char in text:
+            if char == "\n":
+                self.press("enter")
+            elif char == "\t":
+                self.press("tab")
+            elif char != "\r":
+                self._tap(self._keycodes_for(self._keysym_for(char)))
+
+    def set_clipboard(self, text: str) -> None:
+        """Take ownership of the CLIPBOARD selection with text as its content."""
+        with self._lock:
+            self._clipboard_text = text
+        if self.use_selection and not self._owns_selection:
+            self._owner_window.set_selection_owner(self._clipboard_atom, self._X.CurrentTime)
+            self._selection_display.flush()
+            self._owns_selection = True
+
+    def clipboard_unchanged(self) -> bool:
+        """Check that no other client took the CLIPBOARD selection since set_clipboard()."""
+        return self._owns_selection or not self.use_selection
+
+    def get_clipboard(self, timeout: float = 0.5) -> str:
+        """Read the CLIPBOARD selection as UTF-8 text."""
+        if self._owns_selection:
+            with self._lock:
+                return self._clipboard_text
+        X = self._X
+        window = self._reader_window
+        window.convert_selection(self._clipboard_atom, self._utf8_atom,
+                                 self._transfer_atom, X.CurrentTime)
+        self._display.flush()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self._display.pending_events():
+                time.sleep(0.005)
+                continue
+            event = self._display.next_event()
+            if event.type != X.SelectionNotify or event.requestor != window:
+                continue
+            if event.property == X.NONE:
+                return ""
+            prop = window.get_full_property(self._transfer_atom, X.AnyPropertyType)
+            window.delete_property(self._transfer_atom)
+            if prop is None:
+                return ""
+            value = prop.value
+            return value.decode("utf-8", "replace") if isinstance(value, bytes) else str(value)
+        return ""
+
+    def paste(self) -> None:
+        """Paste via Ctrl+V, or type the clipboard text when selections are disabled."""
+        if self.use_selection:
+            self.press("ctrl+v")
+        else:
+            with self._lock:
+                text = self._clipboard_text
+            self.type_unicode(text)
+
+    def _serve_selection(self) -> None:
+        """Answer SelectionRequest events for the CLIPBOARD selection."""
+        X = self._X
+        display = self._selection_display
+        while self._serving:
+            try:
+                event = display.next_event()
+            except Exception:
+                return
+            if event.type == X.SelectionClear:
+                self._owns_selection = False
+            elif event.type == X.SelectionRequest:
+                self._answer_request(event)
+
+    def _answer_request(self, request) -> None:
+        """Write the selection content to the requestor's property and notify it."""
+        X = self._X
+        requestor = request.requestor
+        prop = request.property if request.property != X.NONE else request.target
+        with self._lock:
+            text = self._clipboard_text
+        if request.target == self._targets_atom:
+            requestor.change_property(prop, self._Xatom.ATOM, 32,
+                                      [self._targets_atom, self._utf8_atom, self._text_atom, self._Xatom.STRING])
+        elif request.target in (self._utf8_atom, self._text_atom):
+            requestor.change_property(prop, self._utf8_atom, 8, text.encode("utf-8"))
+        elif request.target == self._Xatom.STRING:
+            requestor.change_property(prop, self._Xatom.STRING, 8, text.encode("latin-1", "replace"))
+        else:
+            prop = X.NONE
+        notify = self._xevent.SelectionNotify(
+            time=request.time,
+            requestor=requestor,
+            selection=request.selection,
+            target=request.target,
+            property=prop
+        )
+        requestor.send_event(notify, event_mask=0)
+        self._selection_display.flush()
+
+    def close(self) -> None:
+        """Unmap the scratch keycode, release the selection and close both X connections."""
+        self._serving = False
+        if self._scratch_keysym is not None:
+            try:
+                self._display.change_keyboard_mapping(self._scratch_keycode, [self._scratch_original])
+                self._display.sync()
+            except Exception:
+                pass
+            self._scratch_keysym = None
+        try:
+            self._owner_window.destroy()
+            self._selection_display.close()
+        except Exception:
+            pass
+        try:
+            self._display.close()
+        except Exception:
+            pass
+
+
+BACKENDS = {
+    "win32": Win32Backend,
+    "xtest": XTestBackend,
+    "recording": RecordingBackend,
+}
+
+
+def default_backend_name() -> str:
+    """Return the backend used for 'auto': win32 on Windows, xtest elsewhere."""
+    if sys.platform == "win32":
+        return "win32"
+    if os.environ.get("DISPLAY"):
+        return "xtest"
+    raise RuntimeError("No output backend available: DISPLAY is not set")
+
+
+def create_backend(name: Optional[str] = None) -> OutputBackend:
+    """
+    Create an output backend by name.
+
+    Args:
+        name: Backend name, 'auto' or None for the platform default
+
+    Returns:
+        OutputBackend: The constructed backend
+    """
+    if name is None or name == "auto":
+        name = default_backend_name()
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown output backend: {name}")
+    return backend_class()
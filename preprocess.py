@@ -0,0 +1,234 @@
+import os
+import re
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from keystroke_plan import content_hash
+
+NORMALIZATIONS = ("none", "NFC", "NFD", "NFKC", "NFKD")
+WHITESPACE_POLICIES = ("keep", "trim", "collapse")
+NEWLINE_POLICIES = ("keep", "lf", "crlf", "space")
+
+# {{name}} or {{name:argument}}
+MACRO_PATTERN = re.compile(r"\{\{\s*([a-z_]+)\s*(?::([^{}]*))?\}\}")
+
+# Macros whose value changes between renders; texts without them are fully cached
+DYNAMIC_MACROS = ("date", "time", "counter", "clipboard")
+
+# Maximum nesting of {{include:...}}
+MAX_INCLUDE_DEPTH = 8
+
+_SPACE_RUNS = re.compile(r"[ \t]+")
+_TRAILING_SPACE = re.compile(r"[ \t]+(?=\r?\n|$)")
+_NEWLINES = re.compile(r"\r\n|\r|\n")
+
+
+class Template:
+    """
+    A text compiled by a Preprocessor.
+
+    Static parts are already normalized and included files already
+    inlined; only dynamic macros are left to expand in render(). A
+    template without dynamic macros renders to the same cached string
+    every time.
+    """
+
+    def __init__(self, parts: List[Union[str, Tuple[str, str]]], dependencies: Dict[str, int]):
+        """
+        Initialize a template.
+
+        Args:
+            parts: Literal strings and (macro, argument) pairs, in order
+            dependencies: Included file paths and their modification times
+        """
+        self.parts = parts
+        self.dependencies = dependencies
+        self.dynamic = any(not isinstance(part, str) for part in parts)
+        self.text = None if self.dynamic else "".join(parts)
+
+    def up_to_date(self) -> bool:
+        """Check that no included file changed since the template was compiled."""
+        for path, mtime in self.dependencies.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+
+class Preprocessor:
+    """
+    Turns raw texts into the text that is typed.
+
+    The pipeline inlines {{include:path}} files, normalizes Unicode and
+    applies the whitespace and newline policies, then expands the dynamic
+    macros {{date}}, {{date:%d/%m/%Y}}, {{time}}, {{counter}},
+    {{counter:name}} and {{clipboard}} on every render. Compiled templates
+    are cached by content hash, so a text typed again is not processed
+    again. Unknown macros are typed literally.
+    """
+
+    def __init__(self, normalization: str = "NFC", whitespace: str = "keep", newlines: str = "keep",
+                 macros: bool = True, base_dir: Optional[str] = None,
+                 clipboard: Optional[Callable[[], str]] = None, cache_size: int = 64):
+        """
+        Initialize the preprocessor.
+
+        Args:
+            normalization: Unicode normalization form, or 'none'
+            whitespace: 'keep', 'trim' (trailing spaces of each line) or
+                'collapse' (runs of spaces and tabs to one space)
+            newlines: 'keep', 'lf', 'crlf' or 'space'
+            macros: Whether {{...}} macros are expanded
+            base_dir: Directory relative include paths are resolved against
+            clipboard: Returns the clipboard text for {{clipboard}}
+            cache_size: Maximum number of compiled templates kept
+        """
+        self.clipboard = clipboard
+        self.cache_size = cache_size
+        self.counters: Dict[str, int] = {}
+        self.options = None
+        self.trusted = True
+        self._cache = OrderedDict()
+        self._last: Optional[Tuple[str, Template]] = None
+        self.configure(normalization, whitespace, newlines, macros, base_dir)
+
+    def configure(self, normalization: str = "NFC", whitespace: str = "keep", newlines: str = "keep",
+                  macros: bool = True, base_dir: Optional[str] = None) -> None:
+        """Change the pipeline options; cached templates are dropped if they differ."""
+        if normalization not in NORMALIZATIONS:
+            raise ValueError(f"Unknown normalization: {normalization}")
+        if whitespace not in WHITESPACE_POLICIES:
+            raise ValueError(f"Unknown whitespace policy: {whitespace}")
+        if newlines not in NEWLINE_POLICIES:
+            raise ValueError(f"Unknown newline policy: {newlines}")
+        options = (normalization, whitespace, newlines, bool(macros), base_dir)
+        if options != self.options:
+            self.options = options
+            self.normalization, self.whitespace, self.newlines, self.macros, self.base_dir = options
+            self._cache.clear()
+            self._last = None
+
+    def set_trusted(self, trusted: bool) -> None:
+        """
+        Set whether texts come from the local user.
+
+        Untrusted texts, such as jobs received over the network, are typed
+        with macros and includes left literal whatever the options say, so
+        they can't read local files or the clipboard.
+        """
+        if bool(trusted) != self.trusted:
+            self.trusted = bool(trusted)
+            self._cache.clear()
+            self._last = None
+
+    def _clean(self, text: str) -> str:
+        """Apply normalization and the whitespace and newline policies."""
+        if self.normalization != "none":
+            text = unicodedata.normalize(self.normalization, text)
+        if self.whitespace == "trim":
+            text = _TRAILING_SPACE.sub("", text)
+        elif self.whitespace == "collapse":
+            text = _SPACE_RUNS.sub(" ", text)
+        if self.newlines == "lf":
+            text = _NEWLINES.sub("\n", text)
+        elif self.newlines == "crlf":
+            text = _NEWLINES.sub("\r\n", text)
+        elif self.newlines == "space":
+            text = _NEWLINES.sub(" ", text)
+        return text
+
+    def compile(self, text: str) -> Template:
+        """Return the compiled template of text, from the cache when possible."""
+        last = self._last
+        if last is not None and last[0] is text and last[1].up_to_date():
+            # Same string object as the previous call; skip hashing it
+            return last[1]
+        key = content_hash(text)
+        template = self._cache.get(key)
+        if template is not None and template.up_to_date():
+            self._cache.move_to_end(key)
+        else:
+            dependencies: Dict[str, int] = {}
+            parts = self._parse(text, self.base_dir, dependencies, ())
+            template = Template(parts, dependencies)
+            self._cache[key] = template
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        self._last = (text, template)
+        return template
+
+    def _parse(self, text: str, base_dir: Optional[str], dependencies: Dict[str, int],
+               including: Tuple[str, ...]) -> List[Union[str, Tuple[str, str]]]:
+        """Split text into cleaned literals and dynamic macros, inlining includes."""
+        if not (self.macros and self.trusted):
+            return [self._clean(text)]
+        parts: List[Union[str, Tuple[str, str]]] = []
+        literal = []
+        position = 0
+        for match in MACRO_PATTERN.finditer(text):
+            name, argument = match.group(1), (match.group(2) or "").strip()
+            if name == "include":
+                literal.append(text[position:match.start()])
+                path = os.path.join(base_dir or os.getcwd(), os.path.expanduser(argument))
+                path = os.path.abspath(path)
+                if path in including or len(including) >= MAX_INCLUDE_DEPTH:
+                    raise ValueError(f"Recursive include: {argument}")
+                with open(path, encoding="utf-8-sig") as f:
+                    dependencies[path] = os.fstat(f.fileno()).st_mtime_ns
+                    included = f.read()
+                nested = self._parse(included, os.path.dirname(path), dependencies, including + (path,))
+                for part in nested:
+                    if isinstance(part, str):
+                        literal.append(part)
+                    else:
+                        parts.append(self._clean("".join(literal)))
+                        literal = []
+                        parts.append(part)
+            elif name in DYNAMIC_MACROS:
+                literal.append(text[position:match.start()])
+                parts.append(self._clean("".join(literal)))
+                literal = []
+                parts.append((name, argument))
+            else:
+                continue
+            position = match.end()
+        literal.append(text[position:])
+        parts.append(self._clean("".join(literal)))
+        return [part for part in parts if part != ""]
+
+    def expand(self, name: str, argument: str) -> str:
+        """Return the current value of a dynamic macro."""
+        if name == "date":
+            return datetime.now().strftime(argument or "%Y-%m-%d")
+        if name == "time":
+            return datetime.now().strftime(argument or "%H:%M:%S")
+        if name == "counter":
+            return str(self.counters.get(argument or "counter", 1))
+        if name == "clipboard":
+            try:
+                return self.clipboard() if self.clipboard is not None else ""
+            except Exception:
+                return ""
+        raise ValueError(f"Unknown macro: {name}")
+
+    def render(self, template: Template) -> str:
+        """Expand a template's dynamic macros into the text to type."""
+        if template.text is not None:
+            return template.text
+        return "".join(part if isinstance(part, str) else self._clean(self.expand(*part))
+                       for part in template.parts)
+
+    def process(self, text: str) -> str:
+        """Compile and render text."""
+        return self.render(self.compile(text))
+
+    def advance(self, text: str) -> None:
+        """Increment the counters used by text; called after each time it is typed."""
+        names = {part[1] or "counter" for part in self.compile(text).parts
+                 if not isinstance(part, str) and part[0] == "counter"}
+        for name in names:
+            self.counters[name] = self.counters.get(name, 1) + 1
@@ -1,22 +1,130 @@
+import hashlib
 import json
 import os
+import shutil
+from collections import OrderedDict
+from collections.abc import MutableSequence
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Union
+
+from config import atomic_write, ensure_profiles_dir
+from search_index import SearchIndex
+
+# Texts longer than this many characters are stored in side files
+LARGE_TEXT_THRESHOLD = 64 * 1024
+
+# Number of parsed profiles kept in memory
+PROFILE_CACHE_SIZE = 32
+
+
+class SideText:
+    """Reference to a large profile text stored in its own file."""
+
+    __slots__ = ("path", "length")
+
+    def __init__(self, path: Path, length: int):
+        self.path = path
+        self.length = length
+
+    def read(self) -> str:
+        """Read the referenced text."""
+        with open(self.path, 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+
+
+class ProfileTexts(MutableSequence):
+    """
+    List of profile texts whose large entries load from side files on first access.
+
+    Behaves like a list of strings; use length() to get a text's size
+    without loading it.
+    """
+
+    def __init__(self, entries: Optional[List[Union[str, SideText]]] = None):
+        self._entries: List[Union[str, SideText]] = list(entries or [])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._entries)))]
+        entry = self._entries[index]
+        if isinstance(entry, SideText):
+            entry = entry.read()
+            self._entries[index] = entry
+        return entry
+
+    def __setitem__(self, index, value):
+        self._entries[index] = value
+
+    def __delitem__(self, index):
+        del self._entries[index]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def insert(self, index, value):
+        self._entries.insert(index, value)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f"ProfileTexts({len(self._entries)} texts)"
+
+    def length(self, index: int) -> int:
+        """Return the length of a text without loading it."""
+        entry = self._entries[index]
+        return entry.length if isinstance(entry, SideText) else len(entry)
+
+    def entry(self, index: int) -> Union[str, SideText]:
+        """Return the raw entry: a loaded string or an unloaded SideText."""
+        return self._entries[index]
 
-from config import PROFILES_DIR
 
 class ProfileManager:
-    def __init__(self):
-        """Initialize the profile manager."""
-        self.profiles_dir = PROFILES_DIR
+    def __init__(self, profiles_dir: Optional[Path] = None):
+        """
+        Initialize the profile manager.
+
+        Args:
+            profiles_dir: Directory of the profile files, config.PROFILES_DIR by default
+        """
+        if profiles_dir is None:
+            self.profiles_dir = ensure_profiles_dir()
+        else:
+            self.profiles_dir = Path(profiles_dir)
+            self.profiles_dir.mkdir(parents=True, exist_ok=True)
         self.current_profile: Optional[Dict] = None
         self.current_profile_name: Optional[str] = None
+        # Metadata of every profile file, refreshed when the directory changes
+        self._index: Dict[str, Dict] = {}
+        self._index_dir_mtime: Optional[float] = None
+        # LRU cache of parsed profiles: name -> (file mtime, data)
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        # Full-text index, stored next to the profiles directory and loaded on first use
+        self._search_index: Optional[SearchIndex] = None
+
+    @staticmethod
+    def _safe_name(name: str) -> str:
+        """Sanitize a profile name for use as a file name."""
+        return "".join(x for x in name if x.isalnum() or x in "._- ")
+
+    def _profile_path(self, name: str) -> Path:
+        """Return the JSON file of a profile."""
+        return self.profiles_dir / f"{self._safe_name(name)}.json"
+
+    def _texts_dir(self, name: str) -> Path:
+        """Return the directory holding a profile's large texts."""
+        return self.profiles_dir / f"{self._safe_name(name)}.texts"
 
     def save_profile(self, name: str, data: Dict) -> bool:
         """
         Save a typing profile to JSON file.
         
+        Texts longer than LARGE_TEXT_THRESHOLD go to side files named by
+        content hash, and every file is written atomically, so a crash
+        can never leave a half-written profile behind.
+        
         Args:
             name: Profile name
             data: Profile data dictionary
@@ -25,18 +133,43 @@ class ProfileManager:
             bool: True if save successful, False otherwise
         """
         try:
-            # Sanitize filename
-            safe_name = "".join(x for x in name if x.isalnum() or x in "._- ")
-            filename = f"{safe_name}.json"
-            filepath = self.profiles_dir / filename
+            filepath = self._profile_path(name)
+            texts_dir = self._texts_dir(name)
 
             # Add metadata
             data['last_modified'] = datetime.now().isoformat()
             data['name'] = name
 
-            with open(filepath, 'w') as f:
-                json.dump(data, f, indent=4)
+            stored = dict(data)
+            stored_texts = []
+            referenced = set()
+            texts = data.get('texts', [])
+            for i in range(len(texts)):
+                entry = texts.entry(i) if isinstance(texts, ProfileTexts) else texts[i]
+                if isinstance(entry, SideText) and entry.path.parent == texts_dir and entry.path.exists():
+                    # Never loaded, so unchanged: keep the existing side file
+                    referenced.add(entry.path.name)
+                    stored_texts.append(self._side_reference(texts_dir, entry.path.name, entry.length))
+                    continue
+                text = entry.read() if isinstance(entry, SideText) else entry
+                if isinstance(text, str) and len(text) > LARGE_TEXT_THRESHOLD:
+                    filename = hashlib.sha1(text.encode('utf-8')).hexdigest() + ".txt"
+                    side_path = texts_dir / filename
+                    if not side_path.exists():
+                        texts_dir.mkdir(exist_ok=True)
+                        atomic_write(side_path, text)
+                    referenced.add(filename)
+                    stored_texts.append(self._side_reference(texts_dir, filename, len(text)))
+                else:
+                    stored_texts.append(text)
+            if 'texts' in data:
+                stored['texts'] = stored_texts
+
+            atomic_write(filepath, json.dumps(stored, indent=4))
+            self._remove_unreferenced(texts_dir, referenced)
+            self._index_profile(name, filepath.stat().st_mtime_ns, stored_texts, texts)
             
+            self._cache_put(name, filepath, data)
             self.current_profile = data
             self.current_profile_name = name
             return True
@@ -44,10 +177,108 @@ class ProfileManager:
             print(f"Error saving profile: {e}")
             return False
 
+    @property
+    def search_index(self) -> SearchIndex:
+        """Return the search index, reading it on first use."""
+        if self._search_index is None:
+            index = SearchIndex(self.profiles_dir.parent / f"{self.profiles_dir.name}.index")
+            index.load()
+            self._search_index = index
+        return self._search_index
+
+    def _index_profile(self, name: str, mtime: int, entries: List, texts) -> None:
+        """
+        Update the search index for a saved profile.
+
+        A failure is only reported: search() re-indexes profiles whose
+        file changed since they were indexed.
+
+        Args:
+            name: Profile name
+            mtime: Modification time of the saved profile file
+            entries: Texts as stored, strings or side file references
+            texts: The profile's texts, read for entries that need indexing
+        """
+        try:
+            entries = [SideText(self.profiles_dir / entry["$file"], entry.get("length", 0))
+                       if isinstance(entry, dict) and "$file" in entry else entry
+                       for entry in entries]
+            self.search_index.update(self._safe_name(name), name, mtime, entries, lambda i: texts[i])
+        except Exception as e:
+            print(f"Error indexing profile: {e}")
+
+    def search(self, query: str, limit: int = 50) -> List[Dict]:
+        """
+        Find the profiles whose name or texts contain query, ignoring case.
+
+        Profiles added or changed outside this manager are indexed first.
+
+        Args:
+            query: Substring to search for
+            limit: Maximum number of results
+
+        Returns:
+            List[Dict]: 'profile', 'text' (index, None for a name match),
+                'offset' and 'snippet' of each match, see SearchIndex.search
+        """
+        try:
+            self._refresh_index()
+            index = self.search_index
+            for key in index.stale({key: info["mtime"] for key, info in self._index.items()}):
+                data = self.load_profile_data(key)
+                texts = data.get('texts', [])
+                entries = [texts.entry(i) if isinstance(texts, ProfileTexts) else texts[i]
+                           for i in range(len(texts))]
+                index.update(key, data.get('name', key), self._index[key]["mtime"], entries,
+                             lambda i: texts[i])
+            return index.search(query, lambda key, i: self.load_profile_data(key)['texts'][i], limit)
+        except Exception as e:
+            print(f"Error searching profiles: {e}")
+            return []
+
+    def _side_reference(self, texts_dir: Path, filename: str, length: int) -> Dict:
+        """Return the JSON entry pointing to a side file."""
+        return {"$file": f"{texts_dir.name}/{filename}", "length": length}
+
+    @staticmethod
+    def _remove_unreferenced(texts_dir: Path, referenced: set) -> None:
+        """Delete side files a profile no longer uses, and the directory once empty."""
+        if not texts_dir.is_dir():
+            return
+        for path in texts_dir.iterdir():
+            if path.name not in referenced and path.suffix == ".txt":
+                path.unlink()
+        if not referenced:
+            shutil.rmtree(texts_dir, ignore_errors=True)
+
+    def _parse_profile(self, filepath: Path) -> Dict:
+        """Parse a profile file, turning side file entries into lazy texts."""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data.get('texts'), list):
+            entries = []
+            for entry in data['texts']:
+                if isinstance(entry, dict) and "$file" in entry:
+                    entry = SideText(self.profiles_dir / entry["$file"], entry.get("length", 0))
+                entries.append(entry)
+            data['texts'] = ProfileTexts(entries)
+        return data
+
+    def _cache_put(self, name: str, filepath: Path, data: Dict) -> None:
+        """Store a parsed profile in the LRU cache keyed by its file mtime."""
+        key = self._safe_name(name)
+        self._cache[key] = (filepath.stat().st_mtime_ns, data)
+        self._cache.move_to_end(key)
+        while len(self._cache) > PROFILE_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
     def load_profile(self, name: str) -> Optional[Dict]:
         """
         Load a typing profile from JSON file.
         
+        Parsed profiles are cached until their file changes; large texts
+        are only read when first accessed.
+        
         Args:
             name: Profile name
         
@@ -55,14 +286,22 @@ class ProfileManager:
             Optional[Dict]: Profile data if successful, None otherwise
         """
         try:
-            filename = f"{name}.json"
-            filepath = self.profiles_dir / filename
+            filepath = self._profile_path(name)
+            key = self._safe_name(name)
 
-            if not filepath.exists():
+            try:
+                mtime = filepath.stat().st_mtime_ns
+            except FileNotFoundError:
+                self._cache.pop(key, None)
                 return None
 
-            with open(filepath, 'r') as f:
-                data = json.load(f)
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == mtime:
+                self._cache.move_to_end(key)
+                data = cached[1]
+            else:
+                data = self._parse_profile(filepath)
+                self._cache_put(name, filepath, data)
             
             self.current_profile = data
             self.current_profile_name = name
@@ -82,11 +321,16 @@ class ProfileManager:
             bool: True if deletion successful, False otherwise
         """
         try:
-            filename = f"{name}.json"
-            filepath = self.profiles_dir / filename
+            filepath = self._profile_path(name)
 
             if filepath.exists():
                 os.remove(filepath)
+                shutil.rmtree(self._texts_dir(name), ignore_errors=True)
+                self._cache.pop(self._safe_name(name), None)
+                try:
+                    self.search_index.remove(self._safe_name(name))
+                except Exception as e:
+                    print(f"Error updating search index: {e}")
                 if self.current_profile_name == name:
                     self.current_profile = None
                     self.current_profile_name = None
@@ -96,6 +340,25 @@ class ProfileManager:
             print(f"Error deleting profile: {e}")
             return False
 
+    def _refresh_index(self) -> None:
+        """Rescan the profiles directory if it changed since the last scan."""
+        dir_mtime = self.profiles_dir.stat().st_mtime_ns
+        if dir_mtime == self._index_dir_mtime:
+            return
+        index = {}
+        with os.scandir(self.profiles_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json") or not entry.is_file():
+                    continue
+                stem = entry.name[:-5]
+                stat = entry.stat()
+                info = self._index.get(stem)
+                if info is None or info["mtime"] != stat.st_mtime_ns:
+                    info = {"mtime": stat.st_mtime_ns, "size": stat.st_size}
+                index[stem] = info
+        self._index = index
+        self._index_dir_mtime = dir_mtime
+
     def list_profiles(self) -> List[str]:
         """
         Get list of available profiles.
@@ -104,14 +367,54 @@ class ProfileManager:
             List[str]: List of profile names
         """
         try:
-            profiles = []
-            for file in self.profiles_dir.glob("*.json"):
-                profiles.append(file.stem)
-            return sorted(profiles)
+            self._refresh_index()
+            return sorted(self._index)
         except Exception as e:
             print(f"Error listing profiles: {e}")
             return []
 
+    def get_profile_info(self, name: str) -> Optional[Dict]:
+        """
+        Get profile metadata without loading its texts.
+        
+        Args:
+            name: Profile name
+        
+        Returns:
+            Optional[Dict]: name, last_modified, text_count, size and mtime, or None
+        """
+        try:
+            self._refresh_index()
+            info = self._index.get(self._safe_name(name))
+            if info is None:
+                return None
+            stat = self._profile_path(name).stat()
+            if stat.st_mtime_ns != info["mtime"]:
+                # Rewritten in place, which doesn't change the directory mtime
+                info.clear()
+                info.update({"mtime": stat.st_mtime_ns, "size": stat.st_size})
+            if "text_count" not in info:
+                data = self.load_profile_data(name)
+                texts = data.get('texts', [])
+                info.update({
+                    "name": data.get('name', name),
+                    "last_modified": data.get('last_modified'),
+                    "text_count": len(texts),
+                })
+            return dict(info)
+        except Exception as e:
+            print(f"Error reading profile info: {e}")
+            return None
+
+    def load_profile_data(self, name: str) -> Dict:
+        """Load a profile through the cache without making it the current profile."""
+        current = (self.current_profile, self.current_profile_name)
+        data = self.load_profile(name)
+        self.current_profile, self.current_profile_name = current
+        if data is None:
+            raise FileNotFoundError(name)
+        return data
+
     def create_new_profile(self, name: str) -> Dict:
         """
         Create a new empty profile template.
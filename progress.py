@@ -0,0 +1,94 @@
+import time
+from collections import deque
+from typing import List, NamedTuple, Optional, Tuple
+
+# Status messages kept for the reader; older ones are dropped when nobody drains the channel
+STATUS_BACKLOG = 100
+
+
+class ProgressSnapshot(NamedTuple):
+    """Latest progress of a typing run as seen by a reader."""
+    current: int
+    total: int
+    chars_per_second: float
+    eta: Optional[float]  # Seconds remaining, None when unknown
+
+
+class ProgressChannel:
+    """
+    Single-writer progress and status channel between the typing thread and a reader.
+
+    The writer never takes a lock: progress is published by replacing one
+    tuple attribute and status messages are appended to a bounded deque,
+    both of which are atomic under the GIL. The reader drains the channel at its
+    own pace and only ever sees the latest progress value, so the cost on
+    the reading side does not grow with typing speed.
+    """
+
+    def __init__(self, rate_window: float = 2.0):
+        """
+        Initialize the channel.
+
+        Args:
+            rate_window: Seconds of samples used for the chars/sec estimate
+        """
+        self.rate_window = rate_window
+        self._latest: Optional[Tuple[int, int, float]] = None
+        self._statuses = deque(maxlen=STATUS_BACKLOG)
+        self._samples = deque()
+        self._last_read: Optional[Tuple[int, int, float]] = None
+
+    # Writer side (typing thread)
+
+    def publish(self, current: int, total: int) -> None:
+        """Publish the current progress."""
+        self._latest = (current, total, time.perf_counter())
+
+    def position(self) -> Optional[Tuple[int, int]]:
+        """Return the last published (current, total) without consuming it."""
+        latest = self._latest
+        return (latest[0], latest[1]) if latest is not None else None
+
+    def post_status(self, status: str) -> None:
+        """Queue a status message."""
+        self._statuses.append(status)
+
+    def reset(self) -> None:
+        """Forget progress samples from a previous run."""
+        self._latest = None
+        self._last_read = None
+        self._samples.clear()
+
+    # Reader side (GUI thread)
+
+    def drain_statuses(self) -> List[str]:
+        """Return and remove all queued status messages in order."""
+        statuses = []
+        while True:
+            try:
+                statuses.append(self._statuses.popleft())
+            except IndexError:
+                return statuses
+
+    def read(self) -> Optional[ProgressSnapshot]:
+        """Return the latest progress if it changed since the last read, else None."""
+        latest = self._latest
+        if latest is None or latest is self._last_read:
+            return None
+        self._last_read = latest
+        current, total, stamp = latest
+
+        samples = self._samples
+        if samples and current < samples[-1][1]:
+            samples.clear()  # A new repeat cycle or run started
+        samples.append((stamp, current))
+        while len(samples) > 2 and stamp - samples[0][0] > self.rate_window:
+            samples.popleft()
+
+        rate = 0.0
+        if len(samples) > 1:
+            elapsed = samples[-1][0] - samples[0][0]
+            if elapsed > 0:
+                rate = (samples[-1][1] - samples[0][1]) / elapsed
+        eta = (total - current) / rate if rate > 0 and total > 0 else None
+        return ProgressSnapshot(current, total, rate, eta)
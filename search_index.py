@@ -0,0 +1,223 @@
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Set, Tuple, Union
+
+from config import atomic_write
+from keystroke_plan import content_hash
+
+# Length of the substrings indexed; queries shorter than this scan every document
+NGRAM = 3
+
+SEARCH_INDEX_VERSION = 1
+
+# Characters of context on each side of a match in search results
+SNIPPET_CONTEXT = 30
+
+# Document number of a profile's name; its texts are numbered from 0
+NAME_DOC = -1
+
+DocId = Tuple[str, int]  # (profile key, text index or NAME_DOC)
+
+
+def ngrams(text: str) -> Set[str]:
+    """Return the case-folded trigrams of text."""
+    text = text.casefold()
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def text_signature(entry) -> str:
+    """
+    Identify a profile text's content without reading side files.
+
+    Side files are named by the hash of their content, so their name is
+    enough; inline texts are hashed.
+    """
+    path = getattr(entry, "path", None)
+    if path is not None:
+        return f"file:{Path(path).name}"
+    return "text:" + content_hash(entry).hex()
+
+
+class SearchIndex:
+    """
+    Trigram inverted index over profile names and texts.
+
+    Each profile is stored in its own shard file listing the trigrams of
+    its name and texts, so saving or deleting one profile rewrites one
+    small file. Shards are read once into an in-memory map from trigram to
+    documents. A query intersects the posting sets of its trigrams,
+    smallest first, and confirms each candidate with a substring search,
+    so only the few documents that can match are read. Texts whose
+    signature did not change are not re-read when their profile is
+    re-indexed.
+    """
+
+    def __init__(self, directory: Path):
+        """
+        Initialize the index; shards are read by load().
+
+        Args:
+            directory: Directory of the shard files, created on first write
+        """
+        self.directory = Path(directory)
+        self.postings: Dict[str, Set[DocId]] = {}
+        # profile key -> {"name", "mtime", "docs": [{"signature", "trigrams"}]}
+        self.profiles: Dict[str, Dict] = {}
+
+    def _shard_path(self, key: str) -> Path:
+        """Return the shard file of a profile."""
+        return self.directory / f"{key}.json"
+
+    def load(self) -> None:
+        """Read all shards into memory; unreadable shards are ignored and re-indexed later."""
+        self.postings.clear()
+        self.profiles.clear()
+        try:
+            paths = list(self.directory.glob("*.json"))
+        except OSError:
+            return
+        for path in paths:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    shard = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if shard.get("version") == SEARCH_INDEX_VERSION and shard.get("key") == path.stem:
+                self._add(path.stem, shard)
+
+    def _add(self, key: str, shard: Dict) -> None:
+        """Add a profile's documents to the posting sets."""
+        self.profiles[key] = shard
+        postings = self.postings
+        for doc, entry in self._documents(shard):
+            for gram in entry["trigrams"]:
+                postings.setdefault(gram, set()).add((key, doc))
+
+    @staticmethod
+    def _documents(shard: Dict) -> Iterable[Tuple[int, Dict]]:
+        """Yield (document number, entry) for a shard's name and texts."""
+        yield NAME_DOC, shard["name_doc"]
+        yield from enumerate(shard["docs"])
+
+    def remove(self, key: str) -> None:
+        """Forget a profile and delete its shard."""
+        shard = self.profiles.pop(key, None)
+        if shard is not None:
+            postings = self.postings
+            for doc, entry in self._documents(shard):
+                for gram in entry["trigrams"]:
+                    docs = postings.get(gram)
+                    if docs is not None:
+                        docs.discard((key, doc))
+                        if not docs:
+                            del postings[gram]
+        try:
+            os.remove(self._shard_path(key))
+        except OSError:
+            pass
+
+    def update(self, key: str, name: str, mtime: int, texts: List[Union[str, object]],
+               read: Callable[[int], str]) -> None:
+        """
+        Index a saved profile, replacing its previous documents.
+
+        Args:
+            key: Profile file name without extension
+            name: Profile name
+            mtime: Modification time of the profile file in nanoseconds
+            texts: The profile's text entries, strings or side file references
+            read: Returns the content of the text at an index
+        """
+        previous = {}
+        old = self.profiles.get(key)
+        if old is not None:
+            previous = {entry["signature"]: entry["trigrams"] for entry in old["docs"]}
+        docs = []
+        for i, entry in enumerate(texts):
+            signature = text_signature(entry)
+            trigrams = previous.get(signature)
+            if trigrams is None:
+                trigrams = sorted(ngrams(entry if isinstance(entry, str) else read(i)))
+            docs.append({"signature": signature, "trigrams": trigrams})
+        shard = {
+            "version": SEARCH_INDEX_VERSION,
+            "key": key,
+            "name": name,
+            "mtime": mtime,
+            "name_doc": {"signature": "name", "trigrams": sorted(ngrams(name))},
+            "docs": docs,
+        }
+        self.remove(key)
+        self._add(key, shard)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        atomic_write(self._shard_path(key), json.dumps(shard, ensure_ascii=False))
+
+    def stale(self, mtimes: Dict[str, int]) -> List[str]:
+        """
+        Compare the index with the profile files on disk.
+
+        Shards of profiles that no longer exist are removed.
+
+        Args:
+            mtimes: Modification time of every profile file by key
+
+        Returns:
+            List[str]: Keys of profiles that are not indexed or changed since
+        """
+        for key in [key for key in self.profiles if key not in mtimes]:
+            self.remove(key)
+        return [key for key, mtime in mtimes.items()
+                if self.profiles.get(key, {}).get("mtime") != mtime]
+
+    def candidates(self, query: str) -> List[DocId]:
+        """Return the documents containing every trigram of query, in a stable order."""
+        grams = ngrams(query)
+        if not grams:
+            # Too short to use the index
+            found = {(key, doc) for key, shard in self.profiles.items() for doc, _ in self._documents(shard)}
+        else:
+            sets = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+            found = set(sets[0])
+            for docs in sets[1:]:
+                if not found:
+                    break
+                found &= docs
+        return sorted(found)
+
+    def search(self, query: str, read: Callable[[str, int], str], limit: int = 50) -> List[Dict]:
+        """
+        Find the profile names and texts containing query, ignoring case.
+
+        Args:
+            query: Substring to search for
+            read: Returns the text at an index of the profile with a key
+            limit: Maximum number of results
+
+        Returns:
+            List[Dict]: 'key', 'profile' (name), 'text' (index, or None for a
+                match in the name), 'offset' and 'snippet' of each match
+        """
+        needle = query.casefold()
+        results = []
+        if not needle:
+            return results
+        for key, doc in self.candidates(query):
+            name = self.profiles[key]["name"]
+            try:
+                text = name if doc == NAME_DOC else read(key, doc)
+            except (OSError, ValueError, LookupError):
+                continue
+            folded = text.casefold()
+            offset = folded.find(needle)
+            if offset < 0:
+                continue
+            # Case folding can change lengths (e.g. 'ß'); show the folded text then
+            source = text if len(folded) == len(text) else folded
+            start = max(0, offset - SNIPPET_CONTEXT)
+            snippet = source[start:offset + len(needle) + SNIPPET_CONTEXT].replace("\n", " ")
+            results.append({"key": key, "profile": name, "text": None if doc == NAME_DOC else doc,
+                            "offset": offset, "snippet": snippet})
+            if len(results) >= limit:
+                break
+        return results
@@ -0,0 +1,122 @@
+import sys
+import time
+from importlib.abc import MetaPathFinder
+from typing import Dict, List, Optional, Tuple
+
+
+class _TimedLoader:
+    """Loader wrapper that records how long a module takes to execute."""
+
+    def __init__(self, loader, profiler: "StartupProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        profiler = self._profiler
+        profiler._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = profiler._stack.pop()
+            if profiler._stack:
+                profiler._stack[-1] += elapsed
+            profiler.imports.append((module.__name__, elapsed, elapsed - nested))
+
+
+class StartupProfiler(MetaPathFinder):
+    """
+    Measures import and initialization time during startup.
+
+    Installed as the first meta path finder, it wraps every loader so
+    each module's cumulative and self execution time is recorded, like
+    `python -X importtime` but available in frozen builds. Startup phases
+    are timed with phase().
+    """
+
+    def __init__(self):
+        """Initialize an empty profile starting now."""
+        self.start = time.perf_counter()
+        self.imports: List[Tuple[str, float, float]] = []  # (module, cumulative, self)
+        self.phases: List[Tuple[str, float]] = []
+        self._stack: List[float] = []
+        self._last_phase = self.start
+        self._finding = False
+
+    def install(self) -> None:
+        """Start timing imports."""
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        """Stop timing imports."""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        """Find the spec with the remaining finders and wrap its loader."""
+        if self._finding:
+            return None
+        self._finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._finding = False
+
+    def phase(self, name: str) -> None:
+        """Record the time since the previous phase under name."""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last_phase))
+        self._last_phase = now
+
+    @property
+    def total(self) -> float:
+        """Return seconds from profiler creation to the last phase."""
+        return self._last_phase - self.start
+
+    def report(self, budget_ms: Optional[float] = None, top: int = 15) -> str:
+        """
+        Format the profile as text.
+
+        Args:
+            budget_ms: Startup budget to compare the total against
+            top: Number of slowest modules listed
+
+        Returns:
+            str: The report
+        """
+        lines = ["Startup profile", "", f"{'phase':<32}{'ms':>10}"]
+        for name, elapsed in self.phases:
+            lines.append(f"{name:<32}{elapsed * 1000:>10.1f}")
+        total_ms = self.total * 1000
+        lines.append(f"{'total':<32}{total_ms:>10.1f}")
+        if budget_ms is not None:
+            verdict = "within" if total_ms <= budget_ms else "OVER"
+            lines.append(f"{verdict} budget of {budget_ms:.0f} ms")
+
+        own: Dict[str, float] = {}
+        for name, _, self_time in self.imports:
+            root = name.split(".")[0]
+            own[root] = own.get(root, 0.0) + self_time
+        lines += ["", f"{'package (self time)':<32}{'ms':>10}"]
+        for name, elapsed in sorted(own.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f"{name:<32}{elapsed * 1000:>10.1f}")
+
+        lines += ["", f"{'module (cumulative)':<32}{'ms':>10}{'self ms':>10}"]
+        for name, cumulative, self_time in sorted(self.imports, key=lambda item: -item[1])[:top]:
+            lines.append(f"{name:<32}{cumulative * 1000:>10.1f}{self_time * 1000:>10.1f}")
+        return "\n".join(lines)
@@ -1,53 +1,267 @@
+"""
+Benchmark and regression suite for AutoTyper.
+
+Runs the engine against a RecordingBackend driven by a SimulatedClock, so
+speeds down to 1 WPM finish instantly and results don't depend on a
+desktop. Each case records throughput, timing error and CPU time per
+keystroke, and fails when it regresses against benchmark_baseline.json.
+CPU time is expressed in units of a fixed reference workload measured in
+the same session, so the baseline holds on faster and slower machines.
+
+Run the suite with pytest, or `python test_auto_typer.py` to print a
+report; `python test_auto_typer.py --update-baseline` rewrites the baseline.
+"""
+import json
+import os
+import sys
 import time
+
+import pytest
+
 from auto_typer import AutoTyper
+from output_backends import RecordingBackend
+from progress import STATUS_BACKLOG
+from timing import SimulatedClock
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# CPU time may exceed the baseline by this factor before a case fails
+CPU_TOLERANCE = float(os.environ.get("AUTOTYPER_BENCH_CPU_TOLERANCE", "3.0"))
+
+# Runs per measurement; the fastest is kept, as slower ones measure interference
+CPU_REPEATS = 3
+
+# Maximum relative difference between scheduled and simulated run time
+TIMING_TOLERANCE = 0.001
+
+# Simulated cost of one key injection, to check overhead doesn't slow the rate
+INJECT_LATENCY = 0.002
+
+TEXTS = {
+    "ascii": "The quick brown fox jumps over the lazy dog. " * 8,
+    "thai": "สวัสดีครับ ยินดีต้อนรับสู่การทดสอบ " * 8,
+    "mixed": "Hello สวัสดี world โลก 123! " * 8,
+}
+
+WPM_LEVELS = (1, 60, 300, 1000)
+
+CASES = [
+    (text_name, wpm, random_delay)
+    for text_name in TEXTS
+    for wpm in WPM_LEVELS
+    for random_delay in (False, True)
+]
+
+
+def case_id(text_name, wpm, random_delay):
+    return f"{text_name}-{wpm}wpm-{'random' if random_delay else 'fixed'}"
+
+
+def make_typer(clock=None, latency=0.0):
+    backend = RecordingBackend(clock=clock, latency=latency)
+    typer = AutoTyper(backend, clock)
+    typer.set_countdown(0)
+    return typer, backend
+
+
+def reference_workload():
+    """Dictionary, list and method call work similar to what the engine does per keystroke."""
+    table = {}
+    items = []
+    for i in range(20000):
+        key = (i & 255, "k")
+        table[key] = table.get(key, 0) + 1
+        items.append(str(i))
+    return len("".join(items)) + len(table)
+
+
+def reference_cost():
+    """Return the CPU microseconds of the reference workload on this machine."""
+    best = float("inf")
+    for _ in range(5):
+        start = time.thread_time()
+        reference_workload()
+        best = min(best, time.thread_time() - start)
+    return best * 1e6
+
+
+def run_case(text_name, wpm, random_delay, reference_us=None):
+    """Type one benchmark text in simulated time and measure the run."""
+    text = TEXTS[text_name]
+    cpu = float("inf")
+    for _ in range(CPU_REPEATS):
+        clock = SimulatedClock()
+        typer, backend = make_typer(clock, INJECT_LATENCY)
+        typer.set_text(text)
+        typer.set_wpm(wpm)
+        typer.set_random_delay(random_delay, 50, 150)
+        typer.set_delay_distribution("uniform", seed=1234)
+
+        # Typed on this thread, so thread time leaves out other threads' work
+        cpu_start = time.thread_time()
+        typer.run()
+        cpu = min(cpu, time.thread_time() - cpu_start)
+
+    schedule = typer.delay_schedule
+    offsets = typer.plan.offsets
+    expected = sum(schedule.delay(i, offsets[i + 1] - offsets[i]) for i in range(len(typer.plan)))
+    elapsed = typer.scheduler.elapsed()
+    keystrokes = len(backend.events)
+    cpu_us = cpu / keystrokes * 1e6 if keystrokes else 0.0
+    if reference_us is None:
+        reference_us = reference_cost()
+    return {
+        "case": case_id(text_name, wpm, random_delay),
+        "correct": backend.typed_text() == text,
+        "achieved_wpm": typer.achieved_wpm,
+        "expected_wpm": len(text) / expected * 12 if expected else 0.0,
+        "timing_error": abs(elapsed - expected) / expected,
+        "cpu_us_per_keystroke": cpu_us,
+        # Keystroke cost in thousandths of the reference workload
+        "cpu_per_keystroke": cpu_us / reference_us * 1000,
+    }
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    return load_baseline()
+
+
+@pytest.fixture(scope="module")
+def reference_us():
+    return reference_cost()
+
+
+@pytest.mark.parametrize("text_name,wpm,random_delay", CASES,
+                         ids=[case_id(*case) for case in CASES])
+def test_benchmark_case(text_name, wpm, random_delay, baseline, reference_us):
+    result = run_case(text_name, wpm, random_delay, reference_us)
+
+    assert result["correct"]
+    assert result["timing_error"] <= TIMING_TOLERANCE
+    assert result["achieved_wpm"] == pytest.approx(result["expected_wpm"], rel=TIMING_TOLERANCE)
+
+    reference = baseline.get(result["case"])
+    if reference:
+        assert result["cpu_per_keystroke"] <= reference["cpu_per_keystroke"] * CPU_TOLERANCE
+
+
+def test_interval_repeats_reuse_plan():
+    clock = SimulatedClock()
+    typer, backend = make_typer(clock)
+    typer.set_text("สวัสดี ab")
+    typer.set_wpm(600)
+    typer.interval = 30.0
+    typer.set_repeat_count(3)
+    plan = typer.plan
 
-def status_callback(status):
-    print(f"Status: {status}")
-
-def progress_callback(current, total):
-    percent = (current / total) * 100
-    print(f"Progress: {percent:.1f}%")
-
-def test_auto_typer():
-    print("Starting AutoTyper test...")
-    typer = AutoTyper()
-    
-    # Test text with various patterns
-    test_text = """This is a test of the optimized AutoTyper.
-It should handle punctuation, like commas, and periods.
-It also includes common letter pairs: there, then, in!
-Testing multiple lines and typing patterns."""
-
-    # Configure AutoTyper
-    typer.set_text(test_text)
-    typer.set_wpm(60)  # Moderate typing speed
-    typer.set_random_delay(True, 50, 150)  # Add some natural variation
-    typer.set_status_callback(status_callback)
-    typer.set_progress_callback(progress_callback)
-
-    # Start typing
-    print("\nStarting typing test in 3 seconds...")
-    time.sleep(3)
-    
     typer.start()
+    typer.thread.join()
+
+    assert backend.typed_text() == "สวัสดี ab" * 3
+    assert typer.plan is plan
+    # Interval waits are excluded from the achieved rate
+    assert typer.achieved_wpm == pytest.approx(600, rel=TIMING_TOLERANCE)
+    assert clock.now() >= 60.0
 
-    # Let it type for a few seconds
-    time.sleep(5)
-    
-    # Test pause functionality
-    print("\nTesting pause...")
+
+def test_pause_resume_suspends_typing():
+    typer, backend = make_typer()
+    typer.set_text("x" * 60)
+    typer.set_wpm(1000)
+
+    typer.start()
+    time.sleep(0.2)
     typer.toggle_pause()
-    time.sleep(2)
-    
-    # Resume typing
-    print("\nResuming typing...")
+    paused_at = time.perf_counter()
+    count_at_pause = len(backend.events)
+    time.sleep(0.4)
+    count_while_paused = len(backend.events)
     typer.toggle_pause()
-    
-    # Wait for completion
-    while typer.is_running():
-        time.sleep(0.1)
+    resumed_at = time.perf_counter()
+    typer.thread.join(10)
+
+    assert count_while_paused - count_at_pause <= 1
+    assert backend.typed_text() == "x" * 60
+    gap = max(b[0] - a[0] for a, b in zip(backend.events, backend.events[1:]))
+    assert gap >= (resumed_at - paused_at) * 0.8
+    # Time spent paused doesn't count against the achieved rate
+    assert typer.achieved_wpm == pytest.approx(1000, rel=0.1)
+
+
+@pytest.mark.parametrize("wpm,interval,countdown", [(1, 0.0, 0), (1000, 600.0, 0), (60, 0.0, 3)],
+                         ids=["keystroke-delay", "interval", "countdown"])
+def test_stop_interrupts_any_wait(wpm, interval, countdown):
+    typer, backend = make_typer()
+    typer.set_text("ab")
+    typer.set_wpm(wpm)
+    typer.interval = interval
+    typer.set_countdown(countdown)
+
+    typer.start()
+    time.sleep(0.1 if interval == 0 else 0.2)
+    stopped_at = time.perf_counter()
+    typer.stop()
+    typer.thread.join(1)
+
+    assert not typer.thread.is_alive()
+    assert time.perf_counter() - stopped_at < 0.05
+
+
+def test_pause_takes_effect_during_keystroke_delay():
+    typer, backend = make_typer()
+    typer.set_text("abc")
+    typer.set_wpm(2)  # 6 seconds per character
+
+    typer.start()
+    time.sleep(0.1)
+    typer.toggle_pause()
+    time.sleep(0.2)
+    typer.toggle_pause()
+    typer.stop()
+    typer.thread.join(1)
+
+    assert not typer.thread.is_alive()
+    # The pause shifted the pending deadline instead of restarting the delay
+    assert typer.scheduler.suspended_time == pytest.approx(0.2, abs=0.05)
+
+
+def test_undrained_statuses_are_bounded():
+    typer, backend = make_typer(SimulatedClock())
+    typer.set_text("a")
+    typer.set_wpm(1000)
+    for _ in range(STATUS_BACKLOG + 50):
+        typer.run()
+
+    statuses = typer.progress.drain_statuses()
+    assert len(statuses) == STATUS_BACKLOG
+    assert statuses[-1].startswith("Completed")
+    assert typer.progress.drain_statuses() == []
+
+
+def main():
+    reference_us = reference_cost()
+    results = [run_case(*case, reference_us) for case in CASES]
+    print(f"Reference workload: {reference_us:.0f} us")
+    print(f"{'case':<28}{'ok':>4}{'wpm':>10}{'error':>10}{'cpu us/key':>12}{'cpu/key':>10}")
+    for result in results:
+        print(f"{result['case']:<28}{'yes' if result['correct'] else 'NO':>4}"
+              f"{result['achieved_wpm']:>10.1f}{result['timing_error']:>10.2e}"
+              f"{result['cpu_us_per_keystroke']:>12.1f}{result['cpu_per_keystroke']:>10.2f}")
+    if "--update-baseline" in sys.argv:
+        baseline = {r["case"]: {"cpu_per_keystroke": round(r["cpu_per_keystroke"], 2)} for r in results}
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=4)
+        print(f"Baseline written to {BASELINE_PATH}")
 
-    print("\nTest completed!")
 
 if __name__ == "__main__":
-    test_auto_typer()
+    main()
@@ -0,0 +1,120 @@
+from auto_typer import AutoTyper
+from checkpoint import CheckpointJournal
+from output_backends import RecordingBackend
+from text_sources import FileSource
+from timing import SimulatedClock
+
+TEXT = "The quick brown fox jumps over the lazy dog. " * 4
+
+
+def make_typer(tmp_path, stop_after=None):
+    clock = SimulatedClock()
+    backend = RecordingBackend(clock=clock)
+    typer = AutoTyper(backend, clock)
+    typer.set_countdown(0)
+    typer.set_wpm(300)
+    typer.set_checkpoints(CheckpointJournal(tmp_path), "essays")
+    if stop_after is not None:
+        typer.set_progress_callback(lambda current, total: typer.stop() if len(backend.events) == stop_after else None)
+    return typer, backend
+
+
+def gaps(backend):
+    stamps = backend.timestamps()
+    return [round(b - a, 9) for a, b in zip(stamps, stamps[1:])]
+
+
+def test_resume_continues_position_and_delay_schedule(tmp_path):
+    typer, backend = make_typer(tmp_path, stop_after=30)
+    typer.set_random_delay(True, 50, 150)
+    typer.set_text(TEXT)
+    assert not typer.run()
+
+    checkpoint = typer.find_checkpoint()
+    assert checkpoint["profile"] == "essays"
+    assert checkpoint["chars"] == 30 and checkpoint["keystroke"] == 30
+
+    typer.set_progress_callback(None)
+    first_part = backend.typed_text()
+    backend.clear()
+    typer.request_resume()
+    assert typer.run()
+    assert first_part + backend.typed_text() == TEXT
+    assert typer.find_checkpoint() is None
+
+    # The resumed delays are those an uninterrupted run with the same seed would have used
+    reference, reference_backend = make_typer(tmp_path / "reference")
+    reference.set_random_delay(True, 50, 150)
+    reference.set_delay_distribution("uniform", seed=checkpoint["seed"])
+    reference.set_text(TEXT)
+    assert reference.run()
+    assert gaps(backend) == gaps(reference_backend)[30:]
+
+
+def test_checkpoints_are_tied_to_profile_and_text(tmp_path):
+    typer, backend = make_typer(tmp_path, stop_after=5)
+    typer.set_text(TEXT)
+    typer.run()
+
+    assert typer.find_checkpoint() is not None
+    typer.set_checkpoints(typer.journal, "other profile")
+    assert typer.find_checkpoint() is None
+    typer.set_checkpoints(typer.journal, "essays")
+    typer.set_text(TEXT + "!")
+    assert typer.find_checkpoint() is None
+    assert not typer.resume()
+
+
+def test_resume_within_repeat_cycles(tmp_path):
+    typer, backend = make_typer(tmp_path, stop_after=len(TEXT) + 12)
+    typer.set_text(TEXT)
+    typer.set_repeat_count(3)
+    typer.run()
+    assert typer.find_checkpoint()["cycle"] == 1
+
+    typer.set_progress_callback(None)
+    typer.request_resume()
+    assert typer.run()
+    assert backend.typed_text() == TEXT * 3
+
+
+def test_resume_file_source_across_blocks(tmp_path):
+    path = tmp_path / "long.txt"
+    content = "สวัสดีครับ hello world\n" * 20
+    path.write_text(content, encoding="utf-8-sig")
+    # Stop after every keystroke, including those next to block boundaries
+    for stop_after in range(1, len(content)):
+        typer, backend = make_typer(tmp_path / str(stop_after), stop_after=stop_after)
+        typer.set_wpm(1000)
+        typer.set_source(FileSource(str(path), block_size=64))
+        typer.run()
+        assert typer.find_checkpoint() is not None
+
+        typer.set_progress_callback(None)
+        typer.request_resume()
+        assert typer.run()
+        assert backend.typed_text() == content, stop_after
+
+
+def test_file_block_offsets_count_raw_bytes(tmp_path):
+    path = tmp_path / "broken.txt"
+    data = ("สวัสดี".encode("utf-8") + b"\xff\xfe ok " + "e\u0301".encode("utf-8")) * 20
+    path.write_bytes(data)
+    source = FileSource(str(path), block_size=16)
+
+    blocks = list(source.blocks())
+    assert [start for _, start, _ in blocks[1:]] == [end for _, _, end in blocks[:-1]]
+    assert blocks[-1][2] == len(data)
+    text = "".join(block for block, _, _ in blocks)
+    assert text == data.decode("utf-8", "replace")
+    for block, start, _ in blocks:
+        assert "".join(b for b, _, _ in source.blocks(start)) == data[start:].decode("utf-8", "replace")
+
+
+def test_journal_writes_are_batched(tmp_path):
+    typer, backend = make_typer(tmp_path)
+    typer.journal.interval = 3600
+    typer.set_text(TEXT)
+    assert typer.run()
+    assert typer.journal.writes == 0
+    assert typer.journal.list() == []
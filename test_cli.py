@@ -0,0 +1,54 @@
+import io
+import json
+
+from auto_typer import AutoTyper
+from cli import main, serve
+from output_backends import RecordingBackend
+
+
+def make_typer():
+    backend = RecordingBackend()
+    return AutoTyper(backend), backend
+
+
+def test_type_arguments_and_metrics(tmp_path):
+    typer, backend = make_typer()
+    metrics_path = tmp_path / "metrics.json"
+
+    status = main(["-q", "type", "--wpm", "1000", "--metrics-json", str(metrics_path),
+                   "สวัสดี", "world"], typer)
+
+    assert status == 0
+    assert backend.typed_text() == "สวัสดี world"
+    assert json.loads(metrics_path.read_text())["chars"] == len("สวัสดี world")
+
+
+def test_type_file(tmp_path):
+    typer, backend = make_typer()
+    path = tmp_path / "text.txt"
+    path.write_text("line one\nline two", encoding="utf-8")
+
+    assert main(["-q", "type", "--wpm", "1000", "--paste-mode", "line", "--file", str(path)], typer) == 0
+    assert backend.typed_text() == "line one\nline two"
+
+
+def test_daemon_reuses_engine_and_reports_each_job():
+    typer, backend = make_typer()
+    lines = io.StringIO(
+        '{"id": 1, "text": "ab", "wpm": 1000}\n'
+        '\n'
+        '{"id": 2, "text": "cd", "wpm": 1000, "metrics": true}\n'
+        '{"id": 3, "wpm": 1000}\n'
+        '{"id": 4, "file": "does-not-exist.txt", "wpm": 1000}\n'
+    )
+    output = io.StringIO()
+
+    failures = serve(typer, lines, output)
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [r["completed"] for r in results] == [True, True, False, False]
+    assert results[1]["metrics"]["keystrokes"] == 2
+    assert "text" in results[2]["error"]
+    assert results[3]["error"]
+    assert failures == 2
+    assert backend.typed_text() == "abcd"
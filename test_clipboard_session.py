@@ -0,0 +1,48 @@
+from auto_typer import AutoTyper
+from clipboard_session import ClipboardSession
+from output_backends import RecordingBackend
+from timing import SimulatedClock
+
+
+def test_clipboard_writes_are_skipped_and_the_clipboard_restored():
+    backend = RecordingBackend(clipboard="user", clock=SimulatedClock())
+    typer = AutoTyper(backend, backend.clock)
+    typer.set_countdown(0)
+    typer.set_text("ออออ ออ")
+    typer.set_wpm(1000)
+
+    assert typer.run()
+
+    assert backend.typed_text() == "ออออ ออ"
+    # One write for the repeated character plus the one restoring the user's text
+    assert backend.clipboard_writes == 2
+    assert typer.clipboard.skipped == 5
+    assert backend.clipboard == "user"
+    assert not backend.session_open
+
+    typer.set_text("ab")
+    assert typer.run()
+    assert typer.clipboard.cache_hits == 0  # 'a' and 'b' are new
+    typer.set_text("ba")
+    assert typer.run()
+    assert typer.clipboard.cache_hits == 2
+    assert backend.clipboard == "user"
+
+
+def test_write_is_repeated_once_another_program_changed_the_clipboard():
+    backend = RecordingBackend(clipboard="user")
+    session = ClipboardSession(backend, max_cached_length=3)
+    session.begin()
+    assert backend.session_open
+    session.set("ab")
+    backend.clipboard_unchanged = lambda: False
+    session.set("ab")
+    session.set("long text")
+    session.set("long text")
+    assert (session.writes, session.skipped, session.cache_hits) == (4, 0, 1)
+    assert backend.clipboard == "long text"
+
+    session.end()
+    session.end()
+    assert backend.clipboard == "user"
+    assert not backend.session_open
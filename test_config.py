@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+
+import config
+from config import SettingsService, merge_settings
+
+DEFAULTS = {
+    "wpm": 60,
+    "failsafe": True,
+    "theme": "light",
+    "random_delay": {"enabled": False, "min": 100, "max": 1000},
+}
+
+
+def write(path, data, bump=1):
+    """Write settings as another program would, with a later mtime."""
+    path.write_text(data if isinstance(data, str) else json.dumps(data), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump * 10 ** 9))
+
+
+def test_merge_keeps_missing_defaults_and_rejects_wrong_types():
+    merged = merge_settings(DEFAULTS, {
+        "wpm": 80.0,
+        "failsafe": 0,
+        "theme": 3,
+        "random_delay": {"enabled": True, "max": "fast"},
+        "extra": [1],
+    })
+    assert merged == {
+        "wpm": 80,
+        "failsafe": True,
+        "theme": "light",
+        "random_delay": {"enabled": True, "min": 100, "max": 1000},
+        "extra": [1],
+    }
+    assert merge_settings(DEFAULTS, None) == DEFAULTS
+    assert merged["random_delay"] is not DEFAULTS["random_delay"]
+
+
+def test_saves_are_debounced_into_one_write(tmp_path, monkeypatch):
+    writes = []
+    real_write = config.atomic_write
+    monkeypatch.setattr(config, "atomic_write", lambda path, data: (writes.append(data), real_write(path, data)))
+    path = tmp_path / "settings.json"
+    service = SettingsService(path, DEFAULTS, debounce=0.1)
+
+    service.update({"wpm": 90})
+    service.update({"random_delay": {"enabled": True}})
+    assert service.get()["random_delay"] == {"enabled": True, "min": 100, "max": 1000}
+    assert not path.exists()
+    time.sleep(0.3)
+
+    assert len(writes) == 1
+    assert json.loads(path.read_text(encoding="utf-8"))["wpm"] == 90
+    service.update({"wpm": 100})
+    service.flush_if_pending()
+    assert len(writes) == 2
+    service.flush_if_pending()
+    assert len(writes) == 2
+
+
+def test_external_edits_are_reloaded_and_malformed_files_ignored(tmp_path):
+    path = tmp_path / "settings.json"
+    write(path, {"wpm": 70})
+    service = SettingsService(path, DEFAULTS)
+    seen = []
+    service.subscribe(seen.append)
+    assert service.get()["wpm"] == 70
+
+    write(path, {"wpm": 120, "theme": "dark"}, bump=1)
+    assert service.check_for_changes()
+    assert service.get()["wpm"] == 120 and service.version == 1
+    assert seen == [service.get()]
+
+    # Half-written by an editor: the last good settings stay
+    write(path, '{"wpm": 5, "the', bump=2)
+    assert not service.check_for_changes()
+    assert service.get()["wpm"] == 120 and service.get()["theme"] == "dark"
+    assert service.version == 1
+
+    write(path, {"wpm": 5}, bump=3)
+    assert service.check_for_changes()
+    assert service.get()["wpm"] == 5 and service.version == 2
+
+
+def test_pending_local_changes_win_over_the_file(tmp_path):
+    path = tmp_path / "settings.json"
+    service = SettingsService(path, DEFAULTS, debounce=10)
+    service.update({"wpm": 75})
+    write(path, {"wpm": 30})
+    assert not service.check_for_changes()
+    service.flush()
+    assert json.loads(path.read_text(encoding="utf-8"))["wpm"] == 75
+
+
+def test_readers_never_see_a_partial_reload(tmp_path):
+    path = tmp_path / "settings.json"
+    write(path, {"wpm": 70})
+    service = SettingsService(path, DEFAULTS)
+    errors = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                service.get()["random_delay"]["max"]
+            except KeyError as e:
+                errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for i in range(200):
+        write(path, {"wpm": 70 + i % 2}, bump=i + 1)
+        service.check_for_changes()
+    done.set()
+    reader.join()
+    assert errors == []
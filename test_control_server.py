@@ -0,0 +1,258 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from auto_typer import AutoTyper
+from checkpoint import CheckpointJournal
+from control_server import ControlServer
+from job_queue import JobScheduler
+from output_backends import RecordingBackend
+
+TOKEN = "test-token"
+AUTHORIZATION = {"Authorization": f"Bearer {TOKEN}"}
+
+
+@pytest.fixture
+def control():
+    backend = RecordingBackend()
+    typer = AutoTyper(backend)
+    scheduler = JobScheduler(typer)
+    server = ControlServer(scheduler, port=0, token=TOKEN, poll_interval=0.01)
+    port = server.start_in_thread()
+    yield port, backend, typer
+    scheduler.shutdown()
+    server.stop()
+
+
+def request(port, method, path, payload=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    body = json.dumps(payload) if payload is not None else None
+    connection.request(method, path, body, {"Content-Type": "application/json", **AUTHORIZATION})
+    response = connection.getresponse()
+    data = json.loads(response.read())
+    connection.close()
+    return response.status, data
+
+
+def open_events(port):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    connection.request("GET", "/events", headers=AUTHORIZATION)
+    response = connection.getresponse()
+    assert response.status == 200
+    return connection, response
+
+
+def read_until(response, predicate):
+    events = []
+    while True:
+        event = json.loads(response.readline())
+        events.append(event)
+        if predicate(event):
+            return events
+
+
+def job_status(status):
+    return lambda event: event["type"] == "job" and event["job"]["status"] == status
+
+
+def test_submit_start_and_stream_events(control):
+    port, backend, typer = control
+    connection, events = open_events(port)
+    assert json.loads(events.readline())["type"] == "state"
+
+    status, submitted = request(port, "POST", "/jobs", {"text": "สวัสดี hello", "wpm": 1000})
+    assert status == 201
+    status, started = request(port, "POST", "/start")
+    assert status == 200
+
+    pending = {"done", "metrics", "completed"}
+
+    def seen_all(event):
+        if job_status("done")(event):
+            pending.discard("done")
+        elif event["type"] == "metrics":
+            pending.discard("metrics")
+        elif event["type"] == "status" and event["status"].startswith("Completed"):
+            pending.discard("completed")
+        return not pending
+
+    received = read_until(events, seen_all)
+    connection.close()
+
+    assert backend.typed_text() == "สวัสดี hello"
+    kinds = {event["type"] for event in received}
+    assert {"job", "status", "progress", "metrics"} <= kinds
+    status, jobs = request(port, "GET", "/jobs")
+    assert jobs["jobs"][0]["id"] == submitted["id"]
+    assert jobs["jobs"][0]["status"] == "done"
+
+
+def test_pause_resume_stop(control):
+    port, backend, typer = control
+    connection, events = open_events(port)
+    request(port, "POST", "/start", {"text": "x" * 50, "wpm": 60})
+    read_until(events, job_status("running"))
+
+    status, state = request(port, "POST", "/pause")
+    assert status == 200 and state["paused"]
+    status, state = request(port, "POST", "/resume")
+    assert status == 200 and not state["paused"]
+    status, result = request(port, "POST", "/stop")
+    assert result == {"stopped": True}
+    read_until(events, job_status("stopped"))
+    connection.close()
+
+    assert request(port, "POST", "/pause")[0] == 409
+    assert len(backend.typed_text()) < 50
+
+
+def test_resume_stopped_job_from_checkpoint(control, tmp_path):
+    port, backend, typer = control
+    typer.set_checkpoints(CheckpointJournal(tmp_path))
+    connection, events = open_events(port)
+    request(port, "POST", "/start", {"text": "x" * 30, "wpm": 1000, "profile": "api"})
+    read_until(events, lambda event: event["type"] == "progress" and event["current"] >= 5)
+    request(port, "POST", "/stop")
+    read_until(events, job_status("stopped"))
+    typed = len(backend.typed_text())
+
+    status, checkpoints = request(port, "GET", "/checkpoints")
+    assert checkpoints["checkpoints"][0]["profile"] == "api"
+    status, resumed = request(port, "POST", "/resume")
+    assert status == 200
+    read_until(events, job_status("done"))
+    connection.close()
+
+    assert 0 < typed < 30
+    assert backend.typed_text() == "x" * 30
+    assert request(port, "POST", "/resume")[0] == 409
+
+
+def test_many_concurrent_clients(control):
+    port, backend, typer = control
+    subscribers = [open_events(port) for _ in range(5)]
+    statuses = []
+
+    def poll():
+        statuses.append(request(port, "GET", "/status")[0])
+
+    threads = [threading.Thread(target=poll) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    request(port, "POST", "/start", {"text": "ab", "wpm": 1000})
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [200] * 20
+    for connection, events in subscribers:
+        read_until(events, job_status("done"))
+        connection.close()
+
+
+def test_bad_requests(control):
+    port, backend, typer = control
+    assert request(port, "POST", "/jobs", {"wpm": 60})[0] == 400
+    assert request(port, "POST", "/jobs", {"text": "a", "bogus": 1})[0] == 400
+    assert request(port, "GET", "/nope")[0] == 404
+    assert request(port, "GET", "/stop")[0] == 405
+    assert request(port, "DELETE", "/jobs/99")[0] == 409
+
+
+@pytest.mark.parametrize("field,value", [
+    ("priority", "high"), ("start_at", "tomorrow"), ("repeat_every", [1]), ("repeat_times", -1),
+    ("wpm", 0), ("wpm", True), ("wpm", 1.5), ("countdown", None), ("resume", 1), ("paste_mode", "sentence"),
+    ("random_delay", {"enabled": True, "min": "1", "max": 2}),
+])
+def test_job_fields_are_type_checked(control, field, value):
+    port, backend, typer = control
+    status, data = request(port, "POST", "/jobs", {"text": "a", field: value})
+    assert status == 400
+    assert field in data["error"]
+    assert request(port, "GET", "/jobs")[1] == {"jobs": []}
+
+
+def test_unexpected_errors_are_answered(control, monkeypatch):
+    port, backend, typer = control
+    monkeypatch.setattr(JobScheduler, "jobs", lambda self: 1 / 0)
+    status, data = request(port, "GET", "/jobs")
+    assert status == 500
+    assert "ZeroDivisionError" in data["error"]
+    assert request(port, "GET", "/status")[0] == 200
+
+
+def test_token_required():
+    scheduler = JobScheduler(AutoTyper(RecordingBackend()))
+    server = ControlServer(scheduler, port=0, token="secret")
+    port = server.start_in_thread()
+    try:
+        assert request(port, "GET", "/status")[0] == 401
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        connection.request("GET", "/status", headers={"Authorization": "Bearer secret"})
+        assert connection.getresponse().status == 200
+        connection.close()
+    finally:
+        server.stop()
+
+
+def test_stop_ends_open_streams_and_connections():
+    scheduler = JobScheduler(AutoTyper(RecordingBackend()))
+    server = ControlServer(scheduler, port=0, token=TOKEN)
+    port = server.start_in_thread()
+    connection, events = open_events(port)
+    assert json.loads(events.readline())["type"] == "state"
+    idle = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    idle.connect()
+
+    stopper = threading.Thread(target=server.stop)
+    stopper.start()
+    stopper.join(5)
+    assert not stopper.is_alive()
+    assert events.readline() == b""
+    connection.close()
+    idle.close()
+
+
+def raw_status(port, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    connection.request(method, path, body, headers or {})
+    status = connection.getresponse().status
+    connection.close()
+    return status
+
+
+def test_token_is_generated_by_default():
+    server = ControlServer(JobScheduler(AutoTyper(RecordingBackend())), port=0)
+    port = server.start_in_thread()
+    try:
+        assert server.token
+        assert raw_status(port, "GET", "/status") == 401
+        assert raw_status(port, "GET", "/status", headers={"Authorization": f"Bearer {server.token}"}) == 200
+    finally:
+        server.stop()
+
+
+def test_requests_a_web_page_could_send_are_refused(control):
+    port, backend, typer = control
+    job = json.dumps({"text": "typed by a web page"})
+    simple_post = {"Content-Type": "text/plain", **AUTHORIZATION}
+    assert raw_status(port, "POST", "/start", job, simple_post) == 415
+    assert raw_status(port, "POST", "/start", job, {"Content-Type": "application/json",
+                                                    "Origin": "http://example.com", **AUTHORIZATION}) == 403
+    assert raw_status(port, "GET", "/status", headers={"Host": "attacker.example:8765", **AUTHORIZATION}) == 403
+    assert raw_status(port, "GET", "/status", headers={"Host": "localhost:8765", **AUTHORIZATION}) == 200
+    assert raw_status(port, "GET", "/status", headers={"Host": "[::1]:8765", **AUTHORIZATION}) == 200
+    assert request(port, "GET", "/jobs")[1] == {"jobs": []}
+
+
+def test_remote_jobs_type_macros_literally(control, tmp_path):
+    port, backend, typer = control
+    secret = tmp_path / "secret.txt"
+    secret.write_text("private", encoding="utf-8")
+    connection, events = open_events(port)
+    text = f"{{{{include:{secret}}}}} {{{{counter}}}}"
+    request(port, "POST", "/start", {"text": text, "wpm": 1000})
+    read_until(events, job_status("done"))
+    connection.close()
+    assert backend.typed_text() == text
@@ -0,0 +1,117 @@
+import time
+from types import SimpleNamespace
+
+from auto_typer import AutoTyper
+from hotkeys import HotkeyDispatcher
+from output_backends import RecordingBackend
+
+
+class FakeKeyboard:
+    """Stands in for the keyboard module, keeping hooks in a dict."""
+
+    def __init__(self):
+        self.hooks = {}
+        self._handles = iter(range(1, 1000))
+
+    def on_press_key(self, key, callback):
+        handle = next(self._handles)
+        self.hooks[handle] = (key, callback)
+        return handle
+
+    def on_press(self, callback):
+        return self.on_press_key(None, callback)
+
+    def unhook(self, handle):
+        del self.hooks[handle]
+
+    def press(self, name):
+        for key, callback in list(self.hooks.values()):
+            if key in (None, name):
+                callback(SimpleNamespace(name=name, event_type="down"))
+
+
+def make_typer(text="x" * 200, wpm=20):
+    typer = AutoTyper(RecordingBackend())
+    typer.set_countdown(0)
+    typer.set_wpm(wpm)
+    typer.set_text(text)
+    return typer
+
+
+def test_rebinding_one_hotkey_keeps_the_others():
+    keyboard = FakeKeyboard()
+    dispatcher = HotkeyDispatcher(keyboard)
+    dispatcher.bind("toggle", "f9")
+    dispatcher.bind("stop", "f10")
+    stop_handle = dispatcher.bindings["stop"][1]
+
+    assert not dispatcher.bind("stop", "f10")
+    assert dispatcher.bind("toggle", "f8")
+    assert dispatcher.bindings["stop"][1] == stop_handle
+    assert sorted(key for key, _ in keyboard.hooks.values()) == ["f10", "f8"]
+
+    dispatcher.close()
+    assert keyboard.hooks == {}
+
+
+def test_emergency_stop_reaches_the_engine_without_the_gui():
+    keyboard = FakeKeyboard()
+    dispatcher = HotkeyDispatcher(keyboard)
+    dispatcher.bind("stop", "f10")
+    typer = make_typer()
+    dispatcher.engine = typer
+    typer.start()
+    time.sleep(0.1)
+
+    started = time.perf_counter()
+    keyboard.press("f10")
+    typer.thread.join(1.0)
+
+    assert not typer.thread.is_alive()
+    assert time.perf_counter() - started < 0.5
+    assert dispatcher.events.drain() == [("stop", None)]
+
+
+def test_toggle_starts_through_the_gui_and_stops_in_the_engine():
+    keyboard = FakeKeyboard()
+    dispatcher = HotkeyDispatcher(keyboard)
+    dispatcher.bind("toggle", "f9")
+    typer = make_typer()
+    dispatcher.engine = typer
+
+    keyboard.press("f9")
+    assert dispatcher.events.drain() == [("start", None)]
+    typer.start()
+    keyboard.press("f9")
+    typer.thread.join(1.0)
+    assert not typer.is_running()
+    assert dispatcher.events.drain() == [("stopped", None)]
+
+
+def test_pause_command_is_applied_by_the_typing_thread():
+    typer = make_typer(wpm=600)
+    typer.start()
+    assert typer.post_command("pause")
+    time.sleep(0.1)
+    assert typer.is_paused()
+    typed = len(typer.backend.events)
+    time.sleep(0.1)
+    assert len(typer.backend.events) == typed
+
+    assert typer.post_command("pause")
+    time.sleep(0.1)
+    assert not typer.is_paused()
+    typer.post_command("stop")
+    typer.thread.join(1.0)
+    assert not typer.post_command("stop")
+
+
+def test_recording_a_hotkey_skips_modifiers():
+    keyboard = FakeKeyboard()
+    dispatcher = HotkeyDispatcher(keyboard)
+    dispatcher.record("start_stop")
+    keyboard.press("shift")
+    keyboard.press("f7")
+    keyboard.press("f6")
+    assert dispatcher.events.drain() == [("recorded", ("start_stop", "f7"))]
+    assert keyboard.hooks == {}
@@ -0,0 +1,83 @@
+import random
+import time
+
+import pytest
+
+from auto_typer import AutoTyper
+from incremental import EditScript, diff
+from output_backends import RecordingBackend
+from timing import SimulatedClock
+
+
+def make_typer():
+    clock = SimulatedClock()
+    backend = RecordingBackend(clock=clock)
+    typer = AutoTyper(backend, clock)
+    typer.set_countdown(0)
+    typer.set_wpm(1000)
+    return typer, backend
+
+
+@pytest.mark.parametrize("unit", ["grapheme", "char"])
+def test_typing_the_edit_script_turns_the_old_text_into_the_new_one(unit):
+    old = "สวัสดีครับ\r\nThe quick brwn fox\njumps over the dog.\n"
+    new = "สวัสดีค่ะ\r\nThe quick brown fox\njumps over the lazy dog!\n"
+    typer, backend = make_typer()
+    script = typer.set_incremental(old, new, unit)
+
+    assert typer.run()
+
+    assert backend.edited_text(old, unit) == new
+    assert script.keystrokes < len(new)
+    assert typer.text_hash() is None
+
+
+def test_deleting_the_whole_text_is_a_run():
+    typer, backend = make_typer()
+    typer.set_incremental("สวัสดี\nhello", "")
+    assert typer.run()
+    assert backend.edited_text("สวัสดี\nhello") == ""
+
+
+def test_random_edits_round_trip():
+    rng = random.Random(7)
+    alphabet = ["a", "b", " ", "\n", "\r\n", "ก", "ำ", "่", "ี"]
+    for _ in range(300):
+        old = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        new = list(old)
+        for _ in range(rng.randint(0, 5)):
+            position = rng.randint(0, len(new))
+            if position < len(new) and rng.random() < 0.5:
+                del new[position]
+            else:
+                new.insert(position, rng.choice(alphabet))
+        new = "".join(new)
+        backend = RecordingBackend()
+        for kind, value in EditScript(old, new, max_cost=rng.choice([2, 1000])).ops:
+            if kind == "key":
+                for _ in range(value[1]):
+                    backend.press(value[0])
+            else:
+                backend.set_clipboard(value)
+                backend.paste()
+        assert backend.edited_text(old) == new
+
+
+def test_large_document_with_few_edits_is_diffed_quickly():
+    rng = random.Random(1)
+    lines = ["".join(rng.choice("abcdefgh ") for _ in range(60)) for _ in range(30000)]
+    old = "\n".join(lines)
+    lines[100] = lines[100][:10] + "X" + lines[100][11:]
+    lines[29000] = "inserted line\n" + lines[29000]
+    new = "\n".join(lines)
+
+    started = time.perf_counter()
+    hunks = diff(old, new)
+    assert time.perf_counter() - started < 2.0
+    assert sum(i2 - i1 for _, i1, i2, _, _ in hunks) == 1
+    assert sum(j2 - j1 for _, _, _, j1, j2 in hunks) == len("X") + len("inserted line\n")
+
+
+def test_edit_distance_above_the_cap_replaces_the_block():
+    assert diff("abcdef", "uvwxyz", max_cost=3) == [("replace", 0, 6, 0, 6)]
+    assert diff("same", "same") == []
@@ -0,0 +1,124 @@
+import time
+
+import pytest
+
+from auto_typer import AutoTyper
+from job_queue import CANCELLED, DONE, QUEUED, JobScheduler, TypingJob
+from output_backends import RecordingBackend
+from timing import SimulatedClock
+
+
+def make_scheduler():
+    backend = RecordingBackend(clock=SimulatedClock())
+    typer = AutoTyper(backend, SimulatedClock())
+    scheduler = JobScheduler(typer)
+    return scheduler, backend
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_jobs_run_by_priority_on_one_worker():
+    scheduler, backend = make_scheduler()
+    low = TypingJob("low ", priority=0)
+    high = TypingJob("high ", priority=5)
+    scheduler.submit(low)
+    scheduler.submit(high)
+    scheduler.start()
+    try:
+        wait_for(lambda: low.status == DONE and high.status == DONE)
+        assert backend.typed_text() == "high low "
+        assert scheduler._thread.is_alive()
+    finally:
+        scheduler.shutdown()
+
+
+def test_scheduled_job_waits_and_can_be_cancelled():
+    scheduler, backend = make_scheduler()
+    later = TypingJob("later", start_at=time.time() + 0.2)
+    never = TypingJob("never", start_at=time.time() + 60)
+    scheduler.submit(later)
+    scheduler.submit(never)
+    scheduler.start()
+    try:
+        assert scheduler.cancel(never.id)
+        time.sleep(0.05)
+        assert backend.typed_text() == ""
+        wait_for(lambda: later.status == DONE)
+        assert backend.typed_text() == "later"
+        assert never.status == CANCELLED
+    finally:
+        scheduler.shutdown()
+
+
+def test_repeat_rule_and_profile_playlist():
+    scheduler, backend = make_scheduler()
+    repeated = TypingJob("r", repeat_every=0.05, repeat_times=3)
+    scheduler.submit(repeated)
+    ids = scheduler.submit_profile({"name": "p", "settings": {"wpm": 600}, "texts": ["a", "b"]})
+    scheduler.start()
+    try:
+        wait_for(lambda: repeated.status == DONE)
+        wait_for(lambda: all(job["status"] == DONE for job in scheduler.jobs()))
+        assert repeated.runs == 3
+        assert len(ids) == 2
+        assert backend.typed_text().count("r") == 3
+    finally:
+        scheduler.shutdown()
+
+
+class InterruptedWhileConfiguring(TypingJob):
+    """Cancels itself or shuts the scheduler down after the worker took it, before the run begins."""
+
+    def __init__(self, scheduler, text, action):
+        super().__init__(text)
+        self.scheduler = scheduler
+        self.action = action
+
+    def configure(self, typer):
+        super().configure(typer)
+        action, self.action = self.action, None
+        if action == "cancel":
+            assert self.scheduler.cancel(self.id)
+        elif action == "shutdown":
+            self.scheduler.shutdown(wait=False)
+
+
+def test_stop_before_the_run_begins_is_not_lost():
+    scheduler, backend = make_scheduler()
+    job = InterruptedWhileConfiguring(scheduler, "never typed", "cancel")
+    after = TypingJob("next")
+    scheduler.submit(job)
+    scheduler.submit(after)
+    scheduler.start()
+    try:
+        wait_for(lambda: after.status == DONE)
+        assert job.status == CANCELLED
+        assert backend.typed_text() == "next"
+    finally:
+        scheduler.shutdown()
+
+    scheduler, backend = make_scheduler()
+    job = InterruptedWhileConfiguring(scheduler, "typed after restart", "shutdown")
+    scheduler.submit(job)
+    scheduler.start()
+    scheduler._thread.join(5)
+    assert not scheduler._thread.is_alive()
+    assert job.status == QUEUED and backend.typed_text() == ""
+    scheduler.start()
+    try:
+        wait_for(lambda: job.status == DONE)
+        assert backend.typed_text() == "typed after restart"
+    finally:
+        scheduler.shutdown()
+
+
+def test_job_that_cannot_be_queued_is_not_listed():
+    scheduler, backend = make_scheduler()
+    with pytest.raises(TypeError):
+        scheduler.submit(TypingJob("a", priority="high"))
+    assert scheduler.jobs() == []
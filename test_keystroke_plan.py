@@ -0,0 +1,30 @@
+from keystroke_plan import ACTION_KEY, ACTION_PASTE, KeystrokePlan, PlanCache
+
+
+def test_plans_are_compiled_once_and_evicted_oldest_first():
+    plan = KeystrokePlan.compile("ดี a", "grapheme")
+    assert [plan.action(i) for i in range(len(plan))] == [
+        (ACTION_PASTE, "ดี"), (ACTION_KEY, "space"), (ACTION_PASTE, "a")]
+    assert list(plan.offsets) == [0, 2, 3, 4]
+    assert plan.total_chars == 4
+
+    cache = PlanCache(max_entries=2)
+    first = cache.get("one")
+    assert cache.get("".join(["o", "ne"])) is first  # Equal text, different object
+    assert cache.get("one", "word") is not first
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    cache.get("two")
+    assert cache.get("one") is not first  # Evicted as the least recently used
+    assert cache.misses == 4
+
+
+def test_cache_keeps_total_characters_under_its_limit():
+    cache = PlanCache(max_chars=10)
+    large = cache.get("x" * 11)
+    assert cache.get("".join(["x"] * 11)) is not large  # Too large to cache
+    cache.get("abcdef")
+    cache.get("ghijkl")
+    assert cache.chars == 6
+    assert cache.get("abcdef").matches("abcdef", "char", 1)
+    assert cache.misses == 5
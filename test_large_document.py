@@ -0,0 +1,32 @@
+from large_document import LineIndex
+
+
+def test_text_index_maps_offsets_to_lines():
+    text = "first\nสวัสดี\n\nlast"
+    index = LineIndex.from_text(text)
+
+    assert len(index) == 4
+    assert index.lines(0, 10) == ["first", "สวัสดี", "", "last"]
+    assert index.position(0) == (0, 0)
+    assert index.position(text.index("ดี")) == (1, 4)
+    assert index.position(len(text)) == (3, 4)
+
+
+def test_long_lines_are_split_into_segments():
+    index = LineIndex.from_text("a" * 10 + "\nb", max_segment=4)
+
+    assert index.lines(0, 10) == ["aaaa", "aaaa", "aa", "b"]
+    assert index.position(9) == (2, 1)
+
+
+def test_file_index_uses_byte_offsets(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_bytes(b"\xef\xbb\xbf" + "ab\nสว\n".encode("utf-8") + "ก".encode("utf-8") * 5)
+    index = LineIndex.from_file(str(path), max_segment=7)
+    try:
+        assert index.lines(0, 10) == ["ab", "สว", "กก", "กก", "ก"]
+        # Byte offset 3 + len("ab\n") + 4 bytes lands inside the second Thai character
+        assert index.position(3 + 3 + 4) == (1, 1)
+        assert index.position(index.length) == (4, 1)
+    finally:
+        index.close()
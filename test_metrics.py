@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from auto_typer import AutoTyper
+from metrics import HISTOGRAM_BOUNDS_MS, PHASES, RunMetrics, percentile
+from output_backends import RecordingBackend
+from timing import SimulatedClock
+
+
+def make_typer(clock=None, latency=0.0):
+    backend = RecordingBackend(clock=clock, latency=latency)
+    typer = AutoTyper(backend, clock)
+    typer.set_countdown(0)
+    return typer, backend
+
+
+def test_metrics_record_every_keystroke(tmp_path):
+    typer, backend = make_typer(SimulatedClock(), latency=0.002)
+    calls = []
+    path = tmp_path / "metrics.json"
+    typer.enable_metrics(True, str(path), lambda metrics: calls.append(metrics.keystrokes))
+    typer.set_text("ab " * 84)
+    typer.set_wpm(300)
+
+    assert typer.run()
+
+    metrics = typer.metrics
+    assert metrics.keystrokes == len(backend.events) == 252
+    assert metrics.chars == 252
+    assert calls == [100, 200]
+    assert metrics.achieved_wpm == pytest.approx(300, rel=0.001)
+    exported = json.loads(path.read_text())
+    assert exported["keystrokes"] == 252
+    assert set(exported["phases"]) == set(PHASES)
+    for phase in PHASES:
+        assert exported["phases"][phase]["count"] == 252
+        assert sum(exported["histograms_ms"][phase].values()) == 252
+        assert len(exported["histograms_ms"][phase]) == len(HISTOGRAM_BOUNDS_MS) + 1
+
+    typer.enable_metrics(False)
+    assert typer.run()
+    assert typer.metrics.keystrokes == 252  # Not recorded again
+
+
+def test_summaries_and_histograms():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.5
+    assert percentile([1.0, 2.0, 3.0, 4.0], 1.0) == 4.0
+
+    metrics = RunMetrics(60, hook_every=2)
+    for inject in (0.0005, 0.003, 0.003, 2.0):
+        metrics.record(0.0, inject, 0.0, 0.1, 1)
+    summary = metrics.phase_summary("inject")
+    assert summary["count"] == 4
+    assert summary["p50_ms"] == pytest.approx(3.0)
+    assert summary["max_ms"] == pytest.approx(2000.0)
+    histogram = metrics.histogram("inject")
+    assert (histogram["<=0.5"], histogram["<=5"], histogram[">1000"]) == (1, 2, 1)
+    assert metrics.total_overhead() == pytest.approx(2.0065)
@@ -0,0 +1,44 @@
+import pytest
+
+from auto_typer import AutoTyper
+from output_backends import BACKENDS, RecordingBackend, create_backend
+from timing import SimulatedClock
+
+
+def make_typer(clock=None):
+    backend = RecordingBackend(clock=clock)
+    typer = AutoTyper(backend, clock)
+    typer.set_countdown(0)
+    return typer, backend
+
+
+def test_recording_backend_receives_keys_and_pastes():
+    typer, backend = make_typer(SimulatedClock())
+    typer.set_text("สวัสดี ab")
+    typer.set_wpm(1000)
+
+    assert typer.run()
+
+    kinds = [(kind, value) for _, kind, value in backend.events]
+    assert kinds == [("paste", c) for c in "สวัสดี"] + [("key", "space"), ("paste", "a"), ("paste", "b")]
+    assert backend.typed_text() == "สวัสดี ab"
+    assert isinstance(create_backend("recording"), RecordingBackend)
+    assert set(BACKENDS) >= {"win32", "xtest", "recording"}
+    with pytest.raises(ValueError):
+        create_backend("typewriter")
+
+
+def test_recording_latency_advances_the_clock():
+    clock = SimulatedClock()
+    backend = RecordingBackend(clipboard="user", clock=clock, latency=0.5)
+    backend.press("enter")
+    backend.set_clipboard_data(backend.encode_clipboard("ดี"))
+    backend.paste()
+
+    assert backend.timestamps() == [0.5, 1.0]
+    assert clock.now() == 1.0
+    assert backend.typed_text() == "\nดี"
+    assert backend.clipboard_writes == 1
+    backend.clear()
+    assert backend.events == [] and backend.clipboard_writes == 0
+    assert backend.get_clipboard() == "ดี"
@@ -0,0 +1,70 @@
+import os
+import unicodedata
+
+import pytest
+
+from auto_typer import AutoTyper
+from output_backends import RecordingBackend
+from preprocess import Preprocessor
+from timing import SimulatedClock
+
+
+def test_normalization_and_policies():
+    decomposed = unicodedata.normalize("NFD", "café")
+    assert Preprocessor().process(decomposed) == "café"
+    assert Preprocessor(whitespace="trim").process("a  \nb\t") == "a\nb"
+    assert Preprocessor(whitespace="collapse").process("a \t b") == "a b"
+    assert Preprocessor(newlines="lf").process("a\r\nb\rc") == "a\nb\nc"
+    assert Preprocessor(newlines="space").process("a\r\nb") == "a b"
+    assert Preprocessor(macros=False).process("{{date}}") == "{{date}}"
+
+
+def test_static_templates_are_cached_until_an_include_changes(tmp_path):
+    (tmp_path / "inner.txt").write_text("inner {{include:deep.txt}}", encoding="utf-8")
+    (tmp_path / "deep.txt").write_text("deep", encoding="utf-8")
+    preprocessor = Preprocessor(base_dir=str(tmp_path))
+    text = "start {{include:inner.txt}} {{unknown}} end"
+
+    template = preprocessor.compile(text)
+    assert not template.dynamic
+    assert preprocessor.render(template) == "start inner deep {{unknown}} end"
+    assert preprocessor.compile("".join(text)) is template
+
+    deep = tmp_path / "deep.txt"
+    deep.write_text("changed", encoding="utf-8")
+    os.utime(deep, ns=(0, 0))
+    assert preprocessor.process(text) == "start inner changed {{unknown}} end"
+
+
+def test_recursive_include_is_rejected(tmp_path):
+    (tmp_path / "loop.txt").write_text("{{include:loop.txt}}", encoding="utf-8")
+    with pytest.raises(ValueError):
+        Preprocessor(base_dir=str(tmp_path)).process("{{include:loop.txt}}")
+
+
+def test_dynamic_macros_are_expanded_each_cycle():
+    clock = SimulatedClock()
+    backend = RecordingBackend(clipboard="clip", clock=clock)
+    typer = AutoTyper(backend, clock)
+    typer.set_countdown(0)
+    typer.set_wpm(1000)
+    typer.set_repeat_count(3)
+    typer.set_text("#{{counter}} {{clipboard}} {{date:%Y}}.")
+    assert typer.plan is None  # Rendered when the run starts
+
+    assert typer.run()
+
+    year = typer.preprocessor.expand("date", "%Y")
+    assert backend.typed_text() == "".join(f"#{i} clip {year}." for i in (1, 2, 3))
+    assert backend.get_clipboard() == "clip"
+
+
+def test_plans_are_reused_by_content():
+    typer = AutoTyper(RecordingBackend())
+    typer.set_text("same text")
+    plan = typer.plan
+    typer.set_text("other text")
+    typer.set_text("".join(["same ", "text"]))
+
+    assert typer.plan is plan
+    assert typer.plans.hits >= 1
@@ -0,0 +1,110 @@
+import json
+import os
+
+import pytest
+
+import config
+import profile_manager
+from config import atomic_write
+from profile_manager import LARGE_TEXT_THRESHOLD, ProfileManager, SideText
+
+LARGE = "line one\r\nline two\n" * (LARGE_TEXT_THRESHOLD // 10)
+
+
+def save(manager, name, texts):
+    data = manager.create_new_profile(name)
+    data["texts"] = texts
+    assert manager.save_profile(name, data)
+    return data
+
+
+def bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_large_texts_live_in_side_files_and_load_lazily(tmp_path):
+    save(ProfileManager(tmp_path), "Essay", ["short", LARGE])
+    stored = json.loads((tmp_path / "Essay.json").read_text(encoding="utf-8"))
+    assert stored["texts"][0] == "short"
+    assert stored["texts"][1]["length"] == len(LARGE)
+    side_path = tmp_path / stored["texts"][1]["$file"]
+    # Line endings are written as they are, on every platform
+    assert side_path.read_bytes() == LARGE.encode("utf-8")
+
+    texts = ProfileManager(tmp_path).load_profile("Essay")["texts"]
+    assert isinstance(texts.entry(1), SideText)
+    assert texts.length(1) == len(LARGE)
+    assert texts[1] == LARGE
+    assert texts.entry(1) == LARGE
+
+
+def test_unchanged_side_files_are_kept_and_unused_ones_removed(tmp_path):
+    manager = ProfileManager(tmp_path)
+    save(manager, "Essay", ["short", LARGE])
+    side_files = list((tmp_path / "Essay.texts").iterdir())
+
+    data = ProfileManager(tmp_path).load_profile("Essay")
+    data["texts"][0] = "edited"
+    assert manager.save_profile("Essay", data)
+    assert list((tmp_path / "Essay.texts").iterdir()) == side_files
+    assert isinstance(data["texts"].entry(1), SideText)
+
+    data["texts"][1] = LARGE + "more"
+    assert manager.save_profile("Essay", data)
+    assert [path.name for path in (tmp_path / "Essay.texts").iterdir()] != [path.name for path in side_files]
+    assert len(list((tmp_path / "Essay.texts").iterdir())) == 1
+
+    del data["texts"][1]
+    assert manager.save_profile("Essay", data)
+    assert not (tmp_path / "Essay.texts").exists()
+
+
+def test_parsed_profiles_are_cached_until_their_file_changes(tmp_path, monkeypatch):
+    manager = ProfileManager(tmp_path)
+    save(manager, "Notes", ["a"])
+    first = manager.load_profile("Notes")
+    assert manager.load_profile("Notes") is first
+
+    path = tmp_path / "Notes.json"
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["texts"] = ["b"]
+    path.write_text(json.dumps(data), encoding="utf-8")
+    bump_mtime(path)
+    assert list(manager.load_profile("Notes")["texts"]) == ["b"]
+
+    monkeypatch.setattr(profile_manager, "PROFILE_CACHE_SIZE", 2)
+    saved = {name: save(manager, name, [name]) for name in ("One", "Two", "Three")}
+    assert manager.load_profile("Three") is saved["Three"]
+    # Least recently used, so parsed again
+    assert manager.load_profile("One") is not saved["One"]
+
+
+def test_profile_index_lists_files_and_reads_metadata(tmp_path):
+    manager = ProfileManager(tmp_path)
+    save(manager, "Essay", ["short", LARGE])
+    assert manager.list_profiles() == ["Essay"]
+
+    info = manager.get_profile_info("Essay")
+    assert info["text_count"] == 2 and info["name"] == "Essay"
+
+    other = ProfileManager(tmp_path)
+    save(other, "Other", ["x"])
+    assert manager.list_profiles() == ["Essay", "Other"]
+    assert manager.delete_profile("Other")
+    assert manager.list_profiles() == ["Essay"]
+    assert manager.get_profile_info("Other") is None
+
+
+def test_failed_atomic_write_keeps_the_old_file(tmp_path, monkeypatch):
+    path = tmp_path / "settings.json"
+    atomic_write(path, "old\r\n")
+
+    def fail(source, target):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(config.os, "replace", fail)
+    with pytest.raises(OSError):
+        atomic_write(path, "new")
+    assert path.read_bytes() == b"old\r\n"
+    assert os.listdir(tmp_path) == ["settings.json"]
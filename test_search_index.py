@@ -0,0 +1,65 @@
+import json
+import os
+import time
+
+from profile_manager import LARGE_TEXT_THRESHOLD, ProfileManager
+
+
+def make_manager(tmp_path):
+    return ProfileManager(tmp_path / "profiles")
+
+
+def save(manager, name, texts):
+    data = manager.create_new_profile(name)
+    data["texts"] = texts
+    assert manager.save_profile(name, data)
+
+
+def test_search_finds_names_and_texts_and_follows_saves_and_deletes(tmp_path):
+    manager = make_manager(tmp_path)
+    save(manager, "Greetings", ["สวัสดีครับ ยินดีต้อนรับ", "Hello World"])
+    save(manager, "Letters", ["Dear Sir or Madam", "hello again"])
+
+    assert [(m["profile"], m["text"]) for m in manager.search("HELLO")] == [("Greetings", 1), ("Letters", 1)]
+    assert [(m["profile"], m["text"]) for m in manager.search("ยินดี")] == [("Greetings", 0)]
+    assert [(m["profile"], m["text"]) for m in manager.search("lett")] == [("Letters", None)]
+    assert manager.search("madam")[0]["snippet"] == "Dear Sir or Madam"
+    assert manager.search("hello world again") == []
+
+    save(manager, "Letters", ["Dear Sir or Madam"])
+    assert [m["profile"] for m in manager.search("hello")] == ["Greetings"]
+    assert manager.delete_profile("Greetings")
+    assert manager.search("hello") == []
+    assert not (tmp_path / "profiles.index" / "Greetings.json").exists()
+
+
+def test_index_is_persisted_and_catches_up_with_external_changes(tmp_path):
+    save(make_manager(tmp_path), "Notes", ["first note", "x" * (LARGE_TEXT_THRESHOLD + 1) + "needle"])
+    shard = json.loads((tmp_path / "profiles.index" / "Notes.json").read_text(encoding="utf-8"))
+    assert shard["docs"][1]["signature"].startswith("file:")
+
+    manager = make_manager(tmp_path)
+    assert [m["text"] for m in manager.search("needle")] == [1]
+
+    # Edited by hand while the manager wasn't looking
+    path = tmp_path / "profiles" / "Notes.json"
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["texts"][0] = "second note"
+    time.sleep(0.01)
+    edited = path.with_suffix(".tmp")
+    edited.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(edited, path)
+    assert [m["text"] for m in manager.search("second")] == [0]
+    assert manager.search("first") == []
+
+
+def test_candidates_narrow_the_verified_documents(tmp_path):
+    manager = make_manager(tmp_path)
+    for i in range(200):
+        save(manager, f"profile {i}", [f"text number {i} with some filler words"])
+    save(manager, "special", ["a rare phrase appears here"])
+
+    index = manager.search_index
+    assert index.candidates("rare phrase") == [("special", 0)]
+    assert [m["profile"] for m in manager.search("rare phrase")] == ["special"]
+    assert len(manager.search("number 1", limit=500)) == 111
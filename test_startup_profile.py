@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+
+from startup_profile import StartupProfiler
+
+
+def test_startup_profile_times_imports_and_phases(tmp_path, monkeypatch):
+    (tmp_path / "slow_startup_module.py").write_text("import time\ntime.sleep(0.05)\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    profiler = StartupProfiler()
+    profiler.install()
+    try:
+        import slow_startup_module  # noqa: F401
+        profiler.phase("import module")
+    finally:
+        profiler.uninstall()
+        sys.modules.pop("slow_startup_module", None)
+
+    [(name, cumulative, self_time)] = [i for i in profiler.imports if i[0] == "slow_startup_module"]
+    assert cumulative >= 0.05 and self_time >= 0.05
+    assert [name for name, _ in profiler.phases] == ["import module"]
+    assert "within budget of 10000 ms" in profiler.report(10000)
+    assert "OVER budget of 1 ms" in profiler.report(1)
+    assert profiler not in sys.meta_path
+
+
+def test_gui_import_defers_keyboard_and_file_dialog():
+    code = "import sys, gui; print(sorted(m for m in ('keyboard', 'tkinter.filedialog') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,50 @@
+import pytest
+
+from auto_typer import AutoTyper
+from output_backends import RecordingBackend
+from text_segmentation import iter_graphemes, segment_text
+from timing import SimulatedClock
+
+
+def make_typer(clock=None):
+    backend = RecordingBackend(clock=clock)
+    typer = AutoTyper(backend, clock)
+    typer.set_countdown(0)
+    return typer, backend
+
+
+def test_graphemes_keep_marks_with_their_base():
+    text = "กำน้ำ e\u0301\r\n\n"
+    assert [text[start:end] for start, end in iter_graphemes(text)] == [
+        "กำ", "น้ำ", " ", "e\u0301", "\r\n", "\n"]
+    assert segment_text(text, "char") == list(text)
+    with pytest.raises(ValueError):
+        segment_text(text, "sentence")
+
+
+@pytest.mark.parametrize("mode,chunk_size,chunks", [
+    ("grapheme", 1, ["ส", "วั", "ส", "ดี", " ", "ค", "รั", "บ", "\r\n", "โ", "ล", "ก"]),
+    ("word", 1, ["สวัสดี ", "ครับ", "\r", "\n", "โลก"]),
+    ("line", 1, ["สวัสดี ครับ\r\n", "โลก"]),
+    ("run", 3, ["สวัส", "ดี ค", "รับ\r\n", "โลก"]),
+])
+def test_paste_modes_keep_clusters_together(mode, chunk_size, chunks):
+    text = "สวัสดี ครับ\r\nโลก"
+    assert segment_text(text, mode, chunk_size) == chunks
+
+    typer, backend = make_typer(SimulatedClock())
+    typer.set_text(text)
+    typer.set_wpm(1000)
+    typer.set_paste_mode(mode, chunk_size)
+    assert typer.run()
+
+    assert backend.typed_text() == text
+    pastes = [value for _, kind, value in backend.events if kind == "paste"]
+    assert pastes == [chunk for chunk in chunks if chunk != " "]
+    assert len(pastes) < len(text)
+
+
+def test_unknown_paste_mode_is_rejected():
+    typer, backend = make_typer()
+    with pytest.raises(ValueError):
+        typer.set_paste_mode("sentence")
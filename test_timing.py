@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+
+from timing import KeystrokeScheduler, MonotonicClock, SimulatedClock
+
+
+def test_scheduler_deadlines_absorb_keystroke_overhead():
+    clock = SimulatedClock()
+    scheduler = KeystrokeScheduler(clock, max_lag=0.25)
+    scheduler.start()
+    for _ in range(100):
+        clock.sleep(0.03)  # Injection cost, less than the 0.1 s delay
+        scheduler.add_chars(1)
+        assert scheduler.wait(0.1)
+    assert clock.now() == pytest.approx(10.0)
+    assert scheduler.achieved_wpm() == pytest.approx(120.0)
+
+    # A stall longer than max_lag is not caught up with a burst
+    clock.sleep(1.0)
+    assert scheduler.wait(0.1)
+    assert scheduler.next_deadline == pytest.approx(11.0)
+    assert scheduler.wait(0.1)
+    assert clock.now() == pytest.approx(11.1)
+
+    scheduler.suspend()
+    clock.sleep(5.0)
+    scheduler.resume()
+    assert scheduler.suspended_time == pytest.approx(5.0)
+    assert scheduler.elapsed() == pytest.approx(11.1)
+    assert scheduler.wait(0.1)
+    assert clock.now() == pytest.approx(16.2)
+
+
+def test_interrupted_wait_can_be_repeated():
+    scheduler = KeystrokeScheduler(MonotonicClock())
+    scheduler.start()
+    wake = threading.Event()
+    wake.set()
+    assert not scheduler.wait(5.0, wake)
+    assert scheduler.next_deadline == scheduler.start_time
+
+    wake.clear()
+    assert scheduler.wait(0.02, wake)
+    assert scheduler.next_deadline == pytest.approx(scheduler.start_time + 0.02)
+    assert scheduler.clock.now() >= scheduler.next_deadline
@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+
+from auto_typer import AutoTyper
+from output_backends import RecordingBackend
+from timing import SimulatedClock
+from timing_trace import TimingTrace, TraceRecorder, TraceSchedule
+
+
+def test_trace_round_trips_through_a_memory_mapped_file(tmp_path):
+    path = str(tmp_path / "trace.bin")
+    TimingTrace.from_seconds([0.12, 0.08, 0.3]).save(path)
+    trace = TimingTrace.load(path)
+    assert isinstance(trace.intervals, memoryview)
+    assert trace.intervals.format == "H"
+    assert [trace.interval(i) for i in range(len(trace))] == pytest.approx([0.12, 0.08, 0.3])
+    trace.close()
+
+    TimingTrace.from_seconds([0.1, 90.0]).save(path)
+    trace = TimingTrace.load(path)
+    assert trace.intervals.format == "I"
+    assert trace.interval(1) == pytest.approx(90.0)
+    trace.close()
+
+    (tmp_path / "bad.bin").write_bytes(b"not a trace at all, really")
+    with pytest.raises(ValueError):
+        TimingTrace.load(str(tmp_path / "bad.bin"))
+
+
+def test_replay_drives_the_typing_loop():
+    clock = SimulatedClock()
+    backend = RecordingBackend(clock=clock)
+    typer = AutoTyper(backend, clock)
+    typer.set_countdown(0)
+    typer.set_text("abcdef")
+    typer.set_timing_trace(TimingTrace.from_seconds([0.1, 0.2, 0.4]), scale=0.5)
+
+    assert typer.run()
+
+    stamps = backend.timestamps()
+    gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+    assert gaps == pytest.approx([0.05, 0.1, 0.2, 0.05, 0.1])
+
+
+def test_schedule_without_loop_keeps_the_mean():
+    schedule = TraceSchedule(TimingTrace.from_seconds([0.1, 0.3]), loop=False)
+    assert schedule.delay(1) == pytest.approx(0.3)
+    assert schedule.delay(5, length=2) == pytest.approx(0.4)
+
+
+def test_recorder_ignores_modifiers_and_clips_pauses():
+    recorder = TraceRecorder(max_pause=1.0)
+    for name, event_type, when in [("a", "down", 0.0), ("a", "up", 0.05), ("shift", "down", 0.1),
+                                   ("B", "down", 0.15), ("c", "down", 10.0)]:
+        recorder.record(SimpleNamespace(name=name, event_type=event_type, time=when))
+    trace = recorder.trace()
+    assert [trace.interval(i) for i in range(len(trace))] == pytest.approx([0.15, 1.0])
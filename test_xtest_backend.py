@@ -0,0 +1,168 @@
+"""Integration tests for the XTest backend against a private Xvfb server."""
+import os
+import shutil
+import subprocess
+import time
+
+import pytest
+
+Xlib = pytest.importorskip("Xlib")
+if shutil.which("Xvfb") is None:
+    pytest.skip("Xvfb is not installed", allow_module_level=True)
+
+from Xlib import X, XK, display as xdisplay
+
+from auto_typer import AutoTyper
+from output_backends import XTestBackend, create_backend
+
+DISPLAY = ":97"
+
+
+@pytest.fixture(scope="module")
+def xvfb():
+    server = subprocess.Popen(["Xvfb", DISPLAY, "-screen", "0", "640x480x24", "-nolisten", "tcp"],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while not os.path.exists(f"/tmp/.X11-unix/X{DISPLAY[1:]}"):
+        if time.time() > deadline or server.poll() is not None:
+            server.kill()
+            pytest.skip("Xvfb did not start")
+        time.sleep(0.05)
+    yield DISPLAY
+    server.terminate()
+    server.wait()
+
+
+@pytest.fixture
+def focused_window(xvfb):
+    """A mapped, focused window collecting the keysyms typed into it."""
+    d = xdisplay.Display(xvfb)
+    window = d.screen().root.create_window(0, 0, 100, 100, 0, X.CopyFromParent,
+                                           event_mask=X.KeyPressMask)
+    window.map()
+    d.sync()
+    window.set_input_focus(X.RevertToParent, X.CurrentTime)
+    d.sync()
+
+    def typed_keysyms():
+        keysyms = []
+        d.sync()
+        while d.pending_events():
+            event = d.next_event()
+            if event.type == X.KeyPress:
+                keysym = d.keycode_to_keysym(event.detail, 1 if event.state & X.ShiftMask else 0)
+                if keysym not in (XK.XK_Shift_L, XK.XK_Shift_R):
+                    keysyms.append(keysym)
+        return keysyms
+
+    yield typed_keysyms
+    d.close()
+
+
+def test_clipboard_round_trip_between_clients(xvfb):
+    owner = XTestBackend(xvfb)
+    reader = XTestBackend(xvfb)
+    try:
+        owner.set_clipboard("สวัสดี hello")
+        assert reader.get_clipboard() == "สวัสดี hello"
+    finally:
+        owner.close()
+        reader.close()
+
+
+def test_press_injects_named_keys(xvfb, focused_window):
+    backend = XTestBackend(xvfb)
+    try:
+        backend.press("space")
+        backend.press("a")
+        time.sleep(0.1)
+        assert focused_window() == [XK.XK_space, XK.XK_a]
+    finally:
+        backend.close()
+
+
+def test_direct_unicode_typing_remaps_thai(xvfb, focused_window):
+    backend = XTestBackend(xvfb, use_selection=False)
+    try:
+        backend.set_clipboard("ก")
+        backend.paste()
+        time.sleep(0.1)
+        assert focused_window() == [0x01000000 + ord("ก")]
+    finally:
+        backend.close()
+
+
+def test_shifted_characters_hold_shift(xvfb, focused_window):
+    backend = XTestBackend(xvfb, use_selection=False)
+    try:
+        backend.type_unicode("Hello!")
+        time.sleep(0.1)
+        assert focused_window() == [XK.string_to_keysym(name) for name in
+                                    ("H", "e", "l", "l", "o", "exclam")]
+    finally:
+        backend.close()
+
+
+def test_close_unmaps_the_scratch_keycode(xvfb):
+    backend = XTestBackend(xvfb, use_selection=False)
+    backend.type_unicode("ก")
+    d = xdisplay.Display(xvfb)
+    keycode = d.keysym_to_keycode(0x01000000 + ord("ก"))
+    assert keycode
+    backend.close()
+    try:
+        assert not any(d.get_keyboard_mapping(keycode, 1)[0])
+    finally:
+        d.close()
+
+
+def test_clipboard_unchanged_until_another_client_takes_it(xvfb):
+    backend = XTestBackend(xvfb)
+    other = XTestBackend(xvfb)
+    try:
+        backend.set_clipboard("mine")
+        assert backend.clipboard_unchanged()
+        other.set_clipboard("theirs")
+        deadline = time.time() + 2
+        while backend.clipboard_unchanged() and time.time() < deadline:
+            time.sleep(0.01)
+        assert not backend.clipboard_unchanged()
+    finally:
+        backend.close()
+        other.close()
+
+
+def test_ownership_changes_race_the_selection_thread(xvfb):
+    first = XTestBackend(xvfb)
+    second = XTestBackend(xvfb)
+    reader = XTestBackend(xvfb, use_selection=False)
+    try:
+        for i in range(50):
+            # Taking the selection back from a client whose helper thread is answering requests
+            first.set_clipboard(f"first {i}")
+            assert reader.get_clipboard() == f"first {i}"
+            second.set_clipboard(f"second {i}")
+            assert reader.get_clipboard() == f"second {i}"
+            deadline = time.time() + 2
+            while first.clipboard_unchanged() and time.time() < deadline:
+                time.sleep(0.001)
+    finally:
+        first.close()
+        second.close()
+        reader.close()
+
+
+def test_engine_runs_on_xtest_backend(xvfb, focused_window, monkeypatch):
+    monkeypatch.setenv("DISPLAY", xvfb)
+    backend = create_backend("auto")
+    try:
+        typer = AutoTyper(backend)
+        typer.set_countdown(0)
+        typer.set_wpm(1000)
+        typer.set_text("a b")
+        typer.start()
+        typer.thread.join(5)
+        # Each character goes through Ctrl+V except the space
+        assert focused_window().count(XK.XK_space) == 1
+    finally:
+        backend.close()
@@ -0,0 +1,114 @@
+import unicodedata
+from typing import Iterator, List, Tuple
+
+# Paste modes accepted by AutoTyper.set_paste_mode
+PASTE_MODES = ("char", "grapheme", "word", "line", "run")
+
+# Characters that extend the preceding grapheme cluster besides combining marks
+_EXTENDERS = {
+    "\u0e33",  # THAI CHARACTER SARA AM (spacing mark)
+    "\u0eb3",  # LAO VOWEL SIGN AM
+    "\u200c",  # ZERO WIDTH NON-JOINER
+    "\u200d",  # ZERO WIDTH JOINER
+}
+
+
+def is_extender(char: str) -> bool:
+    """Check whether char attaches to the previous grapheme cluster."""
+    if char in _EXTENDERS:
+        return True
+    if "\ufe00" <= char <= "\ufe0f":  # Variation selectors
+        return True
+    return unicodedata.category(char) in ("Mn", "Mc", "Me")
+
+
+def iter_graphemes(text: str, start: int = 0, end: int = -1) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start, end) offsets of grapheme clusters in text.
+
+    This is a lightweight approximation of UAX #29 that keeps base
+    characters together with their combining marks (Thai tone marks and
+    vowels included) and treats CRLF as a single cluster.
+
+    Args:
+        text: Source text
+        start: Offset to start segmenting from
+        end: Offset to stop at, or -1 for the end of text
+
+    Returns:
+        Iterator[Tuple[int, int]]: Cluster offsets
+    """
+    if end < 0:
+        end = len(text)
+    i = start
+    while i < end:
+        j = i + 1
+        if text[i] == "\r" and j < end and text[j] == "\n":
+            j += 1
+        elif text[i] not in "\r\n":
+            while j < end and is_extender(text[j]):
+                j += 1
+        yield i, j
+        i = j
+
+
+def iter_segments(text: str, mode: str = "char", chunk_size: int = 1) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start, end) offsets of the chunks text is pasted in.
+
+    Args:
+        text: Source text
+        mode: One of PASTE_MODES
+        chunk_size: Number of grapheme clusters per chunk in 'run' mode
+
+    Returns:
+        Iterator[Tuple[int, int]]: Chunk offsets covering the whole text
+    """
+    if mode == "char":
+        for i in range(len(text)):
+            yield i, i + 1
+    elif mode == "grapheme":
+        yield from iter_graphemes(text)
+    elif mode == "word":
+        # A word chunk is a run of non-space characters plus the spaces after it
+        i = 0
+        length = len(text)
+        while i < length:
+            j = i
+            while j < length and not text[j].isspace():
+                j += 1
+            while j < length and text[j].isspace() and text[j] not in "\r\n":
+                j += 1
+            if j == i:
+                j += 1  # Lone newline
+            yield i, j
+            i = j
+    elif mode == "line":
+        i = 0
+        length = len(text)
+        while i < length:
+            j = text.find("\n", i)
+            j = length if j < 0 else j + 1
+            yield i, j
+            i = j
+    elif mode == "run":
+        chunk_size = max(1, chunk_size)
+        run_start = None
+        count = 0
+        for cluster_start, cluster_end in iter_graphemes(text):
+            if run_start is None:
+                run_start = cluster_start
+            count += 1
+            if count == chunk_size:
+                yield run_start, cluster_end
+                run_start = None
+                count = 0
+        if run_start is not None:
+            yield run_start, len(text)
+    else:
+        raise ValueError(f"Unknown paste mode: {mode}")
+
+
+def segment_text(text: str, mode: str = "char", chunk_size: int = 1) -> List[str]:
+    """Split text into the chunks produced by iter_segments."""
+    return [text[start:end] for start, end in iter_segments(text, mode, chunk_size)]
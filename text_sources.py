@@ -0,0 +1,197 @@
+import codecs
+import mmap
+import os
+import sys
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from text_segmentation import is_extender
+
+# Default number of bytes decoded per block when streaming
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+
+class TextSource:
+    """
+    Lazily produced text for the typing engine.
+
+    Sources yield (text, start, end) blocks, where start and end are
+    positions in the source's own unit (characters for strings, bytes
+    for files and streams) used for progress reporting.
+    """
+
+    unit = "chars"
+
+    @property
+    def total(self) -> Optional[int]:
+        """Return the source length in units, or None when unknown."""
+        return None
+
+    @property
+    def rewindable(self) -> bool:
+        """Check whether blocks() can be iterated more than once."""
+        return True
+
+    def blocks(self, start: int = 0) -> Iterator[Tuple[str, int, int]]:
+        """
+        Yield (text, start, end) blocks in order.
+
+        Args:
+            start: Position to start at, a block start from an earlier
+                iteration when resuming; only rewindable sources support it
+        """
+        raise NotImplementedError
+
+
+class StringSource(TextSource):
+    """An in-memory string delivered as a single block."""
+
+    def __init__(self, text: str):
+        """Wrap text."""
+        self.text = text
+
+    @property
+    def total(self) -> Optional[int]:
+        """Return the text length in characters."""
+        return len(self.text)
+
+    def blocks(self, start: int = 0) -> Iterator[Tuple[str, int, int]]:
+        """Yield the whole text, or its remainder from start."""
+        if start < len(self.text):
+            yield self.text[start:], start, len(self.text)
+
+
+def _split_complete(text: str) -> int:
+    """Return the offset where the last, possibly incomplete, grapheme cluster starts."""
+    cut = len(text)
+    while cut > 0 and is_extender(text[cut - 1]):
+        cut -= 1
+    # Keep the base character with the combining marks that may follow it
+    return max(0, cut - 1)
+
+
+def _encoded_length(text: str, encoding: str) -> int:
+    """Return the byte length of text in encoding, without a byte order mark the codec may add."""
+    return len(("\0" + text).encode(encoding)) - len("\0".encode(encoding))
+
+
+def _decode_blocks(chunks: Iterator[bytes], encoding: str, position: int = 0) -> Iterator[Tuple[str, int, int]]:
+    """
+    Incrementally decode byte chunks starting at byte position without splitting characters or clusters.
+
+    Offsets count the raw bytes consumed, less the bytes the decoder still
+    buffers and those of the few characters held back for the next block,
+    so they stay exact when invalid bytes are replaced.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    consumed = position
+    for data in chunks:
+        consumed += len(data)
+        text = pending + decoder.decode(data)
+        cut = _split_complete(text)
+        if cut < len(text) and text[cut] == "\ufffd":
+            # May stand for any number of invalid bytes, so it can't be held back;
+            # it has no cluster to keep together anyway
+            cut += 1
+        block, pending = text[:cut], text[cut:]
+        if block:
+            end = consumed - len(decoder.getstate()[0]) - _encoded_length(pending, encoding)
+            yield block, position, end
+            position = end
+    text = pending + decoder.decode(b"", final=True)
+    if text:
+        yield text, position, consumed
+
+
+class FileSource(TextSource):
+    """A text file decoded block by block through a memory map."""
+
+    unit = "bytes"
+
+    def __init__(self, path: str, encoding: str = "utf-8", block_size: int = DEFAULT_BLOCK_SIZE):
+        """
+        Initialize a file source.
+
+        Args:
+            path: Path of the text file
+            encoding: File encoding
+            block_size: Bytes decoded per block
+        """
+        self.path = path
+        self.encoding = encoding
+        self.block_size = max(16, block_size)
+
+    @property
+    def total(self) -> Optional[int]:
+        """Return the file size in bytes."""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return None
+
+    def _chunks(self, start: int = 0) -> Iterator[bytes]:
+        """
+        Yield raw byte chunks of the file from byte offset start.
+
+        Chunks end at multiples of block_size wherever start is, so a run
+        resumed from a block start decodes the same blocks as a full read.
+        """
+        block_size = self.block_size
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offset = start
+                while offset < len(mm):
+                    end = (offset // block_size + 1) * block_size
+                    yield mm[offset:end]
+                    offset = end
+
+    def _first_offset(self) -> int:
+        """Return the offset of the first character, after a UTF-8 byte order mark."""
+        with open(self.path, "rb") as f:
+            return 3 if f.read(3) == codecs.BOM_UTF8 else 0
+
+    def blocks(self, start: int = 0) -> Iterator[Tuple[str, int, int]]:
+        """Yield decoded blocks with byte offsets."""
+        start = max(start, self._first_offset())
+        return _decode_blocks(self._chunks(start), self.encoding, start)
+
+
+class StreamSource(TextSource):
+    """A binary stream such as stdin, readable only once."""
+
+    unit = "bytes"
+
+    def __init__(self, stream: Optional[BinaryIO] = None, encoding: str = "utf-8",
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        """
+        Initialize a stream source.
+
+        Args:
+            stream: Binary stream, defaults to sys.stdin.buffer
+            encoding: Stream encoding
+            block_size: Bytes read per block
+        """
+        self.stream = stream if stream is not None else sys.stdin.buffer
+        self.encoding = encoding
+        self.block_size = max(16, block_size)
+
+    @property
+    def rewindable(self) -> bool:
+        """Streams can only be read once."""
+        return False
+
+    def _chunks(self) -> Iterator[bytes]:
+        """Yield raw byte chunks until end of stream."""
+        while True:
+            data = self.stream.read(self.block_size)
+            if not data:
+                return
+            yield data
+
+    def blocks(self, start: int = 0) -> Iterator[Tuple[str, int, int]]:
+        """Yield decoded blocks with byte offsets; start must be 0 for streams."""
+        if start:
+            raise ValueError("Streams can't be resumed")
+        return _decode_blocks(self._chunks(), self.encoding)
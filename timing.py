@@ -0,0 +1,265 @@
+import math
+import random
+import threading
+import time
+from array import array
+from typing import Optional
+
+
+class MonotonicClock:
+    """Wall clock used by the typing engine, based on time.perf_counter."""
+
+    # Whether sleep() wakes exactly on time, making spin-waiting unnecessary
+    precise_sleep = False
+
+    def now(self) -> float:
+        """Return the current monotonic time in seconds."""
+        return time.perf_counter()
+
+    def sleep(self, seconds: float) -> None:
+        """Block the calling thread for the given number of seconds."""
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def wait(self, event: threading.Event, seconds: float) -> bool:
+        """Sleep up to seconds, returning True early if event is set."""
+        return event.wait(max(0.0, seconds))
+
+
+class SimulatedClock(MonotonicClock):
+    """
+    Virtual clock for benchmarks and tests.
+
+    sleep() advances virtual time instantly, so runs at 1 WPM finish in
+    milliseconds while the engine still sees the exact schedule.
+    """
+
+    precise_sleep = True
+
+    def __init__(self, start: float = 0.0):
+        """Initialize the clock at the given virtual time."""
+        self.time = start
+
+    def now(self) -> float:
+        """Return the current virtual time."""
+        return self.time
+
+    def sleep(self, seconds: float) -> None:
+        """Advance virtual time by seconds."""
+        if seconds > 0:
+            self.time += seconds
+
+    def wait(self, event: threading.Event, seconds: float) -> bool:
+        """Advance virtual time by seconds unless event is already set."""
+        if event.is_set():
+            return True
+        self.sleep(seconds)
+        return event.is_set()
+
+
+class KeystrokeScheduler:
+    """
+    Deadline-based keystroke pacing.
+
+    Each keystroke is scheduled at an absolute deadline computed from the
+    previous deadline rather than from the time the keystroke finished, so
+    time spent on clipboard and key injection does not accumulate into the
+    typing rate. Waits sleep until shortly before the deadline and spin for
+    the remainder to get sub-millisecond accuracy.
+    """
+
+    def __init__(self, clock: Optional[MonotonicClock] = None,
+                 spin_threshold: float = 0.002, max_lag: float = 0.25):
+        """
+        Initialize the scheduler.
+
+        Args:
+            clock: Time source, defaults to MonotonicClock
+            spin_threshold: Seconds before a deadline to switch from sleeping to spinning
+            max_lag: Seconds the scheduler may fall behind before it stops
+                trying to catch up and rebases on the current time
+        """
+        self.clock = clock or MonotonicClock()
+        self.spin_threshold = spin_threshold
+        self.max_lag = max_lag
+        self.start_time = 0.0
+        self.next_deadline = 0.0
+        self.suspended_time = 0.0
+        self.chars = 0
+        self._suspended_at: Optional[float] = None
+
+    def start(self) -> None:
+        """Start a new run at the current time."""
+        self.start_time = self.clock.now()
+        self.next_deadline = self.start_time
+        self.suspended_time = 0.0
+        self.chars = 0
+        self._suspended_at = None
+
+    def add_chars(self, count: int) -> None:
+        """Record that count characters were emitted."""
+        self.chars += count
+
+    def wait(self, delay: float, interrupt: Optional[threading.Event] = None) -> bool:
+        """
+        Wait until delay seconds after the previous deadline.
+
+        Args:
+            delay: Seconds after the previous deadline
+            interrupt: Event that ends the wait early when set
+
+        Returns:
+            bool: True if the deadline was reached, False if interrupted; an
+                interrupted wait can be repeated with the same delay
+        """
+        deadline = self.next_deadline + delay
+        now = self.clock.now()
+        if now - deadline > self.max_lag:
+            # Too far behind (e.g. a stalled paste); don't burst to catch up
+            deadline = now
+        if not self.wait_until(deadline, interrupt):
+            return False
+        self.next_deadline = deadline
+        return True
+
+    def wait_until(self, deadline: float, interrupt: Optional[threading.Event] = None) -> bool:
+        """Hybrid sleep/spin wait until the given clock time; False if interrupted."""
+        clock = self.clock
+        remaining = deadline - clock.now()
+        if interrupt is None:
+            if clock.precise_sleep:
+                clock.sleep(remaining)
+                return True
+            if remaining > self.spin_threshold:
+                clock.sleep(remaining - self.spin_threshold)
+        else:
+            if clock.precise_sleep:
+                return not clock.wait(interrupt, remaining)
+            if remaining > self.spin_threshold and clock.wait(interrupt, remaining - self.spin_threshold):
+                return False
+        while clock.now() < deadline:
+            if interrupt is not None and interrupt.is_set():
+                return False
+            clock.sleep(0)
+        return True
+
+    def suspend(self) -> None:
+        """Exclude the time from now until resume() from the achieved rate."""
+        if self._suspended_at is None:
+            self._suspended_at = self.clock.now()
+
+    def resume(self) -> None:
+        """End a suspension, shifting the pending deadline by its length."""
+        now = self.clock.now()
+        if self._suspended_at is not None:
+            suspended = now - self._suspended_at
+            self.suspended_time += suspended
+            self.next_deadline += suspended
+            self._suspended_at = None
+        else:
+            self.next_deadline = now
+
+    def elapsed(self) -> float:
+        """Return active typing time in seconds, excluding suspensions."""
+        end = self._suspended_at if self._suspended_at is not None else self.clock.now()
+        return max(0.0, end - self.start_time - self.suspended_time)
+
+    def achieved_cps(self) -> float:
+        """Return the achieved rate in characters per second."""
+        elapsed = self.elapsed()
+        return self.chars / elapsed if elapsed > 0 else 0.0
+
+    def achieved_wpm(self) -> float:
+        """Return the achieved rate in words per minute (5 characters per word)."""
+        return self.achieved_cps() * 60.0 / 5
+
+
+# Jitter distributions supported by DelaySchedule
+DISTRIBUTIONS = ("uniform", "normal", "lognormal", "gamma")
+
+
+class DelaySchedule:
+    """
+    Precomputed per-keystroke delay schedule.
+
+    Random jitter is generated up front into a compact array('d') buffer,
+    one rolling window at a time, so the typing loop only indexes into it.
+    Runs with the same seed produce the same schedule.
+    """
+
+    def __init__(self, base_delay: float, jitter_enabled: bool = False,
+                 jitter_min: float = 0.0, jitter_max: float = 0.0,
+                 distribution: str = "uniform", seed: Optional[int] = None,
+                 window: int = 4096):
+        """
+        Initialize the schedule.
+
+        Args:
+            base_delay: Seconds per character derived from WPM
+            jitter_enabled: Whether random jitter is added
+            jitter_min: Minimum jitter in seconds
+            jitter_max: Maximum jitter in seconds
+            distribution: One of DISTRIBUTIONS
+            seed: RNG seed, or None to pick a random one
+            window: Number of jitter values generated per block
+        """
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown delay distribution: {distribution}")
+        self.base_delay = base_delay
+        self.jitter_enabled = jitter_enabled
+        self.jitter_min = jitter_min
+        self.jitter_max = max(jitter_min, jitter_max)
+        self.distribution = distribution
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.window = max(1, window)
+        self.reset()
+
+    def reset(self) -> None:
+        """Rewind the schedule to its first delay."""
+        self._rng = random.Random(self.seed)
+        self._buffer = array('d')
+        self._buffer_start = 0
+        if self.jitter_enabled:
+            self._fill(0)
+
+    def _fill(self, index: int) -> None:
+        """Generate jitter blocks until the buffer covers index."""
+        while index >= self._buffer_start + len(self._buffer):
+            self._buffer_start += len(self._buffer)
+            self._buffer = self._generate(self.window)
+
+    def _generate(self, count: int) -> array:
+        """Draw count jitter values clipped to [jitter_min, jitter_max]."""
+        low, high = self.jitter_min, self.jitter_max
+        rng = self._rng
+        if high <= low:
+            return array('d', [low]) * count
+        mean = (low + high) / 2
+        if self.distribution == "uniform":
+            values = (rng.uniform(low, high) for _ in range(count))
+        elif self.distribution == "normal":
+            sigma = (high - low) / 6
+            values = (rng.gauss(mean, sigma) for _ in range(count))
+        elif self.distribution == "lognormal":
+            # Right-skewed around the midpoint, offset by the minimum
+            sigma = 0.5
+            mu = math.log(mean - low) - sigma * sigma / 2
+            values = (low + rng.lognormvariate(mu, sigma) for _ in range(count))
+        else:
+            shape = 2.0
+            scale = (mean - low) / shape
+            values = (low + rng.gammavariate(shape, scale) for _ in range(count))
+        return array('d', (min(high, max(low, value)) for value in values))
+
+    def jitter(self, index: int) -> float:
+        """Return the jitter for keystroke index."""
+        if not self.jitter_enabled:
+            return 0.0
+        if index < self._buffer_start:
+            self.reset()
+        self._fill(index)
+        return self._buffer[index - self._buffer_start]
+
+    def delay(self, index: int, length: int = 1) -> float:
+        """Return the delay after keystroke index emitting length characters."""
+        return self.base_delay * length + self.jitter(index)
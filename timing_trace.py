@@ -0,0 +1,225 @@
+import mmap
+import struct
+import sys
+from array import array
+from typing import Iterable, Optional
+
+# File signature and format version of timing traces
+TRACE_MAGIC = b"ATTR"
+TRACE_VERSION = 1
+
+# magic, version, item typecode, reserved, tick in microseconds, event count, padding
+_HEADER = struct.Struct("<4sBcHIQ4x")
+
+# Resolution of saved intervals; with 1 ms ticks most traces fit in 2 bytes per event
+DEFAULT_TICK_US = 1000
+
+# Pauses longer than this are clipped when recording (the typist stopped, not slowed down)
+MAX_PAUSE = 2.0
+
+# Keys that are not recorded as keystrokes of their own
+MODIFIER_KEYS = frozenset(("shift", "right shift", "left shift", "ctrl", "right ctrl", "left ctrl",
+                           "alt", "right alt", "left alt", "alt gr", "windows", "left windows",
+                           "right windows", "caps lock"))
+
+
+def _compact(ticks: array) -> array:
+    """Return a copy of 32-bit ticks, narrowed to 16 bits when they all fit."""
+    return array('H' if not ticks or max(ticks) < 2 ** 16 else 'I', ticks)
+
+
+class TimingTrace:
+    """
+    Recorded inter-key intervals, in ticks of a fixed number of microseconds.
+
+    Traces are stored as a small header followed by one unsigned 16-bit
+    integer per keystroke, or 32-bit when an interval doesn't fit. load()
+    memory-maps the file and reads the intervals through a memoryview, so
+    opening a trace with millions of events costs nothing up front and
+    playback only touches the pages it reaches.
+    """
+
+    def __init__(self, intervals, tick_us: int = DEFAULT_TICK_US, mapping=None):
+        """
+        Wrap interval ticks; use from_seconds() or load() to create a trace.
+
+        Args:
+            intervals: array or memoryview of unsigned interval ticks
+            tick_us: Microseconds per tick
+            mapping: Memory map backing intervals, closed by close()
+        """
+        self.intervals = intervals
+        self.tick_us = tick_us
+        self.tick = tick_us / 1e6
+        self._mapping = mapping
+        self._mean: Optional[float] = None
+
+    @classmethod
+    def from_seconds(cls, intervals: Iterable[float], tick_us: int = DEFAULT_TICK_US) -> "TimingTrace":
+        """Build a trace from intervals in seconds."""
+        ticks = array('I', (max(0, round(value * 1e6 / tick_us)) for value in intervals))
+        return cls(_compact(ticks), tick_us)
+
+    @classmethod
+    def load(cls, path: str) -> "TimingTrace":
+        """
+        Open a saved trace without reading its events.
+
+        Raises:
+            ValueError: If the file is not a timing trace
+        """
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f"Not a timing trace: {path}")
+            magic, version, typecode, _, tick_us, count = _HEADER.unpack(header)
+            typecode = typecode.decode("ascii")
+            if magic != TRACE_MAGIC or version != TRACE_VERSION or typecode not in ("H", "I"):
+                raise ValueError(f"Not a timing trace: {path}")
+            if not count:
+                return cls(array(typecode), tick_us)
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        end = _HEADER.size + count * array(typecode).itemsize
+        if len(mapping) < end:
+            mapping.close()
+            raise ValueError(f"Truncated timing trace: {path}")
+        if sys.byteorder == "little":
+            intervals = memoryview(mapping)[_HEADER.size:end].cast(typecode)
+        else:
+            intervals = array(typecode, mapping[_HEADER.size:end])
+            intervals.byteswap()
+            mapping.close()
+            mapping = None
+        return cls(intervals, tick_us, mapping)
+
+    def save(self, path: str) -> None:
+        """Write the trace in the binary trace format."""
+        intervals = array(self.intervals.format if isinstance(self.intervals, memoryview)
+                          else self.intervals.typecode, self.intervals)
+        if sys.byteorder != "little":
+            intervals.byteswap()
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, intervals.typecode.encode("ascii"),
+                                 0, self.tick_us, len(intervals)))
+            intervals.tofile(f)
+
+    def close(self) -> None:
+        """Release the file mapping of a loaded trace."""
+        if self._mapping is not None:
+            if isinstance(self.intervals, memoryview):
+                self.intervals.release()
+            self._mapping.close()
+            self._mapping = None
+
+    def __len__(self) -> int:
+        """Return the number of recorded intervals."""
+        return len(self.intervals)
+
+    def interval(self, index: int) -> float:
+        """Return the interval at index in seconds."""
+        return self.intervals[index] * self.tick
+
+    @property
+    def mean(self) -> float:
+        """Return the mean interval in seconds, computed once."""
+        if self._mean is None:
+            self._mean = sum(self.intervals) * self.tick / len(self.intervals) if len(self) else 0.0
+        return self._mean
+
+
+class TraceSchedule:
+    """
+    Delay schedule replaying a TimingTrace, interchangeable with timing.DelaySchedule.
+
+    Keystroke i waits the i-th recorded interval times scale; a paste of
+    several characters waits that many intervals' worth. Past the end of
+    the trace it starts over when looping, otherwise it keeps the mean
+    interval. The delay depends only on the keystroke index, so resumed
+    runs continue with the same timings.
+    """
+
+    # Replays have no RNG; kept so checkpoints can store schedules uniformly
+    seed = 0
+
+    def __init__(self, trace: TimingTrace, scale: float = 1.0, loop: bool = True):
+        """
+        Initialize the schedule.
+
+        Args:
+            trace: Recorded intervals
+            scale: Factor applied to every interval, e.g. 0.5 for twice as fast
+            loop: Whether to start over at the end of the trace
+        """
+        if not len(trace):
+            raise ValueError("Timing trace is empty")
+        if scale <= 0:
+            raise ValueError("Timing scale must be positive")
+        self.trace = trace
+        self.scale = scale
+        self.loop = loop
+        self._intervals = trace.intervals
+        self._count = len(trace)
+        self._factor = trace.tick * scale
+
+    def reset(self) -> None:
+        """Rewind the schedule; replays are stateless, so this does nothing."""
+
+    def delay(self, index: int, length: int = 1) -> float:
+        """Return the delay after keystroke index emitting length characters."""
+        if index >= self._count:
+            if not self.loop:
+                return self.trace.mean * self.scale * length
+            index %= self._count
+        return self._intervals[index] * self._factor * length
+
+
+class TraceRecorder:
+    """
+    Records the intervals between a typist's key presses through keyboard hooks.
+
+    Only key-down events of non-modifier keys count; auto-repeat of a held
+    key is recorded like any other press. Pauses longer than max_pause are
+    clipped to it.
+    """
+
+    def __init__(self, max_pause: float = MAX_PAUSE, tick_us: int = DEFAULT_TICK_US):
+        """
+        Initialize an empty recording.
+
+        Args:
+            max_pause: Longest interval kept, in seconds
+            tick_us: Microseconds per tick of the recorded trace
+        """
+        self.max_pause = max_pause
+        self.tick_us = tick_us
+        self.ticks = array('I')
+        self._last: Optional[float] = None
+        self._hook = None
+
+    def start(self) -> None:
+        """Start listening to the keyboard."""
+        import keyboard
+        if self._hook is None:
+            self._last = None
+            self._hook = keyboard.hook(self.record)
+
+    def stop(self) -> TimingTrace:
+        """Stop listening and return the recorded trace."""
+        if self._hook is not None:
+            import keyboard
+            keyboard.unhook(self._hook)
+            self._hook = None
+        return self.trace()
+
+    def record(self, event) -> None:
+        """Handle a keyboard event; called from the hook thread."""
+        if event.event_type != "down" or (event.name or "").lower() in MODIFIER_KEYS:
+            return
+        last, self._last = self._last, event.time
+        if last is not None:
+            interval = min(max(0.0, event.time - last), self.max_pause)
+            self.ticks.append(round(interval * 1e6 / self.tick_us))
+
+    def trace(self) -> TimingTrace:
+        """Return the intervals recorded so far as a trace."""
+        return TimingTrace(_compact(self.ticks), self.tick_us)